@@ -0,0 +1,8 @@
+CREATE TABLE IF NOT EXISTS details_leases (
+	property_row_id INT PRIMARY KEY,
+	worker_id VARCHAR(255) NOT NULL,
+	leased_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+	expires_at TIMESTAMP NOT NULL,
+	KEY idx_details_leases_expires_at (expires_at),
+	CONSTRAINT fk_details_leases_property FOREIGN KEY (property_row_id) REFERENCES properties (id) ON DELETE CASCADE
+);
\ No newline at end of file
@@ -0,0 +1,12 @@
+-- A single ALTER, so a failure cannot leave some of the indexes created and the file unable to re-run
+
+-- Details backlog: WHERE details_fetched = FALSE AND property_selling_type = ? AND unit_type = ? ORDER BY id
+-- (InnoDB appends the primary key to every secondary index, so the keyset walk on id is covered too)
+-- Date-range analytics: listed_date, updated_at
+ALTER TABLE properties
+	ADD INDEX idx_properties_backlog (details_fetched, property_selling_type, unit_type),
+	ADD INDEX idx_properties_listed_date (listed_date),
+	ADD INDEX idx_properties_updated_at (updated_at);
+
+-- Lookups by property_id alone (update_field_value, delete_listing) already use the leftmost
+-- column of unique_property (property_id, property_selling_type, unit_type), so no extra index.
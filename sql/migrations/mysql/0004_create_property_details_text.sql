@@ -0,0 +1,24 @@
+-- Bulky text moved out of the hot properties table into a 1:1 companion keyed by properties.id.
+-- MEDIUMBLOB because the app may store values zlib-compressed (see CompressedText); rows copied
+-- here are plain UTF-8 and stay readable as they are.
+CREATE TABLE IF NOT EXISTS property_details_text (
+	id INT PRIMARY KEY,
+	description MEDIUMBLOB DEFAULT NULL,
+	raw_details_text MEDIUMBLOB DEFAULT NULL,
+	raw_amenities_text MEDIUMBLOB DEFAULT NULL,
+	raw_facilities_text MEDIUMBLOB DEFAULT NULL,
+	updated_fields MEDIUMBLOB DEFAULT NULL,
+	updated_old_values MEDIUMBLOB DEFAULT NULL,
+	CONSTRAINT fk_property_details_text_property FOREIGN KEY (id) REFERENCES properties (id) ON DELETE CASCADE
+);
+
+-- IGNORE keeps the copy re-runnable if this file is retried halfway
+INSERT IGNORE INTO property_details_text (id, description, raw_details_text, raw_amenities_text, raw_facilities_text, updated_fields, updated_old_values)
+SELECT id, description, raw_details_text, raw_amenities_text, raw_facilities_text, updated_fields, updated_old_values
+FROM properties
+WHERE description IS NOT NULL
+	OR raw_details_text IS NOT NULL
+	OR raw_amenities_text IS NOT NULL
+	OR raw_facilities_text IS NOT NULL
+	OR updated_fields IS NOT NULL
+	OR updated_old_values IS NOT NULL;
@@ -0,0 +1,8 @@
+-- Copied to property_details_text by 0004
+ALTER TABLE properties
+	DROP COLUMN description,
+	DROP COLUMN raw_details_text,
+	DROP COLUMN raw_amenities_text,
+	DROP COLUMN raw_facilities_text,
+	DROP COLUMN updated_fields,
+	DROP COLUMN updated_old_values;
@@ -0,0 +1,16 @@
+-- One row per changed column, appended in the same transaction as the upsert that changed it.
+-- Replaces the " || "-joined updated_fields / updated_old_values strings, which kept only the latest
+-- change; those columns stay in property_details_text for the older audit trail but are no longer written.
+CREATE TABLE IF NOT EXISTS property_history (
+	id BIGINT AUTO_INCREMENT PRIMARY KEY,
+	property_row_id INT NOT NULL,
+	column_name VARCHAR(64) NOT NULL,
+	old_value TEXT DEFAULT NULL,
+	new_value TEXT DEFAULT NULL,
+	changed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+	-- Time series of one property (e.g. its selling_price changes)
+	KEY idx_property_history_property (property_row_id, column_name, changed_at),
+	-- Changes per day across all properties
+	KEY idx_property_history_changed_at (changed_at, column_name),
+	CONSTRAINT fk_property_history_property FOREIGN KEY (property_row_id) REFERENCES properties (id) ON DELETE CASCADE
+);
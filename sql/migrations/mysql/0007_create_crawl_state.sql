@@ -0,0 +1,10 @@
+-- Per-(mode, unit_type) high-water mark of the incremental listings crawl
+CREATE TABLE IF NOT EXISTS crawl_state (
+	property_selling_type VARCHAR(16) NOT NULL,
+	unit_type VARCHAR(32) NOT NULL,
+	hwm_listed_date DATE DEFAULT NULL,
+	hwm_property_id VARCHAR(255) DEFAULT NULL,
+	pages_crawled INT DEFAULT NULL,
+	last_crawled_at TIMESTAMP NULL DEFAULT NULL,
+	PRIMARY KEY (property_selling_type, unit_type)
+);
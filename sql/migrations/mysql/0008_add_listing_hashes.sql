@@ -0,0 +1,5 @@
+-- Change detection for listings (Properties.with_hashes). Existing rows get their hashes the next
+-- time they are seen, after one column-by-column comparison.
+ALTER TABLE properties
+	ADD COLUMN listing_hash CHAR(32) DEFAULT NULL,
+	ADD COLUMN details_fingerprint CHAR(32) DEFAULT NULL;
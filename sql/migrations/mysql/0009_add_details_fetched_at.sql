@@ -0,0 +1,3 @@
+-- When the details page of a row was last loaded; lets siblings with the same property_id and
+-- property_url reuse fresh details instead of loading the same page again
+ALTER TABLE properties ADD COLUMN details_fetched_at TIMESTAMP NULL DEFAULT NULL;
@@ -0,0 +1,8 @@
+-- History must outlive the properties row it describes: drop the ON DELETE CASCADE foreign key and keep
+-- the listing's business key, so the log of a deleted (or re-inserted) listing can still be found
+ALTER TABLE property_history
+	DROP FOREIGN KEY fk_property_history_property,
+	ADD COLUMN property_id VARCHAR(255) DEFAULT NULL AFTER property_row_id,
+	ADD COLUMN property_selling_type VARCHAR(16) DEFAULT NULL AFTER property_id,
+	ADD COLUMN unit_type VARCHAR(32) DEFAULT NULL AFTER property_selling_type,
+	ADD KEY idx_property_history_listing (property_id, property_selling_type, unit_type, changed_at);
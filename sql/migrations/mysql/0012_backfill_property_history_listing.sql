@@ -0,0 +1,5 @@
+-- Business key of the history written before 0011
+UPDATE property_history h
+JOIN properties p ON p.id = h.property_row_id
+SET h.property_id = p.property_id, h.property_selling_type = p.property_selling_type, h.unit_type = p.unit_type
+WHERE h.property_id IS NULL;
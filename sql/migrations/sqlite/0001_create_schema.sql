@@ -0,0 +1,69 @@
+-- Same schema as sql/migrations/mysql up to 0006, for the embedded SQLite backend.
+-- ENUM columns are plain TEXT; every statement is IF NOT EXISTS so a half-applied run can be retried.
+CREATE TABLE IF NOT EXISTS properties (
+	id INTEGER PRIMARY KEY AUTOINCREMENT,
+	property_id VARCHAR(255) NOT NULL,
+	title VARCHAR(255) NOT NULL,
+	address VARCHAR(255),
+	property_url TEXT NOT NULL,
+	availability TEXT DEFAULT NULL,
+	project_year INTEGER DEFAULT NULL,
+	closest_mrt VARCHAR(255) DEFAULT NULL,
+	distance_to_closest_mrt INTEGER DEFAULT NULL,
+	is_verified_property BOOLEAN DEFAULT NULL,
+	is_everyone_welcomed BOOLEAN DEFAULT NULL,
+	listed_date DATE DEFAULT NULL,
+	agent_name VARCHAR(255),
+	agent_rating FLOAT DEFAULT NULL,
+	property_selling_type TEXT NOT NULL,
+	unit_type TEXT NOT NULL,
+	selling_price DECIMAL(12,2) DEFAULT NULL,
+	selling_price_text VARCHAR(255) DEFAULT NULL,
+	details_fetched BOOLEAN NOT NULL DEFAULT 0,
+	property_type TEXT DEFAULT NULL,
+	property_type_text VARCHAR(255) DEFAULT NULL,
+	lease_term TEXT DEFAULT NULL,
+	lease_term_text VARCHAR(255) DEFAULT NULL,
+	bedroom_count INTEGER DEFAULT NULL,
+	bathroom_count INTEGER DEFAULT NULL,
+	furnishing TEXT DEFAULT NULL,
+	floor_size_sqft INTEGER DEFAULT NULL,
+	land_size_sqft INTEGER DEFAULT NULL,
+	psf_floor DECIMAL(12,2) DEFAULT NULL,
+	psf_land DECIMAL(12,2) DEFAULT NULL,
+	created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+	updated_at TIMESTAMP NULL DEFAULT NULL,
+	CONSTRAINT unique_property UNIQUE (property_id, property_selling_type, unit_type)
+);
+CREATE INDEX IF NOT EXISTS idx_properties_backlog ON properties (details_fetched, property_selling_type, unit_type);
+CREATE INDEX IF NOT EXISTS idx_properties_listed_date ON properties (listed_date);
+CREATE INDEX IF NOT EXISTS idx_properties_updated_at ON properties (updated_at);
+
+CREATE TABLE IF NOT EXISTS details_leases (
+	property_row_id INTEGER PRIMARY KEY REFERENCES properties (id) ON DELETE CASCADE,
+	worker_id VARCHAR(255) NOT NULL,
+	leased_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+	expires_at TIMESTAMP NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_details_leases_expires_at ON details_leases (expires_at);
+
+CREATE TABLE IF NOT EXISTS property_details_text (
+	id INTEGER PRIMARY KEY REFERENCES properties (id) ON DELETE CASCADE,
+	description BLOB DEFAULT NULL,
+	raw_details_text BLOB DEFAULT NULL,
+	raw_amenities_text BLOB DEFAULT NULL,
+	raw_facilities_text BLOB DEFAULT NULL,
+	updated_fields BLOB DEFAULT NULL,
+	updated_old_values BLOB DEFAULT NULL
+);
+
+CREATE TABLE IF NOT EXISTS property_history (
+	id INTEGER PRIMARY KEY AUTOINCREMENT,
+	property_row_id INTEGER NOT NULL REFERENCES properties (id) ON DELETE CASCADE,
+	column_name VARCHAR(64) NOT NULL,
+	old_value TEXT DEFAULT NULL,
+	new_value TEXT DEFAULT NULL,
+	changed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_property_history_property ON property_history (property_row_id, column_name, changed_at);
+CREATE INDEX IF NOT EXISTS idx_property_history_changed_at ON property_history (changed_at, column_name);
@@ -0,0 +1,3 @@
+-- Change detection for listings (mysql 0008)
+ALTER TABLE properties ADD COLUMN listing_hash CHAR(32) DEFAULT NULL;
+ALTER TABLE properties ADD COLUMN details_fingerprint CHAR(32) DEFAULT NULL;
@@ -0,0 +1,2 @@
+-- When the details page of a row was last loaded (mysql 0009)
+ALTER TABLE properties ADD COLUMN details_fetched_at TIMESTAMP NULL DEFAULT NULL;
@@ -0,0 +1,15 @@
+-- Progress of an interrupted listings / details scrape, resumed by the next run (mysql 0010)
+CREATE TABLE IF NOT EXISTS run_checkpoints (
+	kind VARCHAR(16) NOT NULL,
+	property_selling_type VARCHAR(16) NOT NULL,
+	unit_type VARCHAR(32) NOT NULL,
+	shard VARCHAR(32) NOT NULL,
+	last_posted INTEGER DEFAULT NULL,
+	cur_page INTEGER DEFAULT NULL,
+	max_pages INTEGER DEFAULT NULL,
+	last_property_id VARCHAR(255) DEFAULT NULL,
+	last_property_row_id INTEGER DEFAULT NULL,
+	processed INTEGER NOT NULL DEFAULT 0,
+	updated_at TIMESTAMP NULL DEFAULT NULL,
+	PRIMARY KEY (kind, property_selling_type, unit_type, shard)
+);
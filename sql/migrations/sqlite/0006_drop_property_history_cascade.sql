@@ -0,0 +1,22 @@
+-- History must outlive the properties row it describes (mysql 0011 and 0012). SQLite cannot drop a
+-- foreign key, so the table is rebuilt without it, with the listing's business key copied in.
+-- INSERT OR IGNORE keeps the copy idempotent if a run stops before the rename.
+CREATE TABLE IF NOT EXISTS property_history_new (
+	id INTEGER PRIMARY KEY AUTOINCREMENT,
+	property_row_id INTEGER NOT NULL,
+	property_id VARCHAR(255) DEFAULT NULL,
+	property_selling_type VARCHAR(16) DEFAULT NULL,
+	unit_type VARCHAR(32) DEFAULT NULL,
+	column_name VARCHAR(64) NOT NULL,
+	old_value TEXT DEFAULT NULL,
+	new_value TEXT DEFAULT NULL,
+	changed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+INSERT OR IGNORE INTO property_history_new (id, property_row_id, property_id, property_selling_type, unit_type, column_name, old_value, new_value, changed_at)
+SELECT h.id, h.property_row_id, p.property_id, p.property_selling_type, p.unit_type, h.column_name, h.old_value, h.new_value, h.changed_at
+FROM property_history h LEFT JOIN properties p ON p.id = h.property_row_id;
+DROP TABLE property_history;
+ALTER TABLE property_history_new RENAME TO property_history;
+CREATE INDEX IF NOT EXISTS idx_property_history_property ON property_history (property_row_id, column_name, changed_at);
+CREATE INDEX IF NOT EXISTS idx_property_history_changed_at ON property_history (changed_at, column_name);
+CREATE INDEX IF NOT EXISTS idx_property_history_listing ON property_history (property_id, property_selling_type, unit_type, changed_at);
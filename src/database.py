@@ -1,98 +1,429 @@
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import date
 from decimal import Decimal, ROUND_HALF_UP
-from sqlalchemy import create_engine, Column, Integer, String, Text, Boolean, Date, Enum, Float, TIMESTAMP, text, UniqueConstraint, DECIMAL
+from sqlalchemy import create_engine, event, select, insert, Index, update, delete, bindparam, tuple_, Column, Integer, BigInteger, String, Text, Boolean, Date, Enum, Float, ForeignKey, TIMESTAMP, text, UniqueConstraint, DECIMAL, LargeBinary, TypeDecorator
+from sqlalchemy.dialects.mysql import insert as mysql_insert, MEDIUMBLOB
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.associationproxy import association_proxy
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import relationship, sessionmaker
+from sqlalchemy.pool import NullPool
 from sqlalchemy.sql import func
+import hashlib
 import os
-import pymysql
-import random
+import threading
 import time
+import zlib
 
 # --- SQLAlchemy setup ---
 Base = declarative_base()
 Session = None
 engine = None
 
+# Per-run counters, fed by engine events (see stats())
+db_stats = {"queries": 0, "connections": 0, "checkouts": 0}
+
+# Versioned schema changes: sql/migrations/<dialect>/NNNN_description.sql
+MIGRATIONS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "sql", "migrations"))
+MIGRATIONS_LOCK = "smartvaluer_migrations"
+MIGRATIONS_LOCK_SECONDS = 600  # MySQL: how long to wait for the lock; SQLite: when a lock row is stale
+
+# Hot statements, built once per shape so SQLAlchemy's compiled cache is hit on every page / flush
+_statements = {}
+
 def init_db(db_config):
     """
     Initialize the SQLAlchemy engine and session, ensure DB and tables exist.
     Call this ONCE at app startup, passing in a config dict.
+    db_config["backend"] is "mysql" (default) or "sqlite" (a local file at db_config["sqlite_path"]).
     """
 
     # Global variables
     global engine, Session
+    CompressedText.enabled = bool(db_config.get("compress_text", True))
 
-    # Create the engine and session
+    if db_config.get("backend", "mysql") == "sqlite":
+        engine = create_sqlite_engine(db_config.get("sqlite_path") or "data/smartvaluer.db")
+        Session = sessionmaker(bind=engine)
+        track_stats(engine)
+        run_migrations(os.path.join(MIGRATIONS_DIR, "sqlite"))
+        return
+
+    # Create the pooled engine and session factory (one engine per process)
     BASE_DATABASE_URL = (
         f"mysql+pymysql://{db_config['user']}:{db_config['password']}@"
         f"{db_config['host']}:{db_config['port']}"
     )
     DATABASE_URL = f"{BASE_DATABASE_URL}/{db_config['name']}"
-    engine = create_engine(DATABASE_URL)
+    engine = create_engine(
+        DATABASE_URL,
+        pool_size=int(db_config.get("pool_size", 5)),
+        max_overflow=int(db_config.get("max_overflow", 5)),
+        pool_pre_ping=True,  # Drop connections MySQL closed (wait_timeout) instead of failing the next query
+        pool_recycle=int(db_config.get("pool_recycle", 1800)),
+    )
     Session = sessionmaker(bind=engine)
+    track_stats(engine)
 
-    # Create the database and tables if they do not exist
+    # Create the database if it does not exist, then bring the schema up to date
     ensure_database_exists(db_config)
-    sql_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "sql"))
-    create_table_if_not_exists(os.path.join(sql_dir, "create_table.sql"), db_config)
+    run_migrations(os.path.join(MIGRATIONS_DIR, "mysql"))
+
+def create_sqlite_engine(path):
+    # One file per node; WAL lets readers run alongside the single writer, and every worker process
+    # waits on the write lock (busy_timeout) instead of failing with "database is locked"
+    folder = os.path.dirname(os.path.abspath(path))
+    os.makedirs(folder, exist_ok=True)
+    sqlite_engine = create_engine(f"sqlite:///{path}", connect_args={"timeout": 30})
+
+    @event.listens_for(sqlite_engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.execute("PRAGMA busy_timeout=30000")
+        cursor.close()
+
+    return sqlite_engine
+
+def is_sqlite():
+    return engine is not None and engine.dialect.name == "sqlite"
+
+def seconds_from_now(seconds):
+    # now() shifted by seconds (negative for the past), in the database's own clock
+    if is_sqlite():
+        return func.datetime("now", f"{int(seconds):+d} seconds")
+    return func.timestampadd(text("SECOND"), int(seconds), func.now())
+
+def upsert_statement(table, key_cols, build_set):
+    """
+    INSERT that updates the existing row on a duplicate key_cols: ON DUPLICATE KEY UPDATE on MySQL,
+    ON CONFLICT (key_cols) DO UPDATE on SQLite. build_set(inserted) returns the SET clause, where
+    inserted refers to the values of the row being inserted.
+    """
+    if is_sqlite():
+        stmt = sqlite_insert(table)
+        return stmt.on_conflict_do_update(index_elements=list(key_cols), set_=build_set(stmt.excluded))
+    stmt = mysql_insert(table)
+    return stmt.on_duplicate_key_update(build_set(stmt.inserted))
+
+# --- Data Access Helpers ---
+@contextmanager
+def session_scope():
+    """
+    One session (and one transaction) for a page or a batch: commit on success, rollback on error.
+    """
+    new_session = Session()
+    try:
+        yield new_session
+        new_session.commit()
+    except BaseException:
+        new_session.rollback()
+        raise
+    finally:
+        new_session.close()
+
+def cached_statement(key, build):
+    # Build a statement once per key (e.g. its column list) and reuse it
+    statement = _statements.get(key)
+    if statement is None:
+        statement = _statements[key] = build()
+    return statement
+
+def track_stats(target_engine):
+    @event.listens_for(target_engine, "before_cursor_execute")
+    def count_query(conn, cursor, statement, parameters, context, executemany):
+        db_stats["queries"] += 1
+
+    @event.listens_for(target_engine, "connect")
+    def count_connection(dbapi_connection, connection_record):
+        db_stats["connections"] += 1
+
+    @event.listens_for(target_engine, "checkout")
+    def count_checkout(dbapi_connection, connection_record, connection_proxy):
+        db_stats["checkouts"] += 1
+
+def stats():
+    # Round-trips (an executemany counts once), new DBAPI connections and pool checkouts so far
+    return dict(db_stats)
+
+def report_stats():
+    pool_status = engine.pool.status() if engine is not None else "No Engine"
+    print(f"= Database | Queries: {db_stats['queries']} | Connections: {db_stats['connections']} | Checkouts: {db_stats['checkouts']} | Pool: {pool_status}")
 
 # --- Database and Table Creation ---
 def ensure_database_exists(db_config):
     """
     Create the database if it does not exist.
     """
+    # Server-level connection without a database, not pooled and disposed right away
     base_engine = create_engine(
         f"mysql+pymysql://{db_config['user']}:{db_config['password']}@"
-        f"{db_config['host']}:{db_config['port']}"
+        f"{db_config['host']}:{db_config['port']}",
+        poolclass=NullPool,
     )
-    with base_engine.connect() as connection:
-        result = connection.execute(text(f"SHOW DATABASES LIKE '{db_config['name']}';"))
-        if not result.fetchone():
-            connection.execute(text(f"CREATE DATABASE {db_config['name']};"))
-            print(f"> Database '{db_config['name']}' created.")
+    try:
+        with base_engine.connect() as connection:
+            result = connection.execute(text(f"SHOW DATABASES LIKE '{db_config['name']}';"))
+            if not result.fetchone():
+                connection.execute(text(f"CREATE DATABASE {db_config['name']};"))
+                print(f"> Database '{db_config['name']}' created.")
+    finally:
+        base_engine.dispose()
 
-def create_table_if_not_exists(sql_file_path, db_config):
+# --- Schema Migrations ---
+def run_migrations(migrations_dir):
     """
-    Create a table using the SQL in the given file if it does not exist.
+    Apply every NNNN_*.sql file in migrations_dir that is not yet recorded in schema_migrations,
+    in version order. A failing migration stops the run (and is retried next time) instead of being
+    printed and ignored. MySQL commits DDL implicitly, so keep one schema change per file.
+    Containers and worker processes starting together take migrations_lock() first, so only one of
+    them applies each file and the others find it recorded once they get the lock.
     """
+    with migrations_lock():
+        with engine.begin() as connection:
+            connection.exec_driver_sql(
+                "CREATE TABLE IF NOT EXISTS schema_migrations ("
+                "version INT PRIMARY KEY, name VARCHAR(255) NOT NULL, "
+                "applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+            )
+            applied = {row[0] for row in connection.exec_driver_sql("SELECT version FROM schema_migrations")}
+
+        for version, name, path in list_migrations(migrations_dir):
+            if version in applied:
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                statements = split_sql_statements(f.read())
+            try:
+                with engine.begin() as connection:
+                    for statement in statements:
+                        connection.exec_driver_sql(statement)
+                    connection.execute(
+                        text("INSERT INTO schema_migrations (version, name) VALUES (:version, :name)"),
+                        {"version": version, "name": name},
+                    )
+            except Exception as e:
+                raise RuntimeError(f"Migration {name} failed: {e}") from e
+            print(f"> Migration Applied: {name}")
 
-    # Check if the SQL file exists
-    sql_file_path = os.path.abspath(sql_file_path)
-    if not os.path.exists(sql_file_path):
-        print(f"> SQL file not found: {sql_file_path}")
+@contextmanager
+def migrations_lock():
+    """
+    Cross-process lock around run_migrations. MySQL uses the named lock GET_LOCK, which the server
+    drops with the connection if the process dies. SQLite has no named locks, so a row in
+    schema_migrations_lock is inserted instead; a row older than MIGRATIONS_LOCK_SECONDS was left
+    by a process that died and is taken over.
+    """
+    if is_sqlite():
+        with engine.begin() as connection:
+            connection.exec_driver_sql(
+                "CREATE TABLE IF NOT EXISTS schema_migrations_lock ("
+                "id INTEGER PRIMARY KEY, locked_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+            )
+        waiting = False
+        while True:
+            with engine.begin() as connection:
+                connection.exec_driver_sql(f"DELETE FROM schema_migrations_lock WHERE locked_at < datetime('now', '-{MIGRATIONS_LOCK_SECONDS} seconds')")
+                if connection.exec_driver_sql("INSERT OR IGNORE INTO schema_migrations_lock (id) VALUES (1)").rowcount:
+                    break
+            if not waiting:
+                print("> Waiting for Another Process to Finish the Migrations")
+                waiting = True
+            time.sleep(1)
+        try:
+            yield
+        finally:
+            with engine.begin() as connection:
+                connection.exec_driver_sql("DELETE FROM schema_migrations_lock WHERE id = 1")
         return
-    
-    # Read the SQL file
-    with open(sql_file_path, "r", encoding="utf-8") as f:
-        create_table_sql = f.read()
-
-    # Connect to the database
-    connection = pymysql.connect(
-        host=db_config['host'],
-        user=db_config['user'],
-        password=db_config['password'],
-        database=db_config['name'],
-        port=int(db_config['port'])
-    )
 
-    # Execute the SQL to create the table
-    try:
-        with connection.cursor() as cursor:
-            cursor.execute(create_table_sql)
-        connection.commit()
-    except Exception as e:
-        print(f"> Error creating table: {e}")
-    finally:
-        connection.close()
+    with engine.connect() as connection:
+        if connection.exec_driver_sql(f"SELECT GET_LOCK('{MIGRATIONS_LOCK}', {MIGRATIONS_LOCK_SECONDS})").scalar() != 1:
+            raise RuntimeError(f"Timed out after {MIGRATIONS_LOCK_SECONDS}s waiting for another process to finish the migrations")
+        try:
+            yield
+        finally:
+            connection.exec_driver_sql(f"SELECT RELEASE_LOCK('{MIGRATIONS_LOCK}')")
+
+def list_migrations(migrations_dir):
+    # (version, name, path) for every NNNN_*.sql file, sorted by version
+    migrations = []
+    for name in os.listdir(migrations_dir):
+        prefix = name.split("_", 1)[0]
+        if name.endswith(".sql") and prefix.isdigit():
+            migrations.append((int(prefix), name, os.path.join(migrations_dir, name)))
+    return sorted(migrations)
+
+def split_sql_statements(sql):
+    # Statements end with ";" at the end of a line; "--" comment lines are dropped
+    statements, current = [], []
+    for line in sql.splitlines():
+        if line.strip().startswith("--"):
+            continue
+        current.append(line)
+        if line.rstrip().endswith(";"):
+            statement = "\n".join(current).strip().rstrip(";").strip()
+            if statement:
+                statements.append(statement)
+            current = []
+    statement = "\n".join(current).strip()
+    if statement:
+        statements.append(statement)
+    return statements
+
+# --- Column Types ---
+class CompressedText(TypeDecorator):
+    """
+    Text stored as bytes, zlib-compressed behind a marker prefix when compression is on and it pays off.
+    Values without the marker are read as plain UTF-8, so rows copied by the split migration and rows
+    written with compression off stay readable either way.
+    """
+    impl = LargeBinary
+    cache_ok = True
+    MARKER = b"\x00zlib\x00"
+    MIN_BYTES = 256  # Shorter values are stored as is
+    enabled = True  # Set from db_config["compress_text"] by init_db
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "mysql":
+            return dialect.type_descriptor(MEDIUMBLOB())
+        return dialect.type_descriptor(LargeBinary())
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        data = str(value).encode("utf-8")
+        if self.enabled and len(data) >= self.MIN_BYTES:
+            compressed = self.MARKER + zlib.compress(data)
+            if len(compressed) < len(data):
+                return compressed
+        return data
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        value = bytes(value)
+        if value.startswith(self.MARKER):
+            return zlib.decompress(value[len(self.MARKER):]).decode("utf-8")
+        return value.decode("utf-8")
 
 # --- SQLAlchemy Models (One class = One table)---
+class PropertyDetailsText(Base):
+    """
+    Bulky text of a properties row, split out so scans of the hot table (listings diff, details backlog)
+    stay narrow. One row per properties.id, created on the first write; Properties exposes the columns
+    lazily through proxies.
+    """
+    __tablename__ = "property_details_text"
+
+    id = Column(Integer, ForeignKey("properties.id", ondelete="CASCADE"), primary_key=True)
+    description = Column(CompressedText, default=None)
+    raw_details_text = Column(CompressedText, default=None)
+    raw_amenities_text = Column(CompressedText, default=None)
+    raw_facilities_text = Column(CompressedText, default=None)
+    # Pre-history audit trail (" || "-joined), kept for old rows but no longer written; see PropertyHistory
+    updated_fields = Column(CompressedText, default=None)
+    updated_old_values = Column(CompressedText, default=None)
+
+    COLUMNS = ["description", "raw_details_text", "raw_amenities_text", "raw_facilities_text"]
+
+    @classmethod
+    def upsert_statement(cls, columns):
+        # Insert the companion row or overwrite the given columns of an existing one
+        return upsert_statement(cls.__table__, ["id"], lambda inserted: {col: inserted[col] for col in columns})
+
+    @classmethod
+    def upsert(cls, session, rows):
+        # rows: dicts with "id" and the same text columns; one executemany per call
+        columns = tuple(col for col in rows[0] if col != "id") if rows else ()
+        if not columns:
+            return
+        stmt = cached_statement(("details_text_upsert", columns), lambda: cls.upsert_statement(columns))
+        session.connection().execute(stmt, rows)
+
+class PropertyHistory(Base):
+    """
+    Append-only change log: one row per changed column of a properties row, written in the same
+    transaction as the upsert that changed it. Price trends are a range scan on
+    (property_row_id, column_name, changed_at) instead of a parse of the old audit strings.
+    There is no foreign key, so the log outlives a deleted row; the listing's business key
+    (property_id, property_selling_type, unit_type) is copied from the row when the entry is written.
+    """
+    __tablename__ = "property_history"
+    __table_args__ = (
+        # Created by sql/migrations (0006, 0011)
+        Index('idx_property_history_property', 'property_row_id', 'column_name', 'changed_at'),
+        Index('idx_property_history_changed_at', 'changed_at', 'column_name'),
+        Index('idx_property_history_listing', 'property_id', 'property_selling_type', 'unit_type', 'changed_at'),
+    )
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    property_row_id = Column(Integer, nullable=False)
+    property_id = Column(String(255), default=None)
+    property_selling_type = Column(String(16), default=None)
+    unit_type = Column(String(32), default=None)
+    column_name = Column(String(64), nullable=False)
+    old_value = Column(Text, default=None)
+    new_value = Column(Text, default=None)
+    changed_at = Column(TIMESTAMP, nullable=False, server_default=func.now())
+
+    @staticmethod
+    def to_text(col, value):
+        # Values of the bulky text columns are not copied (the current text is in property_details_text)
+        if value is None or col in PropertyDetailsText.COLUMNS:
+            return None
+        return str(value)
+
+    @classmethod
+    def entries(cls, property_row_id, changes):
+        # changes: (column, old value, new value) tuples
+        return [
+            {"property_row_id": property_row_id, "column_name": col, "old_value": cls.to_text(col, old), "new_value": cls.to_text(col, new)}
+            for col, old, new in changes
+        ]
+
+    @classmethod
+    def insert_statement(cls):
+        # The business key is read from the properties row in the same statement
+        row = Properties.__table__
+        def from_row(col):
+            return select(row.c[col]).where(row.c.id == bindparam("h_row_id")).scalar_subquery()
+        return insert(cls.__table__).values(
+            property_row_id=bindparam("h_row_id"),
+            property_id=from_row("property_id"),
+            property_selling_type=from_row("property_selling_type"),
+            unit_type=from_row("unit_type"),
+            column_name=bindparam("h_column_name"),
+            old_value=bindparam("h_old_value"),
+            new_value=bindparam("h_new_value"),
+        )
+
+    @classmethod
+    def record(cls, session, entries):
+        # One executemany INSERT for the whole batch
+        if entries:
+            stmt = cached_statement(("history_insert",), cls.insert_statement)
+            session.connection().execute(stmt, [
+                {"h_row_id": entry["property_row_id"], "h_column_name": entry["column_name"], "h_old_value": entry["old_value"], "h_new_value": entry["new_value"]}
+                for entry in entries
+            ])
+
+def text_proxy(col):
+    # Properties.<col> reads and writes PropertyDetailsText.<col>, creating the companion row on first write
+    return association_proxy("details_text", col, creator=lambda value: PropertyDetailsText(**{col: value}))
+
 class Properties(Base):
     __tablename__ = "properties"
     __table_args__ = (
         # Composite unique constraint
         UniqueConstraint('property_id', 'property_selling_type', 'unit_type', name='unique_property'),
+        # Created by sql/migrations (0003)
+        Index('idx_properties_backlog', 'details_fetched', 'property_selling_type', 'unit_type'),
+        Index('idx_properties_listed_date', 'listed_date'),
+        Index('idx_properties_updated_at', 'updated_at'),
     )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
@@ -119,7 +450,7 @@ class Properties(Base):
 
     # Property Details
     details_fetched = Column(Boolean, nullable=False, default=False)
-    description = Column(Text, default=None)
+    details_fetched_at = Column(TIMESTAMP, nullable=True, default=None)  # Last details page load (NULL for "Not Found" and for details changed by a copy from a sibling)
     property_type = Column(Enum("Condo", "Landed", "HDB", name="property_type_enum"), default=None)
     property_type_text = Column(String(255), default=None)
     lease_term = Column(Enum("Freehold", "Leasehold", name="lease_term_enum"), default=None)
@@ -131,15 +462,27 @@ class Properties(Base):
     land_size_sqft = Column(Integer, default=None)
     psf_floor = Column(DECIMAL(12, 2), default=None)
     psf_land = Column(DECIMAL(12, 2), default=None)
-    raw_details_text = Column(Text, default=None)
-    raw_amenities_text = Column(Text, default=None)
-    raw_facilities_text = Column(Text, default=None)
 
     # Default values
     created_at = Column(TIMESTAMP, nullable=False, server_default=func.now())
     updated_at = Column(TIMESTAMP, nullable=True, default=None)
-    updated_fields = Column(Text, default=None)  # Names of columns updated, separated by " || "
-    updated_old_values = Column(Text, default=None)  # Old values before update, separated by " || "
+
+    # Change detection (see with_hashes)
+    listing_hash = Column(String(32), default=None)  # Every listing column scraped from the card
+    details_fingerprint = Column(String(32), default=None)  # Only DETAILS_FINGERPRINT_COLUMNS
+
+    # Text columns live in property_details_text, loaded on first access
+    details_text = relationship(PropertyDetailsText, uselist=False, lazy="select", cascade="all, delete-orphan", passive_deletes=True)
+    description = text_proxy("description")
+    raw_details_text = text_proxy("raw_details_text")
+    raw_amenities_text = text_proxy("raw_amenities_text")
+    raw_facilities_text = text_proxy("raw_facilities_text")
+
+    # Columns never compared when diffing a listing against its existing row
+    AUDIT_COLUMNS = ["id", "created_at", "updated_at", "listing_hash", "details_fingerprint", "details_fetched_at"]
+    PRICE_COLUMNS = ["selling_price", "psf_floor", "psf_land"]
+    # Listing columns whose change means the details page changed too (unit_type is part of the unique key)
+    DETAILS_FINGERPRINT_COLUMNS = ["title", "address", "property_url", "selling_price"]
 
     def __init__(self, **kwargs):
         for key, value in kwargs.items():
@@ -148,6 +491,11 @@ class Properties(Base):
     def __repr__(self):
         return f"<Property(id={self.id}, title={self.title}, address={self.address}>"
 
+    @classmethod
+    def column_names(cls):
+        # Every column of a listing, including the ones stored in property_details_text (CSV export)
+        return cls.__table__.columns.keys() + PropertyDetailsText.COLUMNS
+
     def validate(self):
         if not self.property_id:
             raise ValueError("property_id cannot be empty.")
@@ -204,43 +552,36 @@ class Properties(Base):
                 unit_type=kwargs.get("unit_type")
             ).first()
     
+            columns = [col for col in cls.__table__.columns.keys() if col in kwargs and col not in cls.AUDIT_COLUMNS]
+            kwargs = cls.with_hashes(cls.to_decimal(kwargs), columns)
             if existing:
-                # 2. Compare each field (skip id, created_at, updated_at)
-                changed = False
-                changed_cols = []
-                old_vals = []
-                for col in cls.__table__.columns.keys():
-                    if col in ["id", "created_at", "updated_at", "updated_fields", "updated_old_values"]:
-                        continue
-                    if col in kwargs and getattr(existing, col) != kwargs[col]:
-                        changed = True
-                        changed_cols.append(col)
-                        old_val = getattr(existing, col)
-                        old_vals.append("" if old_val is None else str(old_val))
+                # 2. Same hash: nothing changed, no need to compare column by column
+                if existing.listing_hash == kwargs["listing_hash"]:
+                    print(f"> Ignore | ID: {kwargs.get('property_id', 'Unknown')}, Title: {kwargs.get('title', 'Unknown')} ")
+                    return "ignore"
+                changes = [(col, getattr(existing, col), kwargs[col]) for col in columns if getattr(existing, col) != kwargs[col]]
+                # Recomputed over the columns this listing has, so a page without e.g. address compares like with like
+                old_fingerprint = cls.row_hash({col: getattr(existing, col) for col in columns}, cls.fingerprint_columns(columns))
+                existing.listing_hash = kwargs["listing_hash"]
+                existing.details_fingerprint = kwargs["details_fingerprint"]
     
-                if changed:
-                    # 3. Only update if something changed
-                    for col in changed_cols:
-                        # Convert to Decimal for price fields
-                        if col in ["selling_price", "psf_floor", "psf_land"] and kwargs[col] is not None:
-                            setattr(existing, col, Decimal(str(kwargs[col])).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP))
-                        else:
-                            setattr(existing, col, kwargs[col])
+                if changes:
+                    # 3. Only update if something changed; details are only re-scraped if the fingerprint changed
+                    for col, _, new_val in changes:
+                        setattr(existing, col, new_val)
                     existing.updated_at = func.now()
-                    existing.updated_fields = " || ".join(changed_cols)
-                    existing.updated_old_values = " || ".join(old_vals)
-                    existing.details_fetched = False
+                    if old_fingerprint != kwargs["details_fingerprint"]:
+                        existing.details_fetched = False
+                    PropertyHistory.record(new_session, PropertyHistory.entries(existing.id, changes))
                     new_session.commit()
                     print(f"> Update | ID: {kwargs.get('property_id', 'Unknown')}, Title: {kwargs.get('title', 'Unknown')}")
                     return "update"
                 else:
+                    # Row stored before the hashes existed: only the hashes are written
+                    new_session.commit()
                     print(f"> Ignore | ID: {kwargs.get('property_id', 'Unknown')}, Title: {kwargs.get('title', 'Unknown')} ")
                     return "ignore"
             else:
-                # Ensure decimal fields are Decimal before creating new row
-                for col in ["selling_price", "psf_floor", "psf_land"]:
-                    if col in kwargs and kwargs.get(col) is not None:
-                        kwargs[col] = Decimal(str(kwargs[col])).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
                 new_listing = cls(**kwargs)
                 new_session.add(new_listing)
                 new_session.commit()
@@ -252,8 +593,145 @@ class Properties(Base):
         finally:
             new_session.close()
 
+    @classmethod
+    def to_decimal(cls, values):
+        # Copy of values with the price fields quantized the way the DECIMAL(12, 2) columns store them
+        values = dict(values)
+        for col in cls.PRICE_COLUMNS:
+            if values.get(col) is not None:
+                values[col] = Decimal(str(values[col])).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        return values
+
+    @staticmethod
+    def row_hash(values, columns):
+        # Stable digest of the given columns (price fields must already be quantized, see to_decimal)
+        text = "\x1f".join(f"{col}={'' if values.get(col) is None else values.get(col)}" for col in columns)
+        return hashlib.md5(text.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def fingerprint_columns(cls, columns):
+        return [col for col in cls.DETAILS_FINGERPRINT_COLUMNS if col in columns]
+
+    @classmethod
+    def with_hashes(cls, values, columns):
+        # Copy of values with listing_hash over columns and details_fingerprint over the fingerprint columns
+        return {
+            **values,
+            "listing_hash": cls.row_hash(values, columns),
+            "details_fingerprint": cls.row_hash(values, cls.fingerprint_columns(columns)),
+        }
+
+    @classmethod
+    def bulk_upsert_listings(cls, listings):
+        """
+        Upsert a whole page of listings in one transaction. One IN query on the unique key prefetches
+        the stored hashes; only rows whose listing_hash differs are fetched column by column and diffed.
+        New rows and changed rows are then written with one multi-row INSERT ... ON DUPLICATE KEY UPDATE
+        per shape, and changed columns are appended to property_history in the same transaction.
+        details_fetched is only reset when the details fingerprint changed.
+        Returns a list of "insert" / "update" / "ignore", one per listing.
+        """
+        key_cols = ("property_id", "property_selling_type", "unit_type")
+        table = cls.__table__
+        columns = tuple(col for col in listings[0] if col in table.columns.keys() and col not in cls.AUDIT_COLUMNS) if listings else ()
+        rows = [cls.with_hashes(cls.to_decimal(listing), columns) for listing in listings]
+        # The last card wins if a page repeats a listing
+        by_key = {tuple(row[col] for col in key_cols): row for row in rows}
+        value_cols = [col for col in columns if col not in key_cols] + ["listing_hash", "details_fingerprint"]
+        fingerprint_cols = cls.fingerprint_columns(columns)
+
+        with session_scope() as new_session:
+            existing_rows = {}
+            if by_key:
+                stmt = cached_statement(("listings_prefetch",), lambda: cls.listings_prefetch_statement(key_cols))
+                for existing in new_session.execute(stmt, {"keys": list(by_key)}).mappings():
+                    existing_rows[tuple(existing[col] for col in key_cols)] = existing
+
+            # Column values only for rows whose hash differs (or was never stored)
+            changed_ids = [existing["id"] for key, existing in existing_rows.items() if existing["listing_hash"] != by_key[key]["listing_hash"]]
+            stored = {}
+            if changed_ids:
+                stmt = cached_statement(("listings_columns", columns), lambda: select(table.c.id, *[table.c[col] for col in columns]).where(
+                    table.c.id.in_(bindparam("ids", expanding=True))
+                ))
+                stored = {row["id"]: row for row in new_session.execute(stmt, {"ids": changed_ids}).mappings()}
+
+            inserts, invalidated, kept, rehashed, history, results = [], [], [], [], [], {}
+            for key, row in by_key.items():
+                existing = existing_rows.get(key)
+                if existing is None:
+                    inserts.append(row)
+                    results[key] = "insert"
+                    continue
+                if existing["id"] not in stored:
+                    results[key] = "ignore"
+                    continue
+                old = stored[existing["id"]]
+                changes = [(col, old[col], row[col]) for col in columns if old[col] != row[col]]
+                if not changes:
+                    # Row stored before the hashes existed: only the hashes are written
+                    rehashed.append({"b_id": existing["id"], "b_listing_hash": row["listing_hash"], "b_details_fingerprint": row["details_fingerprint"]})
+                    results[key] = "ignore"
+                    continue
+                # Recomputed over the page's columns, so a page without e.g. address compares like with like
+                old_fingerprint = cls.row_hash(old, fingerprint_cols)
+                if old_fingerprint != row["details_fingerprint"]:
+                    invalidated.append({**row, "details_fetched": False})
+                else:
+                    kept.append(row)
+                history.extend(PropertyHistory.entries(existing["id"], changes))
+                results[key] = "update"
+
+            # executemany of one cached statement; PyMySQL sends it as a single multi-row INSERT
+            if inserts:
+                stmt = cached_statement(("listings_insert", columns), lambda: cls.listings_upsert_statement(value_cols, audit=False))
+                new_session.connection().execute(stmt, inserts)
+            if invalidated:
+                stmt = cached_statement(("listings_update", columns, True), lambda: cls.listings_upsert_statement(value_cols, audit=True, invalidate=True))
+                new_session.connection().execute(stmt, invalidated)
+            if kept:
+                stmt = cached_statement(("listings_update", columns, False), lambda: cls.listings_upsert_statement(value_cols, audit=True, invalidate=False))
+                new_session.connection().execute(stmt, kept)
+            if rehashed:
+                stmt = cached_statement(("listings_rehash",), lambda: update(table).where(table.c.id == bindparam("b_id")).values(
+                    listing_hash=bindparam("b_listing_hash"), details_fingerprint=bindparam("b_details_fingerprint"),
+                ))
+                new_session.connection().execute(stmt, rehashed)
+            PropertyHistory.record(new_session, history)
+
+        outcomes = []
+        seen = set()
+        for row in rows:
+            key = tuple(row[col] for col in key_cols)
+            result = "ignore" if key in seen else results[key]
+            seen.add(key)
+            print(f"> {result.title()} | ID: {row.get('property_id', 'Unknown')}, Title: {row.get('title', 'Unknown')}")
+            outcomes.append(result)
+        return outcomes
+
+    @classmethod
+    def listings_prefetch_statement(cls, key_cols):
+        table = cls.__table__
+        return select(table.c.id, *[table.c[col] for col in key_cols], table.c.listing_hash).where(
+            tuple_(*[table.c[col] for col in key_cols]).in_(bindparam("keys", expanding=True))
+        )
+
+    @classmethod
+    def listings_upsert_statement(cls, value_cols, audit, invalidate=True):
+        key_cols = ("property_id", "property_selling_type", "unit_type")
+        if not audit:
+            # New rows; the update part only runs if another worker inserted the same listing in the meantime
+            return upsert_statement(cls.__table__, key_cols, lambda inserted: {col: inserted[col] for col in value_cols})
+        # Changed rows; details_fetched is left alone unless the details fingerprint changed
+        return upsert_statement(cls.__table__, key_cols, lambda inserted: {
+            **{col: inserted[col] for col in value_cols},
+            "updated_at": func.now(),
+            **({"details_fetched": inserted.details_fetched} if invalidate else {}),
+        })
+
     @classmethod
     def batch_upsert_listings(cls, session, listings):
+        # Returns the "insert" / "update" / "ignore" outcome of every listing, or None if the batch failed
         print(f"= Batch Upsert Listings:")
         insert_count = update_count = ignore_count = 0
         total_insert = getattr(cls, "_total_insert", 0)
@@ -261,9 +739,13 @@ class Properties(Base):
         total_ignore = getattr(cls, "_total_ignore", 0)
 
         try:
-            # Capture the output of upsert_listing
-            for listing in listings:
-                result = cls.upsert_listing(**listing)
+            # One transaction for the whole page, falling back to one upsert per listing if it fails
+            try:
+                results = cls.bulk_upsert_listings(listings)
+            except Exception as e:
+                print(f"> Bulk Upsert Failed, Falling Back to Per-Row Upserts. Reason: {e}")
+                results = [cls.upsert_listing(**listing) for listing in listings]
+            for result in results:
                 if result == "insert":
                     insert_count += 1
                     total_insert += 1
@@ -281,9 +763,11 @@ class Properties(Base):
 
             # Print cumulative counts
             print(f"= Counts | Insert: {insert_count} ({total_insert}) | Update: {update_count} ({total_update}) | Ignore: {ignore_count} ({total_ignore})")
+            return results
         except Exception as e:
             session.rollback()
             print(f"> Error: Batch Upsert Failed. Reason: {e}\n")
+            return None
 
     @classmethod
     def update_details(cls, detail, DETAIL_COLUMNS):
@@ -302,43 +786,23 @@ class Properties(Base):
                 new_session.close()
                 return
     
-            # Check if any of the detail columns have changed
-            changed = False
-            changed_cols = []
-            old_vals = []
-
-            # Check if all detail columns are blank
-            is_blank = all(getattr(existing, col) is None for col in DETAIL_COLUMNS)
-    
             # Check if any detail columns have changed and update them
-            for col in DETAIL_COLUMNS:
-                new_val = detail.get(col)
-                old_val = getattr(existing, col)
-                if new_val != old_val:
-                    changed = True
-                    changed_cols.append(col)
-                    old_vals.append("" if old_val is None else str(old_val))
-                    setattr(existing, col, new_val)
-
-            if is_blank:
-                # 1) New row, just update details columns, updated_at, updated_fields, updated_old_values=null
-                existing.updated_at = func.now()
-                existing.updated_fields = "Details Fields"
-                existing.updated_old_values = None
-                existing.details_fetched = True
-                new_session.commit()
-                print(f"> Database | Inserted")
-            elif changed:
-                # 2a) Details columns changed, update details, updated_at, updated_fields, updated_old_values, details_fetched
+            status, changes = cls.diff_details({col: getattr(existing, col) for col in DETAIL_COLUMNS}, detail, DETAIL_COLUMNS)
+            for col, _, new_val in changes:
+                setattr(existing, col, new_val)
+
+            if status != "No Changes":
+                # 1) New row / 2a) Details columns changed: update details, updated_at, history, details_fetched
+                PropertyHistory.record(new_session, PropertyHistory.entries(existing.id, changes))
                 existing.updated_at = func.now()
-                existing.updated_fields = " || ".join(changed_cols)
-                existing.updated_old_values = " || ".join(old_vals)
                 existing.details_fetched = True
+                existing.details_fetched_at = func.now()
                 new_session.commit()
-                print(f"> Database | Updated")
+                print(f"> Database | {status}")
             else:
                 # 2b) No changes, just set details_fetched to True
                 existing.details_fetched = True
+                existing.details_fetched_at = func.now()
                 new_session.commit()
                 print(f"> Database | No Changes")
         except Exception as e:
@@ -346,7 +810,51 @@ class Properties(Base):
             print(f"> ❌ Error: Could Not Update Details. Reason: {e}\n")
         finally:
             new_session.close()
-            time.sleep(random.uniform(0.5, 1.5))  # Sleep for a random time between 0.5 and 1.5 seconds
+
+    @staticmethod
+    def diff_details(old_values, detail, DETAIL_COLUMNS):
+        """
+        Compare freshly scraped details with the stored ones (old_values maps column -> stored value).
+        Returns (status, changes); changes lists (column, old value, new value) for every changed column,
+        and status is "Inserted" when every detail column was still blank, "Updated" when some changed,
+        otherwise "No Changes" (also when no column was scraped at all).
+        """
+        changes = [(col, old_values.get(col), detail.get(col)) for col in DETAIL_COLUMNS if detail.get(col) != old_values.get(col)]
+        if DETAIL_COLUMNS and all(old_values.get(col) is None for col in DETAIL_COLUMNS):
+            return "Inserted", changes
+        if changes:
+            return "Updated", changes
+        return "No Changes", changes
+
+    @classmethod
+    def fresh_sibling_details(cls, pairs, DETAIL_COLUMNS, max_age_seconds):
+        """
+        Details of other rows with the same property_id and property_url (the same listing under another
+        unit_type filter) whose details page was loaded within max_age_seconds, in one query. A copy from a
+        sibling that changed a row clears its details_fetched_at, so copied details are never a source; an
+        unchanged copy keeps the timestamp of the page load its details came from.
+        Returns {(property_id, property_url): {column: value}}; the most recent load wins.
+        """
+        if not pairs:
+            return {}
+        table = cls.__table__
+        text_table = PropertyDetailsText.__table__
+        stmt = select(
+            table.c.property_id, table.c.property_url,
+            *[text_table.c[col] if col in PropertyDetailsText.COLUMNS else table.c[col] for col in DETAIL_COLUMNS]
+        ).select_from(table.outerjoin(text_table, text_table.c.id == table.c.id)).where(
+            table.c.property_id.in_(sorted({property_id for property_id, _ in pairs})),
+            table.c.details_fetched.is_(True),
+            table.c.details_fetched_at >= seconds_from_now(-max_age_seconds),
+        ).order_by(table.c.details_fetched_at)
+        wanted = set(pairs)
+        found = {}
+        with session_scope() as new_session:
+            for row in new_session.execute(stmt).mappings():
+                key = (row["property_id"], row["property_url"])
+                if key in wanted:
+                    found[key] = {col: row[col] for col in DETAIL_COLUMNS}
+        return found
 
     @classmethod
     def update_field_value(cls, property_id, field_name, new_value):
@@ -361,8 +869,7 @@ class Properties(Base):
             old_value = getattr(property, field_name, None)
             setattr(property, field_name, new_value)
             property.updated_at = func.now()
-            property.updated_fields = field_name
-            property.updated_old_values = str(old_value) if old_value is not None else None
+            PropertyHistory.record(new_session, PropertyHistory.entries(property.id, [(field_name, old_value, new_value)]))
             new_session.commit()
         except Exception as e:
             new_session.rollback()
@@ -389,4 +896,426 @@ class Properties(Base):
             new_session.rollback()
             print(f"> Error: Could Not Delete Listing. Reason: {e}\n")
         finally:
-            new_session.close()
\ No newline at end of file
+            new_session.close()
+
+class DetailsLease(Base):
+    """
+    Short-lived claim on a properties row whose details are being scraped.
+    Lets any number of workers / containers drain the details_fetched=False backlog in parallel:
+    rows are claimed with SELECT ... FOR UPDATE SKIP LOCKED (a conditional upsert on SQLite), and a
+    lease left behind by a crashed worker simply expires.
+    """
+    __tablename__ = "details_leases"
+
+    property_row_id = Column(Integer, ForeignKey("properties.id", ondelete="CASCADE"), primary_key=True)
+    worker_id = Column(String(255), nullable=False)
+    leased_at = Column(TIMESTAMP, nullable=False, server_default=func.now())
+    expires_at = Column(TIMESTAMP, nullable=False)
+
+    @classmethod
+    def claim(cls, worker_id, property_selling_type, unit_type, limit, lease_seconds):
+        # Returns the properties.id values leased to worker_id (at most limit)
+        new_session = Session()
+        try:
+            stmt = (
+                select(Properties.id)
+                .outerjoin(cls, cls.property_row_id == Properties.id)
+                .where(
+                    Properties.details_fetched.is_(False),
+                    Properties.property_selling_type == property_selling_type,
+                    Properties.unit_type == unit_type,
+                    # Never leased, or the lease has expired (rows that failed keep their lease until then)
+                    (cls.property_row_id.is_(None)) | (cls.expires_at < func.now()),
+                )
+                .order_by(Properties.id)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+            )
+            ids = list(new_session.execute(stmt).scalars())
+            if ids and is_sqlite():
+                # No SKIP LOCKED on SQLite: a row another worker leased since the SELECT is only taken over
+                # once that lease expires, so keep just the rows that ended up leased to worker_id
+                expires_at = seconds_from_now(lease_seconds)
+                insert_stmt = sqlite_insert(cls).values([
+                    {"property_row_id": row_id, "worker_id": worker_id, "expires_at": expires_at} for row_id in ids
+                ])
+                new_session.execute(insert_stmt.on_conflict_do_update(
+                    index_elements=["property_row_id"],
+                    set_={"worker_id": insert_stmt.excluded.worker_id, "leased_at": func.now(), "expires_at": insert_stmt.excluded.expires_at},
+                    where=cls.expires_at < func.now(),
+                ))
+                ids = list(new_session.execute(
+                    select(cls.property_row_id).where(cls.property_row_id.in_(ids), cls.worker_id == worker_id).order_by(cls.property_row_id)
+                ).scalars())
+            elif ids:
+                expires_at = seconds_from_now(lease_seconds)
+                insert_stmt = mysql_insert(cls).values([
+                    {"property_row_id": row_id, "worker_id": worker_id, "expires_at": expires_at} for row_id in ids
+                ])
+                new_session.execute(insert_stmt.on_duplicate_key_update(
+                    worker_id=insert_stmt.inserted.worker_id,
+                    leased_at=func.now(),
+                    expires_at=insert_stmt.inserted.expires_at,
+                ))
+            new_session.commit()
+            return ids
+        except Exception as e:
+            new_session.rollback()
+            print(f"> ❌ Error: Could Not Claim Details Rows. Reason: {e}\n")
+            return []
+        finally:
+            new_session.close()
+
+class CrawlState(Base):
+    """
+    High-water mark of the incremental listings crawl, per (mode, unit_type): the newest
+    (listed_date, property_id) seen so far. Pages at or below it that only hold unchanged listings
+    were already crawled, so the crawl stops after a few of them.
+    """
+    __tablename__ = "crawl_state"
+
+    property_selling_type = Column(String(16), primary_key=True)
+    unit_type = Column(String(32), primary_key=True)
+    hwm_listed_date = Column(Date, default=None)
+    hwm_property_id = Column(String(255), default=None)
+    pages_crawled = Column(Integer, default=None)  # Pages loaded by the last run
+    last_crawled_at = Column(TIMESTAMP, nullable=True, default=None)
+
+    @staticmethod
+    def listing_key(listed_date, property_id):
+        # Sort key of a listing in "date desc" order; numeric property_ids grow with time
+        property_id = str(property_id or "")
+        return (listed_date or date.min, int(property_id) if property_id.isdigit() else 0)
+
+    @classmethod
+    def high_water_mark(cls, property_selling_type, unit_type):
+        # listing_key of the newest listing seen so far, or None before the first crawl
+        with session_scope() as new_session:
+            state = new_session.get(cls, (property_selling_type, unit_type))
+            if state is None or state.hwm_listed_date is None:
+                return None
+            return cls.listing_key(state.hwm_listed_date, state.hwm_property_id)
+
+    @classmethod
+    def advance(cls, property_selling_type, unit_type, listed_date, property_id, pages_crawled):
+        # Moves the mark forward only; concurrent page shards may report in any order
+        with session_scope() as new_session:
+            state = new_session.get(cls, (property_selling_type, unit_type), with_for_update=True)
+            if state is None:
+                state = cls(property_selling_type=property_selling_type, unit_type=unit_type)
+                new_session.add(state)
+            if state.hwm_listed_date is None or cls.listing_key(listed_date, property_id) > cls.listing_key(state.hwm_listed_date, state.hwm_property_id):
+                state.hwm_listed_date = listed_date
+                state.hwm_property_id = property_id
+            state.pages_crawled = pages_crawled
+            state.last_crawled_at = func.now()
+
+class RunCheckpoint(Base):
+    """
+    Progress of an interrupted listings / details scrape, per (kind, mode, unit_type, shard), so a run
+    killed mid-way (Chrome crash, container stop) resumes where it stopped instead of from page 1.
+    Listings checkpoints are saved by the pipeline writer after each saved page, details checkpoints
+    by DetailsWriteBuffer in the flush that writes the rows; both are cleared when the scrape completes;
+    checkpoints older than the configured max age are expired and the scrape starts over.
+    """
+    __tablename__ = "run_checkpoints"
+
+    kind = Column(String(16), primary_key=True)  # "listings" or "details"
+    property_selling_type = Column(String(16), primary_key=True)
+    unit_type = Column(String(32), primary_key=True)
+    shard = Column(String(32), primary_key=True)  # "start/step" of a page shard, "index/count" of a details shard
+    last_posted = Column(Integer, default=None)  # Listings filter the checkpoint was taken with
+    cur_page = Column(Integer, default=None)  # Next listings page to load
+    max_pages = Column(Integer, default=None)
+    last_property_id = Column(String(255), default=None)  # Last listing saved
+    last_property_row_id = Column(Integer, default=None)  # properties.id of the last details row processed
+    processed = Column(Integer, nullable=False, default=0)  # Pages / rows saved since the scrape started
+    updated_at = Column(TIMESTAMP, nullable=True, default=None)
+
+    @classmethod
+    def key_filter(cls, kind, property_selling_type, unit_type, shard):
+        return (cls.kind == kind, cls.property_selling_type == property_selling_type, cls.unit_type == unit_type, cls.shard == shard)
+
+    @classmethod
+    def load(cls, kind, property_selling_type, unit_type, shard, max_age_seconds):
+        # Checkpoint as a dict, or None; a stale one is deleted instead of resumed
+        keys = cls.key_filter(kind, property_selling_type, unit_type, shard)
+        with session_scope() as new_session:
+            checkpoint = new_session.execute(
+                select(cls).where(*keys, cls.updated_at >= seconds_from_now(-max_age_seconds))
+            ).scalar_one_or_none()
+            if checkpoint is None:
+                if new_session.execute(delete(cls).where(*keys)).rowcount:
+                    print(f"> Checkpoint Expired | {kind.title()} | {property_selling_type} | {unit_type} | Shard {shard}")
+                return None
+            return {col: getattr(checkpoint, col) for col in cls.__table__.columns.keys()}
+
+    @classmethod
+    def save(cls, kind, property_selling_type, unit_type, shard, **values):
+        with session_scope() as new_session:
+            cls.upsert(new_session, kind, property_selling_type, unit_type, shard, **values)
+
+    @classmethod
+    def upsert(cls, session, kind, property_selling_type, unit_type, shard, **values):
+        # Inside the caller's transaction, so the checkpoint commits together with the rows it covers
+        row = {"kind": kind, "property_selling_type": property_selling_type, "unit_type": unit_type, "shard": shard, **values}
+        stmt = upsert_statement(cls.__table__, ["kind", "property_selling_type", "unit_type", "shard"], lambda inserted: {
+            **{col: inserted[col] for col in values},
+            "updated_at": func.now(),
+        }).values(updated_at=func.now(), **row)
+        session.execute(stmt)
+
+    @classmethod
+    def clear(cls, kind, property_selling_type, unit_type, shard):
+        with session_scope() as new_session:
+            new_session.execute(delete(cls).where(*cls.key_filter(kind, property_selling_type, unit_type, shard)))
+
+    @classmethod
+    def expire(cls, max_age_seconds):
+        # Deletes every checkpoint not saved within max_age_seconds; returns how many
+        with session_scope() as new_session:
+            return new_session.execute(delete(cls).where(cls.updated_at < seconds_from_now(-max_age_seconds))).rowcount
+
+class DetailsWriteBuffer:
+    """
+    Collects scraped details (and "Details Page Not Found" rows) and writes them in one transaction
+    every max_rows rows or max_seconds seconds, so DB round-trips stay out of the browser loop.
+    Each flush prefetches the stored detail columns with one IN query, runs the same diff as
+    Properties.update_details, and writes with batched UPDATEs; the rows' leases are released in
+    the same transaction, and so is the details RunCheckpoint when one is tracked. A timer thread
+    runs the time-based flush, so a partial buffer is written even while the browser loop is stuck
+    (challenge backoff, PIPELINE_PARSERS=0). Call flush() (or use it as a context manager) so
+    nothing is lost on exit.
+    """
+
+    def __init__(self, max_rows=20, max_seconds=30, max_recent=1000):
+        self.max_rows = max_rows
+        self.max_seconds = max_seconds
+        self.details = {}  # properties.id -> (detail, DETAIL_COLUMNS, reused)
+        self.not_found = set()  # properties.id
+        self.first_added = None
+        self.max_recent = max_recent
+        self.recent = OrderedDict()  # (property_id, property_url) -> (time added, detail values), for sibling reuse
+        self.recent_lock = threading.Lock()  # add() runs on the pipeline writer, recent_details() on the browser thread
+        self.lock = threading.RLock()  # The flush timer and the pipeline writer both add and flush
+        self.timer = None
+        self.stopped = threading.Event()
+
+        # Per-run counters
+        self.flushes = 0
+        self.rows_written = 0
+        self.flush_seconds = 0.0
+        self.reused = 0  # Rows filled from a sibling's details instead of a page load
+        self.checkpoint = None  # {"key", "last_property_row_id", "processed", "first_skipped"} of the details scrape being flushed
+
+    def track_checkpoint(self, key, last_property_row_id=None, processed=0):
+        # key: RunCheckpoint (kind, mode, unit_type, shard), or None to stop tracking
+        self.checkpoint = None if key is None else {"key": key, "last_property_row_id": last_property_row_id, "processed": processed, "first_skipped": None}
+
+    def mark_skipped(self, property_row_id):
+        # A row the scrape gave up on (challenge, error, failed write): the checkpoint stays below it, so a resumed run retries it
+        with self.lock:
+            if self.checkpoint is not None and (self.checkpoint["first_skipped"] is None or property_row_id < self.checkpoint["first_skipped"]):
+                self.checkpoint["first_skipped"] = property_row_id
+
+    def __len__(self):
+        return len(self.details) + len(self.not_found)
+
+    def add(self, detail, DETAIL_COLUMNS, reused=False):
+        # reused: copied from a sibling, not a page load, so it neither sets details_fetched_at nor serves further reuse
+        with self.lock:
+            self.details[detail["id"]] = (detail, list(DETAIL_COLUMNS), reused)
+            self.not_found.discard(detail["id"])
+            if reused:
+                self.reused += 1
+            else:
+                self.remember(detail, DETAIL_COLUMNS)
+            self.added()
+
+    def remember(self, detail, DETAIL_COLUMNS):
+        key = (detail.get("property_id"), detail.get("property_url"))
+        with self.recent_lock:
+            self.recent[key] = (time.time(), {col: detail.get(col) for col in DETAIL_COLUMNS})
+            self.recent.move_to_end(key)
+            while len(self.recent) > self.max_recent:
+                self.recent.popitem(last=False)
+
+    def recent_details(self, property_id, property_url, max_age_seconds):
+        # Details added in this process (flushed or not) for the same listing, if younger than max_age_seconds
+        with self.recent_lock:
+            entry = self.recent.get((property_id, property_url))
+        if entry is None or time.time() - entry[0] > max_age_seconds:
+            return None
+        return dict(entry[1])
+
+    def mark_not_found(self, property_row_id):
+        with self.lock:
+            if property_row_id not in self.details:
+                self.not_found.add(property_row_id)
+            self.added()
+
+    def added(self):
+        if self.first_added is None:
+            self.first_added = time.monotonic()
+        self.start_timer()
+        self.flush_if_due()
+
+    def start_timer(self):
+        if self.timer is None or not self.timer.is_alive():
+            self.stopped.clear()
+            self.timer = threading.Thread(target=self.run_timer, name="details-flush-timer", daemon=True)
+            self.timer.start()
+
+    def run_timer(self):
+        while not self.stopped.wait(1):
+            try:
+                self.flush_if_due()
+            except Exception as e:
+                print(f"❌ Error on Details Flush Timer: {e}")
+
+    def flush_if_due(self):
+        with self.lock:
+            if len(self) >= self.max_rows or (self.first_added is not None and time.monotonic() - self.first_added >= self.max_seconds):
+                self.flush()
+
+    def flush(self):
+        # Holds the lock while writing, so flushes (and checkpoints) never interleave
+        with self.lock:
+            if not len(self):
+                return
+            details, not_found = self.details, self.not_found
+            self.details, self.not_found, self.first_added = {}, set(), None
+            started = time.monotonic()
+
+            try:
+                statuses = self.write_batch(details, not_found)
+            except Exception as e:
+                print(f"> ❌ Error: Details Flush Failed, Writing Row by Row. Reason: {e}")
+                statuses = self.write_rows(details, not_found)
+
+            self.flushes += 1
+            self.rows_written += len(statuses)
+            self.flush_seconds += time.monotonic() - started
+            counts = {}
+            for status in statuses.values():
+                counts[status] = counts.get(status, 0) + 1
+            print(" | ".join([f"= Details Flush | Rows: {len(statuses)}"] + [f"{status}: {count}" for status, count in counts.items()]))
+
+    def close(self):
+        self.stopped.set()
+        self.flush()
+
+    def write_rows(self, details, not_found):
+        # Fallback: one transaction per row, so a single bad row does not lose the rest of the batch
+        # In id order, so a row that fails holds the checkpoint back before any later row advances it
+        statuses = {}
+        for row_id in sorted(set(details) | not_found):
+            try:
+                if row_id in details:
+                    statuses.update(self.write_batch({row_id: details[row_id]}, set()))
+                else:
+                    statuses.update(self.write_batch({}, {row_id}))
+            except Exception as e:
+                print(f"> ❌ Error: Could Not Update Details (Row {row_id}). Reason: {e}\n")
+                self.mark_skipped(row_id)
+        return statuses
+
+    def write_batch(self, details, not_found):
+        # One transaction: the rows, their history, their leases and the checkpoint past them
+        with session_scope() as new_session:
+            statuses = self.write(new_session, details, not_found)
+            checkpoint = self.advance_checkpoint(new_session, statuses)
+        if checkpoint is not None:
+            self.checkpoint = checkpoint
+        return statuses
+
+    def advance_checkpoint(self, session, statuses):
+        # A resumed scrape continues after the highest row id actually written, but never past a skipped row
+        if self.checkpoint is None or not statuses:
+            return None
+        last_property_row_id = max([*statuses, self.checkpoint["last_property_row_id"] or 0])
+        if self.checkpoint["first_skipped"] is not None:
+            last_property_row_id = min(last_property_row_id, self.checkpoint["first_skipped"] - 1)
+        checkpoint = {
+            **self.checkpoint,
+            "last_property_row_id": last_property_row_id,
+            "processed": self.checkpoint["processed"] + len(statuses),
+        }
+        RunCheckpoint.upsert(
+            session, *checkpoint["key"],
+            last_property_row_id=checkpoint["last_property_row_id"], processed=checkpoint["processed"],
+        )
+        return checkpoint
+
+    def write(self, session, details, not_found):
+        table = Properties.__table__
+        text_table = PropertyDetailsText.__table__
+        statuses = {}
+
+        # Stored detail columns of every buffered row (text columns joined in from property_details_text), in one query
+        columns = tuple(sorted({col for _, cols, _ in details.values() for col in cols}))
+        existing = {}
+        if details:
+            stmt = cached_statement(("details_prefetch", columns), lambda: select(
+                table.c.id, *[text_table.c[col] if col in PropertyDetailsText.COLUMNS else table.c[col] for col in columns]
+            ).select_from(table.outerjoin(text_table, text_table.c.id == table.c.id)).where(
+                table.c.id.in_(bindparam("ids", expanding=True))
+            ))
+            existing = {row["id"]: row for row in session.execute(stmt, {"ids": list(details)}).mappings()}
+
+        # Changed rows, grouped by column list (and reused) so each group is one executemany UPDATE plus one text upsert
+        changed = {}
+        unchanged_ids = {False: [], True: []}
+        history = []
+        for row_id, (detail, cols, reused) in details.items():
+            if row_id not in existing:
+                print(f"> ❌ Error | Property Not Found (Row {row_id})")
+                continue
+            status, changes = Properties.diff_details(existing[row_id], detail, cols)
+            statuses[row_id] = status
+            if status == "No Changes":
+                unchanged_ids[reused].append(row_id)
+                continue
+            history.extend(PropertyHistory.entries(row_id, changes))
+            changed.setdefault((tuple(cols), reused), []).append((row_id, {col: detail.get(col) for col in cols}))
+
+        # Only a real page load stamps details_fetched_at; copied details that changed the row clear it
+        for (cols, reused), rows in changed.items():
+            hot_cols = [col for col in cols if col not in PropertyDetailsText.COLUMNS]
+            stmt = cached_statement(("details_update", tuple(hot_cols), reused), lambda: update(table).where(table.c.id == bindparam("b_id")).values({
+                **{col: bindparam(f"b_{col}") for col in hot_cols},
+                "updated_at": func.now(),
+                "details_fetched": True,
+                "details_fetched_at": None if reused else func.now(),
+            }))
+            session.connection().execute(stmt, [{"b_id": row_id, **{f"b_{col}": values[col] for col in hot_cols}} for row_id, values in rows])
+            PropertyDetailsText.upsert(session, [
+                {"id": row_id, **{col: value for col, value in values.items() if col in PropertyDetailsText.COLUMNS}}
+                for row_id, values in rows
+            ])
+        # An unchanged copy keeps the row's details_fetched_at, which may be an earlier real page load
+        for reused, ids in unchanged_ids.items():
+            if ids:
+                session.execute(update(table).where(table.c.id.in_(ids)).values(details_fetched=True, **({} if reused else {"details_fetched_at": func.now()})))
+        if not_found:
+            # Same history as update_field_value(..., "details_fetched", True) on a pending row
+            session.execute(update(table).where(table.c.id.in_(list(not_found))).values(details_fetched=True, updated_at=func.now()))
+            for row_id in not_found:
+                history.extend(PropertyHistory.entries(row_id, [("details_fetched", False, True)]))
+            statuses.update({row_id: "Not Found" for row_id in not_found})
+
+        PropertyHistory.record(session, history)
+
+        # Done rows no longer need their lease
+        if statuses:
+            session.execute(delete(DetailsLease.__table__).where(DetailsLease.property_row_id.in_(list(statuses))))
+        return statuses
+
+    def report(self):
+        print(f"= Details Writes | Rows: {self.rows_written} | Flushes: {self.flushes} | DB Time: {self.flush_seconds:.1f}s | Reused From Siblings (Page Loads Saved): {self.reused}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -1,17 +1,29 @@
 # src/main.py
 from dotenv import dotenv_values
+from parquet_export import ParquetExporter
+from scraper.browser_session import BrowserSessionManager
+from scraper.challenge import ChallengeDetector
+from scraper.csv_sink import CsvSink
+from scraper.lease_queue import DetailsLeaseQueue
+from scraper.rate_limiter import RateLimiter
+from scraper.resource_blocker import ResourceBlockPolicy
 from scraper.scraper import PropertyGuruScraper
 from scraper.scraper_utils import ScraperUtils
+from scraper.shard_planner import ListingsShardPlanner
+from scraper.worker_pool import WorkerPool, install_sigterm_handler
 from sqlalchemy import text
 import database
 import datetime
 import os
-import time
 
 class Prep:
     # Allowed values
     ALLOWED_MODES = {"Rent", "Buy"}
     ALLOWED_UNIT_TYPES = {-1, 0, 1, 2, 3, 4, 5}
+    ALLOWED_LISTINGS_ENGINES = {"dom", "html", "state"}
+    ALLOWED_DETAILS_ENGINES = {"dom", "snapshot", "state"}
+    ALLOWED_DETAILS_QUEUES = {"lease", "shard"}
+    ALLOWED_DATABASE_BACKENDS = {"mysql", "sqlite"}
 
     def __init__(self):
         self.env = dotenv_values(".env")
@@ -25,10 +37,41 @@ class Prep:
         self.listings_desired_pages = None if self.get_env_var("LISTINGS_DESIRED_PAGES", "2") is None else int(self.get_env_var("LISTINGS_DESIRED_PAGES", "2"))
         self.details_max_scrape = None if self.get_env_var("DETAILS_MAX_SCRAPE", "5") is None else int(self.get_env_var("DETAILS_MAX_SCRAPE", "5"))
         self.last_posted = int(self.get_env_var("LAST_POSTED", "2"))
+        self.listings_engine = self.get_env_var("LISTINGS_ENGINE", "dom").lower()
+        self.listings_price_edges = self.parse_listings_price_edges()
+        self.listings_shard_max_pages = int(self.get_env_var("LISTINGS_SHARD_MAX_PAGES", "50"))
+        self.listings_shard_by_district = self.get_env_bool("LISTINGS_SHARD_BY_DISTRICT", "false")
+        self.listings_stop_after_known_pages = None if self.get_env_var("LISTINGS_STOP_AFTER_KNOWN_PAGES", "None") is None else int(self.get_env_var("LISTINGS_STOP_AFTER_KNOWN_PAGES", "None"))
+        self.details_engine = self.get_env_var("DETAILS_ENGINE", "dom").lower()
+        self.details_queue = self.get_env_var("DETAILS_QUEUE", "lease").lower()
+        self.details_lease_seconds = int(self.get_env_var("DETAILS_LEASE_SECONDS", "900"))
+        self.details_lease_batch = int(self.get_env_var("DETAILS_LEASE_BATCH", "5"))
+        self.details_flush_rows = int(self.get_env_var("DETAILS_FLUSH_ROWS", "20"))
+        self.details_flush_seconds = float(self.get_env_var("DETAILS_FLUSH_SECONDS", "30"))
+        self.checkpoint_max_age_seconds = None if self.get_env_var("CHECKPOINT_MAX_AGE_HOURS", "24") is None else int(float(self.get_env_var("CHECKPOINT_MAX_AGE_HOURS", "24")) * 3600)
+        self.details_reuse_seconds = None if self.get_env_var("DETAILS_REUSE_HOURS", "24") is None else int(float(self.get_env_var("DETAILS_REUSE_HOURS", "24")) * 3600)
+        self.pipeline_parsers = int(self.get_env_var("PIPELINE_PARSERS", "2"))
+        self.pipeline_queue_size = int(self.get_env_var("PIPELINE_QUEUE_SIZE", "4"))
+        self.csv_gzip = self.get_env_bool("CSV_GZIP", "false")
+        self.csv_buffer_rows = int(self.get_env_var("CSV_BUFFER_ROWS", "20"))
+        self.run_parquet_export = self.get_env_bool("RUN_PARQUET_EXPORT", default="false")
+        self.parquet_export_dir = self.get_env_var("PARQUET_EXPORT_DIR", "data/parquet")
+        self.parquet_batch_rows = int(self.get_env_var("PARQUET_BATCH_ROWS", "5000"))
+        self.workers = int(self.get_env_var("WORKERS", "1"))
+        self.rate_limit_initial = float(self.get_env_var("RATE_LIMIT_INITIAL", "0.25"))
+        self.rate_limit_min = float(self.get_env_var("RATE_LIMIT_MIN", "0.02"))
+        self.rate_limit_max = float(self.get_env_var("RATE_LIMIT_MAX", "1.0"))
+        self.rate_limit_cooldown_max = float(self.get_env_var("RATE_LIMIT_COOLDOWN_MAX", "60"))
+        self.listings_page_shards = int(self.get_env_var("LISTINGS_PAGE_SHARDS", "1"))
+        self.details_shards = int(self.get_env_var("DETAILS_SHARDS", "1"))
+        self.browser_max_pages = None if self.get_env_var("BROWSER_MAX_PAGES", "200") is None else int(self.get_env_var("BROWSER_MAX_PAGES", "200"))
+        self.browser_max_memory_mb = None if self.get_env_var("BROWSER_MAX_MEMORY_MB", "1500") is None else int(self.get_env_var("BROWSER_MAX_MEMORY_MB", "1500"))
+        self.block_resources = self.parse_block_resources()
 
         self.validate_input()
         self.setup_csvs()
         self.session = self.setup_database()
+        self.expire_checkpoints()
 
     def get_env_var(self, key, default=None):
         val = os.environ.get(key, self.env.get(key, default))
@@ -41,11 +84,17 @@ class Prep:
     
     def get_db_config(self):
         return {
+            "backend": self.get_env_var("DATABASE_BACKEND", "mysql").lower(),
+            "sqlite_path": self.get_env_var("DATABASE_SQLITE_PATH", "data/smartvaluer.db"),
             "user": self.get_env_var("DATABASE_USER"),
             "password": self.get_env_var("DATABASE_PASSWORD"),
             "host": self.get_env_var("DATABASE_HOST"),
             "port": self.get_env_var("DATABASE_PORT"),
             "name": self.get_env_var("DATABASE_NAME"),
+            "pool_size": self.get_env_var("DATABASE_POOL_SIZE", "5"),
+            "max_overflow": self.get_env_var("DATABASE_MAX_OVERFLOW", "5"),
+            "pool_recycle": self.get_env_var("DATABASE_POOL_RECYCLE", "1800"),
+            "compress_text": self.get_env_bool("DATABASE_COMPRESS_TEXT", "true"),
         }
     
     def parse_listings_modes(self):
@@ -60,13 +109,134 @@ class Prep:
     def parse_details_unit_types(self):
         return [int(u.strip()) for u in self.get_env_var("DETAILS_UNIT_TYPES", "-1,0,1,2,3,4,5").split(",") if u.strip()]
 
+    def parse_listings_price_edges(self):
+        # Price edges per mode that split each listings search into bands, e.g. "2000,3000,4000" (None = whole search)
+        edges = {}
+        for mode in self.ALLOWED_MODES:
+            val = self.get_env_var(f"LISTINGS_{mode.upper()}_PRICE_EDGES", "None")
+            if val is not None:
+                edges[mode] = [int(e.strip()) for e in val.split(",") if e.strip()]
+        return edges
+
+    def plan_search_shards(self, browser, rate_limiter, challenges):
+        # {(mode, unit_type): shards} for the listings searches that have price edges
+        if not self.run_listings or not self.listings_price_edges:
+            return {}
+        planner = ListingsShardPlanner(browser, rate_limiter, challenges, max_pages=self.listings_shard_max_pages, by_district=self.listings_shard_by_district)
+        search_shards = {}
+        for mode in self.listings_modes:
+            if mode not in self.listings_price_edges:
+                continue
+            for unit_type in self.listings_unit_types:
+                if mode == "Buy" and unit_type == -1:
+                    continue
+                search_shards[(mode, unit_type)] = planner.plan(mode, unit_type, self.last_posted, self.listings_price_edges[mode])
+        planner.report()
+        return search_shards
+
+    def rate_limit_config(self):
+        # Requests per second for the AIMD token bucket, plus the longest wait between combinations
+        return {
+            "rate": self.rate_limit_initial,
+            "min_rate": self.rate_limit_min,
+            "max_rate": self.rate_limit_max,
+            "cooldown_range": (0, self.rate_limit_cooldown_max),
+        }
+
+    def parse_block_resources(self):
+        # Categories blocked in the browser, or None to load everything
+        val = self.get_env_var("BLOCK_RESOURCES", "None")
+        if val is None:
+            return None
+        return [c.strip().lower() for c in val.split(",") if c.strip()]
+
+    def lease_queue(self):
+        # "lease" claims rows through details_leases; "shard" takes every pending row (id % DETAILS_SHARDS)
+        if self.details_queue != "lease":
+            return None
+        return DetailsLeaseQueue(lease_seconds=self.details_lease_seconds, batch_size=self.details_lease_batch)
+
+    def details_buffer(self):
+        return database.DetailsWriteBuffer(max_rows=self.details_flush_rows, max_seconds=self.details_flush_seconds)
+
+    def listings_sink(self):
+        return CsvSink(self.properties_csv_path, compress=self.csv_gzip, buffer_rows=self.csv_buffer_rows)
+
+    def details_sink(self):
+        return CsvSink(self.details_csv_path, compress=self.csv_gzip, buffer_rows=self.csv_buffer_rows)
+
+    def block_policy(self):
+        return None if self.block_resources is None else ResourceBlockPolicy(categories=self.block_resources)
+
+    def worker_config(self):
+        # Plain, picklable settings handed to each spawned worker process
+        return {
+            "db_config": self.db_config,
+            "properties_csv_path": getattr(self, "properties_csv_path", None),
+            "details_csv_path": getattr(self, "details_csv_path", None),
+            "csv_gzip": self.csv_gzip,
+            "csv_buffer_rows": self.csv_buffer_rows,
+            "last_posted": self.last_posted,
+            "listings_desired_pages": self.listings_desired_pages,
+            "listings_engine": self.listings_engine,
+            "listings_stop_after_known_pages": self.listings_stop_after_known_pages,
+            "details_engine": self.details_engine,
+            "details_queue": self.details_queue,
+            "details_lease_seconds": self.details_lease_seconds,
+            "details_lease_batch": self.details_lease_batch,
+            "details_flush_rows": self.details_flush_rows,
+            "details_flush_seconds": self.details_flush_seconds,
+            "details_reuse_seconds": self.details_reuse_seconds,
+            "checkpoint_max_age_seconds": self.checkpoint_max_age_seconds,
+            "pipeline_parsers": self.pipeline_parsers,
+            "pipeline_queue_size": self.pipeline_queue_size,
+            "browser_max_pages": self.browser_max_pages,
+            "browser_max_memory_mb": self.browser_max_memory_mb,
+            "block_resources": self.block_resources,
+            "rate_limit": self.rate_limit_config(),
+        }
+
     def validate_input(self):
+        if self.db_config["backend"] not in self.ALLOWED_DATABASE_BACKENDS:
+            raise ValueError(f"Invalid database backend: {self.db_config['backend']}. Allowed: {self.ALLOWED_DATABASE_BACKENDS}")
         for mode in self.listings_modes + self.details_modes:
             if mode not in self.ALLOWED_MODES:
                 raise ValueError(f"Invalid mode: {mode}. Allowed: {self.ALLOWED_MODES}")
         for unit_type in self.listings_unit_types + self.details_unit_types:
             if unit_type not in self.ALLOWED_UNIT_TYPES:
                 raise ValueError(f"Invalid unit_type: {unit_type}. Allowed: {self.ALLOWED_UNIT_TYPES}")
+        if self.listings_engine not in self.ALLOWED_LISTINGS_ENGINES:
+            raise ValueError(f"Invalid listings engine: {self.listings_engine}. Allowed: {self.ALLOWED_LISTINGS_ENGINES}")
+        if self.details_engine not in self.ALLOWED_DETAILS_ENGINES:
+            raise ValueError(f"Invalid details engine: {self.details_engine}. Allowed: {self.ALLOWED_DETAILS_ENGINES}")
+        if self.details_queue not in self.ALLOWED_DETAILS_QUEUES:
+            raise ValueError(f"Invalid details queue: {self.details_queue}. Allowed: {self.ALLOWED_DETAILS_QUEUES}")
+        if self.details_lease_seconds < 1 or self.details_lease_batch < 1:
+            raise ValueError("DETAILS_LEASE_SECONDS and DETAILS_LEASE_BATCH must be at least 1")
+        if self.pipeline_parsers < 0 or self.pipeline_queue_size < 1:
+            raise ValueError("PIPELINE_PARSERS cannot be negative and PIPELINE_QUEUE_SIZE must be at least 1")
+        if any(edge < 1 for edges in self.listings_price_edges.values() for edge in edges) or self.listings_shard_max_pages < 1:
+            raise ValueError("LISTINGS_*_PRICE_EDGES must be positive prices and LISTINGS_SHARD_MAX_PAGES at least 1")
+        if self.listings_stop_after_known_pages is not None and self.listings_stop_after_known_pages < 1:
+            raise ValueError("LISTINGS_STOP_AFTER_KNOWN_PAGES must be at least 1 (or None for a full sweep)")
+        if self.csv_buffer_rows < 1:
+            raise ValueError("CSV_BUFFER_ROWS must be at least 1")
+        if self.parquet_batch_rows < 1:
+            raise ValueError("PARQUET_BATCH_ROWS must be at least 1")
+        if self.details_flush_rows < 1 or self.details_flush_seconds <= 0:
+            raise ValueError("DETAILS_FLUSH_ROWS must be at least 1 and DETAILS_FLUSH_SECONDS positive")
+        if self.checkpoint_max_age_seconds is not None and self.checkpoint_max_age_seconds < 1:
+            raise ValueError("CHECKPOINT_MAX_AGE_HOURS must be positive (or None to disable checkpoints)")
+        if self.details_reuse_seconds is not None and self.details_reuse_seconds < 1:
+            raise ValueError("DETAILS_REUSE_HOURS must be positive (or None to always load the page)")
+        if self.block_resources is not None:
+            unknown = set(self.block_resources) - ResourceBlockPolicy.CATEGORIES
+            if unknown:
+                raise ValueError(f"Invalid block categories: {unknown}. Allowed: {ResourceBlockPolicy.CATEGORIES}")
+        if not 0 < self.rate_limit_min <= self.rate_limit_initial <= self.rate_limit_max:
+            raise ValueError("Rate limits must satisfy 0 < RATE_LIMIT_MIN <= RATE_LIMIT_INITIAL <= RATE_LIMIT_MAX")
+        if self.workers < 1 or self.listings_page_shards < 1 or self.details_shards < 1:
+            raise ValueError("WORKERS, LISTINGS_PAGE_SHARDS and DETAILS_SHARDS must be at least 1")
             
     def setup_csvs(self):
         def create_and_cleanup_csv(env_key, default_path):
@@ -76,10 +246,12 @@ class Prep:
             root, ext = os.path.splitext(base_path)
             # Insert date folder between root and filename
             folder = os.path.join(os.path.dirname(root), date_folder)
-            filename = f"{os.path.basename(root)}_{timestamp}{ext}"
+            filename = f"{os.path.basename(root)}_{timestamp}{ext}" + (".gz" if self.csv_gzip else "")
             path = os.path.join(folder, filename)
             os.makedirs(folder, exist_ok=True)
-            open(path, 'w', encoding='utf-8').close()
+            # In pool mode only the workers' _w<N> files are written, so the main file is not created
+            if self.workers == 1:
+                open(path, 'w', encoding='utf-8').close()
 
             # # Cleanup old CSVs for this base path
             # files = [f for f in os.listdir(os.path.dirname(root))
@@ -102,58 +274,124 @@ class Prep:
         session = database.Session()
         session.execute(text("SELECT 1"))
 
-        current_id = session.execute(text("SELECT CONNECTION_ID()")).scalar()
-        for pid, user in session.execute(text("SELECT ID, USER FROM performance_schema.processlist")):
-            if pid != current_id and user == session.bind.url.username:
-                try:
-                    session.execute(text(f"KILL {pid}"))
-                except Exception:
-                    pass
-        session.commit()
-
+        if session.bind.dialect.name == "sqlite":
+            print(f"\n> SQLite Database: {session.bind.url.database}\n")
+            return session
         print(f"\n> Host: {session.bind.url.host}")
         print(f"> Port: {session.bind.url.port}")
         print(f"> User: {session.bind.url.username}")
         print(f"> Database: {session.bind.url.database}\n")
         return session
 
+    def expire_checkpoints(self):
+        # Checkpoints of interrupted scrapes are resumed; ones too old to be worth resuming are dropped
+        if self.checkpoint_max_age_seconds is None:
+            return
+        expired = database.RunCheckpoint.expire(self.checkpoint_max_age_seconds)
+        if expired:
+            print(f"> Checkpoints Expired: {expired}\n")
+
 # Main
 if __name__ == '__main__':
+    # `docker stop` sends SIGTERM to python as PID 1 (the Dockerfile CMD execs it): exit through the finally blocks so buffered details are flushed
+    install_sigterm_handler()
     try:
         # --- Preparation Phase --- #
         prep = Prep()
 
         # --- Scraper Phase --- #
-        if prep.run_listings:
-            for mode in prep.listings_modes:
-                for unit_type in prep.listings_unit_types:
-                    if mode == "Buy" and unit_type == -1:
-                        continue
-                    with database.Session() as sess:
-                        scraper = ScraperUtils(session=sess, mode=mode, unit_type=unit_type, last_posted=prep.last_posted)
-                        PropertyGuruScraper.run_scraper_listings(
-                            scraper=scraper, 
-                            desired_pages=prep.listings_desired_pages,
-                            listings_csv_path=prep.properties_csv_path
-                        )
-                    time.sleep(30)
-
-        if prep.run_details:
-            for mode in prep.details_modes:
-                for unit_type in prep.details_unit_types:
-                    if mode == "Buy" and unit_type == -1:
-                        continue
-                    with database.Session() as sess:
-                        scraper = ScraperUtils(session=sess, mode=mode, unit_type=unit_type, last_posted=None)
-                        PropertyGuruScraper.run_scraper_details(
-                            scraper=scraper, 
-                            max_scrape=prep.details_max_scrape,
-                            details_csv_path=prep.details_csv_path
-                        )
-                    time.sleep(30)
+        if prep.workers > 1:
+            # Native worker pool: N isolated browsers, work sharded across (mode, unit_type) and pages / rows
+            pool = WorkerPool(config=prep.worker_config(), workers=prep.workers)
+            if prep.run_listings:
+                search_shards = {}
+                if prep.listings_price_edges:
+                    # Shards are probed here with one browser, then handed to the workers as separate jobs
+                    planner_browser = BrowserSessionManager(max_pages=prep.browser_max_pages, max_memory_mb=prep.browser_max_memory_mb, block_policy=prep.block_policy())
+                    try:
+                        search_shards = prep.plan_search_shards(planner_browser, RateLimiter(**prep.rate_limit_config()), ChallengeDetector())
+                    finally:
+                        planner_browser.close()
+                pool.run(WorkerPool.plan_listings_jobs(
+                    prep.listings_modes, prep.listings_unit_types,
+                    page_shards=prep.listings_page_shards,
+                    desired_pages=prep.listings_desired_pages,
+                    search_shards=search_shards
+                ))
+            if prep.run_details:
+                pool.run(WorkerPool.plan_details_jobs(
+                    prep.details_modes, prep.details_unit_types,
+                    shards=prep.details_shards,
+                    max_scrape=prep.details_max_scrape,
+                    leased=prep.details_queue == "lease"
+                ))
+        else:
+            # One long-lived browser shared by every (mode, unit_type) combination
+            browser = BrowserSessionManager(max_pages=prep.browser_max_pages, max_memory_mb=prep.browser_max_memory_mb, block_policy=prep.block_policy())
+            # One adaptive rate controller paces every page load and every pause between combinations
+            rate_limiter = RateLimiter(**prep.rate_limit_config())
+            challenges = ChallengeDetector()
+            details_queue = prep.lease_queue()
+            details_buffer = prep.details_buffer()
+            # Rows are appended to the dated CSVs as they are scraped
+            listings_sink = prep.listings_sink() if prep.run_listings else None
+            details_sink = prep.details_sink() if prep.run_details else None
+            if prep.run_listings:
+                # Searches with price edges are split into shards that each stay under the pagination ceiling
+                search_shards = prep.plan_search_shards(browser, rate_limiter, challenges)
+                for mode in prep.listings_modes:
+                    for unit_type in prep.listings_unit_types:
+                        if mode == "Buy" and unit_type == -1:
+                            continue
+                        # A planned search with no shards had no listings in any band; one never planned is scraped whole
+                        for shard in search_shards.get((mode, unit_type), [None]):
+                            with database.Session() as sess:
+                                scraper = ScraperUtils(session=sess, mode=mode, unit_type=unit_type, last_posted=prep.last_posted, listings_engine=prep.listings_engine, browser=browser, rate_limiter=rate_limiter, challenges=challenges, pipeline_parsers=prep.pipeline_parsers, pipeline_queue_size=prep.pipeline_queue_size, listings_sink=listings_sink, stop_after_known_pages=prep.listings_stop_after_known_pages, checkpoint_max_age_seconds=prep.checkpoint_max_age_seconds,
+                                                       price_band=None if shard is None else (shard["min_price"], shard["max_price"]), district=None if shard is None else shard["district"])
+                                PropertyGuruScraper.run_scraper_listings(
+                                    scraper=scraper, 
+                                    desired_pages=prep.listings_desired_pages
+                                )
+                            rate_limiter.cooldown()
+
+            if prep.run_details:
+                for mode in prep.details_modes:
+                    for unit_type in prep.details_unit_types:
+                        if mode == "Buy" and unit_type == -1:
+                            continue
+                        with database.Session() as sess:
+                            scraper = ScraperUtils(session=sess, mode=mode, unit_type=unit_type, last_posted=None, details_engine=prep.details_engine, browser=browser, rate_limiter=rate_limiter, challenges=challenges, details_queue=details_queue, details_buffer=details_buffer, pipeline_parsers=prep.pipeline_parsers, pipeline_queue_size=prep.pipeline_queue_size, details_sink=details_sink, details_reuse_seconds=prep.details_reuse_seconds, checkpoint_max_age_seconds=prep.checkpoint_max_age_seconds)
+                            PropertyGuruScraper.run_scraper_details(
+                                scraper=scraper, 
+                                max_scrape=prep.details_max_scrape
+                            )
+                        rate_limiter.cooldown()
+
+        # --- Export Phase --- #
+        if prep.run_parquet_export:
+            # Appends the rows changed since the last export to the partitioned Parquet dataset
+            ParquetExporter(output_dir=prep.parquet_export_dir, batch_rows=prep.parquet_batch_rows).run()
 
     except Exception as e:
         print(f"❌ Error on Main: {e}")
     finally:
+        if 'browser' in locals():
+            browser.close()
+            browser.report()
+        if 'rate_limiter' in locals():
+            rate_limiter.report()
+        if 'challenges' in locals():
+            challenges.report()
+        if locals().get('details_queue') is not None:
+            details_queue.report()
+        if 'details_buffer' in locals():
+            details_buffer.close()
+            details_buffer.report()
+        for sink in (locals().get('listings_sink'), locals().get('details_sink')):
+            if sink is not None:
+                sink.close()
+                sink.report()
+        if database.engine is not None:
+            database.report_stats()
         if 'session' in locals():
             prep.session.close()
\ No newline at end of file
@@ -0,0 +1,128 @@
+# src/parquet_export.py
+from datetime import datetime
+from sqlalchemy import Boolean, Date, DECIMAL, Enum, Float, Integer, TIMESTAMP, func, select, tuple_
+import database
+import json
+import os
+import pyarrow as pa
+import pyarrow.dataset as ds
+import uuid
+
+class ParquetExporter:
+    """
+    Appends the properties table to a Parquet dataset, hive-partitioned by
+    property_selling_type / unit_type / date, for the notebooks in models/.
+    Rows are streamed with a server-side cursor and only rows changed since the last export are
+    written: the watermark is the (updated_at or created_at, id) of the last exported row. date is
+    the day of that change, so an updated listing is written again under a newer partition; keep
+    the last version per id when reading (e.g. sort by changed_at and drop_duplicates("id", keep="last")).
+    """
+    PARTITION_COLUMNS = ["property_selling_type", "unit_type", "date"]
+    WATERMARK_FILE = "_watermark.json"
+
+    def __init__(self, output_dir="data/parquet", batch_rows=5000, include_text=True):
+        self.output_dir = output_dir
+        self.batch_rows = batch_rows  # Rows fetched from the cursor and written per Parquet file
+        self.include_text = include_text  # Also export description / raw_* from property_details_text
+
+        # Per-run counters
+        self.rows_written = 0
+        self.batches = 0
+
+    @staticmethod
+    def arrow_type(column):
+        # Enum is checked before the generic types it derives from
+        column_type = column.type
+        if isinstance(column_type, Enum):
+            return pa.dictionary(pa.int8(), pa.string())
+        if isinstance(column_type, DECIMAL):
+            return pa.decimal128(column_type.precision, column_type.scale)
+        if isinstance(column_type, Boolean):
+            return pa.bool_()
+        if isinstance(column_type, Integer):
+            return pa.int32()
+        if isinstance(column_type, Float):
+            return pa.float64()
+        if isinstance(column_type, Date):
+            return pa.date32()
+        if isinstance(column_type, TIMESTAMP):
+            return pa.timestamp("s")
+        return pa.string()
+
+    def columns(self):
+        columns = list(database.Properties.__table__.columns)
+        if self.include_text:
+            columns += [database.PropertyDetailsText.__table__.c[col] for col in database.PropertyDetailsText.COLUMNS]
+        return columns
+
+    def schema(self):
+        fields = [pa.field(column.name, self.arrow_type(column)) for column in self.columns()]
+        fields.append(pa.field("changed_at", pa.timestamp("s")))
+        # Partition values end up in the directory names, so they are plain strings
+        fields.append(pa.field("date", pa.string()))
+        return pa.schema(fields)
+
+    def query(self, watermark, until):
+        table = database.Properties.__table__
+        changed_at = func.coalesce(table.c.updated_at, table.c.created_at)
+        stmt = select(*self.columns(), changed_at.label("changed_at"))
+        if self.include_text:
+            text_table = database.PropertyDetailsText.__table__
+            stmt = stmt.select_from(table.outerjoin(text_table, text_table.c.id == table.c.id))
+        # Rows changed in the current second wait for the next run, so none is skipped by the (changed_at, id) keyset
+        stmt = stmt.where(changed_at < self.bind_time(until))
+        if watermark is not None:
+            stmt = stmt.where(tuple_(changed_at, table.c.id) > tuple_(self.bind_time(watermark["changed_at"]), watermark["id"]))
+        return stmt.order_by(changed_at, table.c.id)
+
+    @staticmethod
+    def bind_time(value):
+        # SQLite keeps timestamps as "YYYY-MM-DD HH:MM:SS" text, so compare against the same format
+        return value.strftime("%Y-%m-%d %H:%M:%S") if database.is_sqlite() else value
+
+    def read_watermark(self):
+        path = os.path.join(self.output_dir, self.WATERMARK_FILE)
+        if not os.path.isfile(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            watermark = json.load(f)
+        watermark["changed_at"] = datetime.fromisoformat(watermark["changed_at"])
+        return watermark
+
+    def write_watermark(self, row):
+        # Written to a temp file and renamed, so a crash never leaves a half-written watermark
+        path = os.path.join(self.output_dir, self.WATERMARK_FILE)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"changed_at": row["changed_at"].isoformat(sep=" "), "id": row["id"]}, f)
+        os.replace(path + ".tmp", path)
+
+    def run(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        watermark = self.read_watermark()
+        schema = self.schema()
+        partitioning = ds.partitioning(pa.schema([schema.field(col) for col in self.PARTITION_COLUMNS]), flavor="hive")
+        run_id = uuid.uuid4().hex[:8]
+        print(f"= Parquet Export | Since: {watermark['changed_at'] if watermark else 'Beginning'} | Output: {self.output_dir}")
+
+        with database.engine.connect() as connection:
+            # The database clock, since created_at / updated_at come from it
+            until = connection.execute(select(func.now())).scalar().replace(microsecond=0)
+            # stream_results: server-side cursor (SSCursor on MySQL), rows arrive in batch_rows chunks
+            result = connection.execution_options(stream_results=True, yield_per=self.batch_rows).execute(self.query(watermark, until))
+            for batch_index, rows in enumerate(result.mappings().partitions(self.batch_rows)):
+                records = [{**row, "date": row["changed_at"].date().isoformat()} for row in rows]
+                ds.write_dataset(
+                    pa.Table.from_pylist(records, schema=schema), self.output_dir,
+                    format="parquet", partitioning=partitioning,
+                    basename_template=f"part-{run_id}-{batch_index:05d}-{{i}}.parquet",
+                    existing_data_behavior="overwrite_or_ignore",
+                )
+                # Advanced after every batch, so an interrupted export resumes after the last file written
+                self.write_watermark(records[-1])
+                self.rows_written += len(records)
+                self.batches += 1
+                print(f"> Parquet Export | Batch {batch_index + 1} | Rows: {len(records)}")
+        self.report()
+
+    def report(self):
+        print(f"= Parquet Export | Rows: {self.rows_written} | Batches: {self.batches}")
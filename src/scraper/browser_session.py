@@ -0,0 +1,112 @@
+# src/scraper/browser_session.py
+from contextlib import contextmanager
+from seleniumbase import SB
+import psutil
+
+class BrowserSessionManager:
+    """
+    Long-lived SB browser that ScraperUtils instances borrow for each page and hand back afterwards.
+    The browser is only recycled after max_pages pages, after an error, or when Chrome's memory
+    grows past max_memory_mb, so startup and the initial challenge are paid once per cycle.
+    An optional ResourceBlockPolicy is installed on every browser it launches.
+    """
+    SB_OPTIONS = {"uc": True, "xvfb": True, "locale": "en", "uc_cdp_events": True}
+
+    def __init__(self, max_pages=200, max_memory_mb=1500, block_policy=None):
+        self.max_pages = max_pages
+        self.max_memory_mb = max_memory_mb
+        self.block_policy = block_policy
+        self.sb = None
+        self._context = None
+        self.pages = 0
+        self.needs_recycle = False
+        self.launches = 0
+        self.recycles = 0
+
+    def start(self):
+        options = dict(self.SB_OPTIONS)
+        if self.block_policy is not None:
+            options.update(self.block_policy.sb_options())
+        self._context = SB(**options)
+        self.sb = self._context.__enter__()
+        if self.block_policy is not None:
+            self.block_policy.attach(self.sb)
+        self.pages = 0
+        self.needs_recycle = False
+        self.launches += 1
+        print(f"> Browser | Launched (#{self.launches})")
+
+    def close(self):
+        if self._context is not None:
+            try:
+                self._context.__exit__(None, None, None)
+            except Exception as e:
+                print(f"❌ Error Closing Browser: {e}")
+        self._context = None
+        self.sb = None
+
+    def recycle(self, reason):
+        print(f"> Browser | Recycling After {reason}")
+        self.recycles += 1
+        self.close()
+
+    def get(self):
+        # Recycle lazily when the browser is next borrowed, never in the middle of a page
+        if self.sb is not None:
+            if self.needs_recycle:
+                self.recycle("Error")
+            elif self.max_pages is not None and self.pages >= self.max_pages:
+                self.recycle(f"{self.pages} Pages")
+            elif self.max_memory_mb is not None:
+                memory_mb = self.memory_mb()
+                if memory_mb > self.max_memory_mb:
+                    self.recycle(f"{memory_mb:.0f} MB Memory")
+        if self.sb is None:
+            self.start()
+        return self.sb
+
+    def open(self, sb, url):
+        sb.uc_open_with_reconnect(url, None)
+
+    def release(self, error=False):
+        self.pages += 1
+        if self.block_policy is not None and self.sb is not None:
+            self.block_policy.record_page(self.sb)
+        if error:
+            self.needs_recycle = True
+
+    def mark_error(self):
+        self.needs_recycle = True
+
+    @contextmanager
+    def page(self):
+        sb = self.get()
+        try:
+            yield sb
+        except BaseException:
+            self.release(error=True)
+            raise
+        else:
+            self.release()
+
+    def report(self):
+        print(f"= Browser | Launches: {self.launches} | Recycles: {self.recycles}")
+        if self.block_policy is not None:
+            self.block_policy.report()
+
+    def memory_mb(self):
+        # Resident memory of the Chrome process tree (browser, renderers, GPU, ...)
+        try:
+            driver = self.sb.driver
+            pid = getattr(driver, "browser_pid", None) or driver.service.process.pid
+            root = psutil.Process(pid)
+            processes = [root] + root.children(recursive=True)
+            return sum(p.memory_info().rss for p in processes if p.is_running()) / (1024 * 1024)
+        except Exception:
+            return 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,113 @@
+# src/scraper/challenge.py
+from collections import Counter
+import re
+import time
+
+class ChallengeDetector:
+    """
+    Classifies every page load as clean, challenged, redirected or blocked, and decides what to do
+    about it: the captcha is only clicked when a challenge is actually on screen, failed loads are
+    retried with exponential backoff, and the browser is rotated after repeated failures.
+    Time spent getting past non-clean loads is recorded per run.
+    """
+    CLEAN = "clean"
+    CHALLENGED = "challenged"
+    REDIRECTED = "redirected"
+    BLOCKED = "blocked"
+
+    # Title, URL, challenge widgets and the start of the body text in a single round-trip
+    STATE_SCRIPT = """
+        return {
+            title: document.title || '',
+            url: location.href,
+            challenge: !!document.querySelector(
+                'iframe[src*="challenges.cloudflare.com"], #challenge-form, #challenge-running, .cf-turnstile, input[name="cf-turnstile-response"]'
+            ),
+            text: document.body ? document.body.innerText.slice(0, 2000) : '',
+        };
+    """
+    CHALLENGE_PATTERN = re.compile(r"just a moment|attention required|verify you are human|checking your browser|checking if the site connection is secure", re.I)
+    BLOCKED_PATTERN = re.compile(r"access denied|you have been blocked|error 1020|error 1015|too many requests|request blocked", re.I)
+
+    def __init__(self, max_attempts=4, rotate_after=2, base_delay=5, max_delay=300):
+        self.max_attempts = max_attempts  # Loads per URL before giving up on it
+        self.rotate_after = rotate_after  # Consecutive failed loads before switching to a fresh browser
+        self.base_delay = base_delay  # Seconds, doubled after every failed load
+        self.max_delay = max_delay
+
+        # Per-run counters
+        self.loads = Counter()  # First classification of every load
+        self.resolved = 0  # Non-clean loads that ended up clean
+        self.failed = 0  # URLs given up on
+        self.rotations = 0
+        self.time_lost = 0.0
+
+    def classify(self, sb, redirect_marker=None):
+        try:
+            state = sb.execute_script(self.STATE_SCRIPT) or {}
+        except Exception:
+            state = {}
+        title = state.get("title", "")
+        text = state.get("text", "")
+        if self.BLOCKED_PATTERN.search(title) or (not state.get("challenge") and self.BLOCKED_PATTERN.search(text[:500])):
+            return self.BLOCKED
+        if state.get("challenge") or self.CHALLENGE_PATTERN.search(title):
+            return self.CHALLENGED
+        if redirect_marker is not None and redirect_marker in state.get("url", ""):
+            return self.REDIRECTED
+        return self.CLEAN
+
+    def delay(self, failures):
+        return min(self.max_delay, self.base_delay * 2 ** (failures - 1))
+
+    def open(self, browser, sb, url, rate_limiter, redirect_marker=None, before_open=None):
+        """
+        Load url until it classifies as clean or max_attempts is used up.
+        Returns (sb, state); sb changes when the browser was rotated along the way.
+        """
+        started = time.monotonic()
+        failures = 0
+        state = None
+        troubled = False  # Any non-clean classification, including a challenge solved on the first load
+        for attempt in range(1, self.max_attempts + 1):
+            if before_open is not None:
+                before_open(sb)
+            rate_limiter.wait()
+            browser.open(sb, url)
+            state = self.classify(sb, redirect_marker)
+            if attempt == 1:
+                self.loads[state] += 1
+            if state != self.CLEAN:
+                troubled = True
+            if state == self.CHALLENGED:
+                sb.uc_gui_click_captcha()
+                rate_limiter.settle(sb)
+                state = self.classify(sb, redirect_marker)
+            if state == self.CLEAN:
+                break
+
+            failures += 1
+            print(f"> Challenge | {state.title()} (Attempt {attempt}/{self.max_attempts}) | URL: {sb.get_current_url()}")
+            rate_limiter.backoff(state.title())
+            if attempt == self.max_attempts:
+                break
+            if failures % self.rotate_after == 0:
+                self.rotations += 1
+                browser.recycle(f"{failures} Failed Loads")
+                sb = browser.get()
+            rate_limiter.sleep(self.delay(failures))
+
+        if troubled:
+            self.time_lost += time.monotonic() - started
+            if state == self.CLEAN:
+                self.resolved += 1
+            else:
+                self.failed += 1
+                print(f"❌ Challenge | Giving Up After {self.max_attempts} Attempts ({state.title()})")
+        return sb, state
+
+    def report(self):
+        print(
+            f"= Challenges | Loads: {dict(self.loads)} | Resolved: {self.resolved} | Failed: {self.failed}"
+            f" | Rotations: {self.rotations} | Time Lost: {self.time_lost:.0f}s"
+        )
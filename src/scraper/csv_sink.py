@@ -0,0 +1,64 @@
+# src/scraper/csv_sink.py
+import csv
+import gzip
+import io
+import os
+
+class CsvSink:
+    """
+    Appends rows to a CSV while the scrape runs instead of holding the whole run in memory.
+    Rows are buffered up to buffer_rows, then appended and the file closed again, so a crash loses at
+    most one buffer. With compress=True every flush is appended as its own gzip member; gzip, zcat and
+    pandas read the concatenated members as one file.
+    """
+
+    def __init__(self, path, compress=False, buffer_rows=20):
+        self.path = path
+        self.compress = compress
+        self.buffer_rows = buffer_rows
+        self.fieldnames = None  # Taken from the first row
+        self.buffer = []
+
+        # Per-run counters
+        self.rows_written = 0
+        self.flushes = 0
+
+    def write_row(self, row):
+        if self.fieldnames is None:
+            self.fieldnames = list(row.keys())
+        self.buffer.append(row)
+        if len(self.buffer) >= self.buffer_rows:
+            self.flush()
+
+    def write_rows(self, rows):
+        for row in rows:
+            self.write_row(row)
+
+    def flush(self):
+        if not self.buffer:
+            return
+        text = io.StringIO()
+        writer = csv.DictWriter(text, fieldnames=self.fieldnames, extrasaction="ignore")
+        if not os.path.isfile(self.path) or os.stat(self.path).st_size == 0:
+            writer.writeheader()
+        writer.writerows(self.buffer)
+        data = text.getvalue().encode("utf-8")
+        if self.compress:
+            data = gzip.compress(data)
+        with open(self.path, "ab") as f:
+            f.write(data)
+        self.rows_written += len(self.buffer)
+        self.flushes += 1
+        self.buffer = []
+
+    def close(self):
+        self.flush()
+
+    def report(self):
+        print(f"= CSV | {os.path.basename(self.path)} | Rows: {self.rows_written} | Flushes: {self.flushes}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
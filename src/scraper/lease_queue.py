@@ -0,0 +1,30 @@
+# src/scraper/lease_queue.py
+from database import DetailsLease
+import os
+import socket
+
+class DetailsLeaseQueue:
+    """
+    Hands out details_fetched=False rows to one worker at a time through leases in details_leases.
+    Rows are claimed in small batches so a lease never outlives the pages it covers, and released
+    by DetailsWriteBuffer in the same transaction that saves their details. Rows that fail (or belong to a worker that died) keep their lease
+    until it expires after lease_seconds, and are then picked up again by whichever worker is free.
+    """
+
+    def __init__(self, worker_id=None, lease_seconds=900, batch_size=5):
+        # hostname-pid is unique per docker container and per worker process
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self.batch_size = batch_size
+        self.claimed = 0
+
+    def claim(self, property_selling_type, unit_type, limit=None):
+        size = self.batch_size if limit is None else min(self.batch_size, limit)
+        if size <= 0:
+            return []
+        ids = DetailsLease.claim(self.worker_id, property_selling_type, unit_type, size, self.lease_seconds)
+        self.claimed += len(ids)
+        return ids
+
+    def report(self):
+        print(f"= Details Queue | Worker: {self.worker_id} | Rows Claimed: {self.claimed}")
@@ -0,0 +1,79 @@
+# src/scraper/page_state.py
+import json
+
+class PageStateCapture:
+    """
+    Records the structured data a PropertyGuru page is rendered from: the embedded Next.js
+    page state (__NEXT_DATA__) and JSON XHR responses seen through CDP (uc_cdp_events=True).
+    uc_open_with_reconnect detaches the driver while the page loads, so the embedded state is the
+    primary source and XHR bodies are a best-effort extra for data fetched after the reconnect.
+    """
+    NEXT_DATA_SCRIPT = """
+        const el = document.getElementById('__NEXT_DATA__');
+        return el ? el.textContent : null;
+    """
+    XHR_URL_PATTERNS = ("/api/", "graphql", "listing")
+
+    def __init__(self):
+        self.responses = {}  # requestId -> url of JSON responses worth fetching
+        self._driver = None
+
+    def attach(self, sb):
+        # Register the CDP listener once per browser (a recycled browser gets a new driver)
+        if self._driver is sb.driver:
+            return
+        try:
+            sb.driver.add_cdp_listener("Network.responseReceived", self.on_response_received)
+        except Exception as e:
+            print(f"> CDP Listener Not Available: {e}")
+        self._driver = sb.driver
+        self.responses.clear()
+
+    def on_response_received(self, message):
+        params = message.get("params", {})
+        response = params.get("response", {})
+        url = response.get("url", "")
+        if "json" in response.get("mimeType", "") and any(pattern in url for pattern in self.XHR_URL_PATTERNS):
+            self.responses[params.get("requestId")] = url
+
+    def reset(self):
+        self.responses.clear()
+
+    def collect(self, sb):
+        # Return every decoded payload for the current page; an empty list means "fall back to the DOM"
+        payloads = []
+        try:
+            raw = sb.execute_script(self.NEXT_DATA_SCRIPT)
+            if raw:
+                payloads.append(json.loads(raw))
+        except Exception as e:
+            print(f"> Page State Not Found: {e}")
+        for request_id in list(self.responses):
+            try:
+                body = sb.driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+                payloads.append(json.loads(body.get("body", "")))
+            except Exception:
+                pass
+        self.responses.clear()
+        return payloads
+
+def iter_dicts(payload):
+    # Depth-first walk over every dict nested anywhere in a JSON payload
+    stack = [payload]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            yield node
+            stack.extend(reversed(list(node.values())))
+        elif isinstance(node, list):
+            stack.extend(reversed(node))
+
+def pick(data, keys):
+    # First non-empty value among candidate keys; nested dicts resolve to their text-like field
+    for key in keys:
+        value = data.get(key)
+        if isinstance(value, dict):
+            value = pick(value, ("text", "pretty", "value", "name", "fullAddress", "nearbyText", "label"))
+        if value not in (None, "", [], {}):
+            return value
+    return None
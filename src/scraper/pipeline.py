@@ -0,0 +1,122 @@
+# src/scraper/pipeline.py
+import queue
+import threading
+import time
+
+class Pipeline:
+    """
+    Fetch -> parse -> persist, connected by bounded queues.
+    The caller's thread stays the fetch stage (it owns the browser) and hands captured pages to
+    submit(); a pool of parser threads turns them into rows and a single writer thread persists
+    them in submission order. A full queue blocks submit(), so the browser never runs more than
+    queue_size pages ahead of the database. With parsers=0 everything runs inline in the caller.
+    """
+    _STOP = object()
+
+    def __init__(self, parse, write, parsers=2, queue_size=4, on_idle=None, name="pipeline"):
+        self.parse = parse  # item -> result (None to skip)
+        self.write = write  # result -> None, always called from one thread
+        self.parsers = parsers
+        self.queue_size = queue_size
+        self.on_idle = on_idle  # Called by the writer when nothing arrived for a second
+        self.name = name
+        self.parse_queue = queue.Queue(maxsize=queue_size)
+        self.write_queue = queue.Queue(maxsize=queue_size)
+        self.threads = []
+        self.next_seq = 0
+
+        # Per-run counters
+        self.submitted = 0
+        self.written = 0
+        self.errors = 0
+        self.blocked_seconds = 0.0  # Time the fetch stage waited on a full queue
+
+    def start(self):
+        if self.parsers <= 0 or self.threads:
+            return self
+        for i in range(self.parsers):
+            thread = threading.Thread(target=self.run_parser, name=f"{self.name}-parser-{i + 1}")
+            thread.start()
+            self.threads.append(thread)
+        self.writer = threading.Thread(target=self.run_writer, name=f"{self.name}-writer")
+        self.writer.start()
+        return self
+
+    def submit(self, item):
+        self.submitted += 1
+        if self.parsers <= 0:
+            result = self.safe_call(self.parse, item)
+            if result is not None:
+                self.safe_call(self.write, result)
+                self.written += 1
+            return
+        started = time.monotonic()
+        self.parse_queue.put((self.next_seq, item))
+        self.blocked_seconds += time.monotonic() - started
+        self.next_seq += 1
+
+    def close(self):
+        # Drain everything already submitted, then stop the threads
+        if not self.threads:
+            return
+        for _ in range(self.parsers):
+            self.parse_queue.put(self._STOP)
+        for thread in self.threads:
+            thread.join()
+        self.write_queue.put(self._STOP)
+        self.writer.join()
+        self.threads = []
+
+    def run_parser(self):
+        while True:
+            task = self.parse_queue.get()
+            if task is self._STOP:
+                return
+            seq, item = task
+            self.write_queue.put((seq, self.safe_call(self.parse, item)))
+
+    def run_writer(self):
+        # Results arrive out of order from the parser pool; write them in submission order
+        pending = {}
+        expected = 0
+        while True:
+            try:
+                task = self.write_queue.get(timeout=1)
+            except queue.Empty:
+                if self.on_idle is not None:
+                    self.safe_call(self.on_idle)
+                continue
+            if task is self._STOP:
+                break
+            seq, result = task
+            pending[seq] = result
+            while expected in pending:
+                result = pending.pop(expected)
+                expected += 1
+                if result is not None:
+                    self.safe_call(self.write, result)
+                    self.written += 1
+        for seq in sorted(pending):
+            if pending[seq] is not None:
+                self.safe_call(self.write, pending[seq])
+                self.written += 1
+
+    def safe_call(self, func, *args):
+        try:
+            return func(*args)
+        except Exception as e:
+            self.errors += 1
+            print(f"❌ Error on {threading.current_thread().name}: {e}")
+            return None
+
+    def report(self):
+        print(
+            f"= Pipeline | {self.name.title()} | Submitted: {self.submitted} | Written: {self.written}"
+            f" | Errors: {self.errors} | Fetch Blocked: {self.blocked_seconds:.1f}s"
+        )
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
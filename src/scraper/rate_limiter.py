@@ -0,0 +1,87 @@
+# src/scraper/rate_limiter.py
+import random
+import time
+
+class RateLimiter:
+    """
+    Central pacing for a run: a token bucket whose refill rate is driven by AIMD.
+    Every clean response raises the rate additively, every challenge or error cuts it
+    multiplicatively, so the worst-case delays are only paid while the site pushes back.
+    Rates are in requests per second.
+    """
+
+    def __init__(self, rate=0.25, min_rate=0.02, max_rate=1.0, increase=0.02, decrease=0.5, jitter=0.3,
+                 settle_range=(0.5, 3.0), cooldown_range=(0, 60)):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.jitter = jitter
+        self.settle_range = settle_range  # Wait after a captcha click, from clean to fully backed off
+        self.cooldown_range = cooldown_range  # Wait between (mode, unit_type) combinations
+
+        self.tokens = 1.0
+        self.updated = time.monotonic()
+        self.started = self.updated
+        self.requests = 0
+        self.successes = 0
+        self.backoffs = 0
+        self.waited = 0.0
+
+    def pressure(self):
+        # 0.0 at the maximum rate (site is responsive), 1.0 at the minimum rate (fully backed off)
+        if self.max_rate == self.min_rate:
+            return 0.0
+        return (self.max_rate - self.rate) / (self.max_rate - self.min_rate)
+
+    def sleep(self, seconds, sb=None):
+        seconds = max(0.0, seconds * random.uniform(1 - self.jitter, 1 + self.jitter))
+        if seconds:
+            if sb is not None:
+                sb.sleep(seconds)
+            else:
+                time.sleep(seconds)
+            self.waited += seconds
+        return seconds
+
+    def wait(self):
+        # Take one token before a page load, sleeping until the bucket refills if needed
+        now = time.monotonic()
+        self.tokens = min(1.0, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1.0:
+            self.sleep((1.0 - self.tokens) / self.rate)
+            self.updated = time.monotonic()
+            self.tokens = 1.0
+        self.tokens -= 1.0
+        self.requests += 1
+
+    def settle(self, sb=None):
+        # Short wait for the page to render after a captcha click
+        low, high = self.settle_range
+        return self.sleep(low + (high - low) * self.pressure(), sb)
+
+    def cooldown(self):
+        # Wait between scrape combinations / jobs
+        low, high = self.cooldown_range
+        return self.sleep(low + (high - low) * self.pressure())
+
+    def success(self):
+        self.successes += 1
+        self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def backoff(self, reason="Error"):
+        self.backoffs += 1
+        self.rate = max(self.min_rate, self.rate * self.decrease)
+        print(f"> Rate Limiter | Backing Off ({reason}) | Rate: {self.rate * 60:.1f} req/min")
+
+    def effective_rate(self):
+        elapsed = time.monotonic() - self.started
+        return self.requests / elapsed if elapsed > 0 else 0.0
+
+    def report(self):
+        print(
+            f"= Rate Limiter | Requests: {self.requests} | Effective Rate: {self.effective_rate() * 60:.1f} req/min"
+            f" | Current Rate: {self.rate * 60:.1f} req/min | Backoffs: {self.backoffs} | Waited: {self.waited:.0f}s"
+        )
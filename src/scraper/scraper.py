@@ -2,19 +2,19 @@
 
 class PropertyGuruScraper:
     @staticmethod
-    def run_scraper_listings(scraper, desired_pages, listings_csv_path):
+    def run_scraper_listings(scraper, desired_pages, start_page=1, page_step=1):
+        # Listings are streamed to scraper.listings_sink while the pages are scraped
         try:
-            scraper.scrape_listings(desired_pages=desired_pages)
-            scraper.save_listings_to_csv(listings_csv_path)
+            scraper.scrape_listings(desired_pages=desired_pages, start_page=start_page, page_step=page_step)
             print("")
         except Exception as e:
             print(f"❌ Error on run_scraper_listings: {e}")
 
     @staticmethod
-    def run_scraper_details(scraper, max_scrape, details_csv_path):
+    def run_scraper_details(scraper, max_scrape, shard_index=0, shard_count=1):
+        # Details rows are streamed to scraper.details_sink while the pages are scraped
         try:
-            scraper.scrape_details(max_scrape=max_scrape)
-            scraper.save_details_to_csv(details_csv_path)
+            scraper.scrape_details(max_scrape=max_scrape, shard_index=shard_index, shard_count=shard_count)
             print("")
         except Exception as e:
-            print(f"❌ Error on run_scraper_details: {e}")
\ No newline at end of file
+            print(f"❌ Error on run_scraper_details: {e}")
@@ -1,30 +1,75 @@
 # src/scraper/scraper_utils.py
-from database import Properties
+from database import CrawlState, DetailsWriteBuffer, Properties, RunCheckpoint
 from datetime import datetime
 from decimal import Decimal, ROUND_HALF_UP
-from seleniumbase import SB
+from scraper.browser_session import BrowserSessionManager
+from scraper.challenge import ChallengeDetector
+from scraper.page_state import PageStateCapture, iter_dicts, pick
+from scraper.pipeline import Pipeline
+from scraper.rate_limiter import RateLimiter
+from scraper.snapshot import BASE_URL, PageSnapshot, SnapshotElement
 from selenium.webdriver.common.by import By
 from selenium.common.exceptions import NoSuchElementException, TimeoutException
-import csv
-import os
-import random
+from sqlalchemy import func
+from urllib.parse import urljoin
 import re
-import time
 
 class ScraperUtils:
-    def __init__(self, session, mode="Rent", unit_type=-1, last_posted=2):
+    # Captures every listing card's outerHTML and the pagination labels in a single round-trip
+    LISTINGS_SNAPSHOT_SCRIPT = """
+        return {
+            cards: Array.from(document.querySelectorAll('[class="listing-card-banner-root"]'), el => el.outerHTML),
+            pages: Array.from(document.querySelectorAll('li[class="page-item"], li[class="page-item active"]'), el => el.innerText.trim()),
+        };
+    """
+
+    # Consecutive listings pages that may fail (challenge or error) before the run is abandoned
+    MAX_FAILED_PAGES = 3
+    # Rows fetched per keyset page while walking the details backlog
+    BACKLOG_PAGE_SIZE = 500
+    # The only columns the details loop reads from a backlog row
+    BACKLOG_COLUMNS = ("id", "property_id", "title", "property_url", "property_selling_type", "unit_type")
+
+    def __init__(self, session, mode="Rent", unit_type=-1, last_posted=2, listings_engine="dom", details_engine="dom", browser=None, rate_limiter=None, challenges=None, details_queue=None, details_buffer=None,
+                 pipeline_parsers=2, pipeline_queue_size=4, listings_sink=None, details_sink=None, stop_after_known_pages=None,
+                 details_reuse_seconds=None, checkpoint_max_age_seconds=None, price_band=None, district=None):
         self.session = session
         self.mode = mode
         self.unit_type = unit_type
         self.last_posted = last_posted
+        self.listings_engine = listings_engine  # "dom" (live WebElements), "html" (offline lxml parsing) or "state" (page-state JSON)
+        self.details_engine = details_engine  # "dom" (live WebElements), "snapshot" (one JS capture, offline parsing) or "state" (page-state JSON)
+        self.page_state = PageStateCapture()
+        self.browser = browser  # Shared BrowserSessionManager, or None for a private browser per scrape
+        self.rate_limiter = rate_limiter or RateLimiter()  # Shared pacing for every page load in the run
+        self.challenges = challenges or ChallengeDetector()  # Shared challenge handling and per-run challenge stats
+        self.details_queue = details_queue  # DetailsLeaseQueue to claim rows with, or None to take every pending row
+        self.details_buffer = details_buffer if details_buffer is not None else DetailsWriteBuffer()  # Batches details writes outside the browser loop
+        self.pipeline_parsers = pipeline_parsers  # Parser threads behind the browser (0 parses and writes inline)
+        self.pipeline_queue_size = pipeline_queue_size  # Pages the browser may run ahead of the database
+        self.listings_sink = listings_sink  # CsvSink the listings are streamed to, or None for no CSV
+        self.details_sink = details_sink  # CsvSink the details rows are streamed to, or None for no CSV
+        self.stop_after_known_pages = stop_after_known_pages  # Incremental crawl: stop after K consecutive known pages (None = full sweep)
+        self.high_water_mark = None  # CrawlState.listing_key of the newest listing seen by earlier crawls
+        self.newest_listing = None  # (listing_key, listed_date, property_id) of the newest listing seen by this crawl
+        self.known_pages = 0  # Consecutive saved pages with only known, unchanged listings
+        self.details_reuse_seconds = details_reuse_seconds  # Copy a sibling's details loaded within this many seconds (None = always load)
+        self.reusable_details = {}  # properties.id -> sibling detail values, filled per backlog batch
+        self.checkpoint_max_age_seconds = checkpoint_max_age_seconds  # Resume interrupted scrapes from RunCheckpoint (None = no checkpoints)
+        self.checkpoint_key = None  # (kind, mode, unit_type, shard) of the running scrape's checkpoint
+        self.checkpoint_processed = 0  # Pages / rows saved since the checkpointed scrape started
+        self.page_step = 1
+        self.max_pages = None
+        self.price_band = price_band  # (min_price, max_price) listings filter of a price shard, either end may be None
+        self.district = district  # District code filter of a district shard, e.g. "D09"
         self.cur_page_listings = []
-        self.csv_listings = []
         self.cur_details = {}
-        self.csv_details = []
 
-    def scrape_listings(self, desired_pages=2):
-        cur_page = 1
+    def scrape_listings(self, desired_pages=2, start_page=1, page_step=1):
+        # With page_step > 1 this scrapes one stride of the pages (start_page, start_page + page_step, ...)
+        cur_page = start_page
         max_pages = 99  # Temporary default value for maximum pages
+        failed_pages = 0  # Consecutive pages skipped because of a challenge or an error
 
         # Filters
         lines = [
@@ -33,6 +78,27 @@ class ScraperUtils:
             f"= Last Posted: {self.last_posted} Days Ago" if self.last_posted is not None else "= Last Posted: None",
             f"= Desired Pages: {desired_pages if desired_pages is not None else 'All'}"
         ]
+        if page_step > 1:
+            lines.append(f"= Page Shard: Start {start_page} | Step {page_step}")
+        if self.price_band is not None or self.district is not None:
+            lines.append(f"= Search Shard: {self.search_label()}")
+        if self.stop_after_known_pages is not None:
+            self.high_water_mark = CrawlState.high_water_mark(self.mode, ListingsInfo.unit_type_label(self.unit_type))
+            self.newest_listing = None
+            self.known_pages = 0
+            lines.append(f"= Incremental: Stop After {self.stop_after_known_pages} Known Pages")
+        self.page_step = page_step
+        self.max_pages = None
+        shard = f"{start_page}/{page_step}"
+        if self.price_band is not None or self.district is not None:
+            shard += f" {self.search_label()}"
+        checkpoint = self.load_checkpoint("listings", shard)
+        if checkpoint is not None and checkpoint["last_posted"] == self.last_posted and checkpoint["cur_page"] is not None and (
+            desired_pages is None or checkpoint["cur_page"] <= desired_pages
+        ):
+            cur_page = checkpoint["cur_page"]
+            max_pages = checkpoint["max_pages"] or max_pages
+            lines.append(f"= Resuming From Checkpoint: Page {cur_page} ({checkpoint['processed']} Pages Saved)")
         max_len = max(len(line) for line in lines)
         header = "┌" + "─" * (max_len + 2) + "┐"
         footer = "└" + "─" * (max_len + 2) + "┘"
@@ -42,140 +108,161 @@ class ScraperUtils:
         print(footer)
         print("")
 
-        # Run the scraper with a context manager
-        with SB(uc=True, xvfb=True, locale="en", uc_cdp_events=True) as sb:
+        # Borrow the long-lived browser (or a private one that is closed afterwards)
+        browser, owns_browser = self.borrow_browser()
+        # Pages are parsed and saved behind the browser while it loads the next one
+        pipeline = Pipeline(
+            self.parse_listings_page, self.persist_listings,
+            parsers=self.pipeline_parsers, queue_size=self.pipeline_queue_size, name="listings"
+        ).start()
+        completed = False  # Only a scrape that reached its end clears the checkpoint
+        try:
             while True:
-                try:
-                    # Page
-                    page_line = f"Page {cur_page}"
-                    page_header = "┌" + "─" * (len(page_line) + 2) + "┐"
-                    page_footer = "└" + "─" * (len(page_line) + 2) + "┘"
-                    print(page_header)
-                    print(f"| {page_line} |")
-                    print(page_footer)
+                # Incremental crawl: pages are saved behind the browser, so this may trail by up to queue_size pages
+                if self.stop_after_known_pages is not None and self.known_pages >= self.stop_after_known_pages:
+                    print(f"> Reached {self.known_pages} Known Pages, Stopping Incremental Crawl")
+                    print("")
+                    completed = True
+                    break
+                with browser.page() as sb:
+                    try:
+                        # Page
+                        page_line = f"Page {cur_page}"
+                        page_header = "┌" + "─" * (len(page_line) + 2) + "┐"
+                        page_footer = "└" + "─" * (len(page_line) + 2) + "┘"
+                        print(page_header)
+                        print(f"| {page_line} |")
+                        print(page_footer)
                     
-                    # Construct the URL based on the filters
-                    if self.mode == "Rent":
-                        if self.last_posted is None:
-                            url = f"https://www.propertyguru.com.sg/property-for-rent/{cur_page}?listingType=rent&cur_page={cur_page}&isCommercial=false&sort=date&order=desc&bedrooms={self.unit_type}&isNewProject=false"
-                        else:
-                            url = f"https://www.propertyguru.com.sg/property-for-rent/{cur_page}?listingType=rent&cur_page={cur_page}&isCommercial=false&sort=date&order=desc&bedrooms={self.unit_type}&lastPosted={self.last_posted}&isNewProject=false"
-                    elif self.mode == "Buy":
-                        if self.last_posted is None:
-                            url = f"https://www.propertyguru.com.sg/property-for-sale/{cur_page}?listingType=sale&page={cur_page}&isCommercial=false&bedrooms={self.unit_type}&sort=date&order=desc&isNewProject=false"
-                        else:
-                            url = f"https://www.propertyguru.com.sg/property-for-sale/{cur_page}?listingType=sale&page={cur_page}&isCommercial=false&lastPosted={self.last_posted}&bedrooms={self.unit_type}&sort=date&order=desc&isNewProject=false"
-                    print(f"> URL: {url}")
+                        # Construct the URL based on the filters
+                        url = self.listings_url(cur_page)
+                        print(f"> URL: {url}")
                     
-                    # Solve captcha
-                    sb.uc_open_with_reconnect(url, None)
-                    sb.uc_gui_click_captcha()
-                    sb.sleep(2)
-
-
-                    # If mode = "Buy", and current URL contains "&isNewProject=true", then open the URL again to bypass the captcha
-                    if self.mode == "Buy" and "&isNewProject=true" in sb.get_current_url():
-                        max_retries = 3
-                        # Print current URL for debugging
-                        print(f"> Current URL: {sb.get_current_url()}")
-                        for attempt in range(1, max_retries + 1):
-                            sb.uc_open_with_reconnect(url, None)
-                            sb.uc_gui_click_captcha()
-                            sb.sleep(2)
-                            print(f"> After Attempt {attempt}: {sb.get_current_url()}")
-                            if "&isNewProject=true" not in sb.get_current_url():
-                                break
+                        # Load the page, solving a challenge only when one is shown
+                        # A redirect to "&isNewProject=true" (seen in "Buy" mode) counts as a failed load and is retried
+                        sb, state = self.open_page(browser, sb, url, capture_state=self.listings_engine == "state", redirect_marker="&isNewProject=true")
+                        if state != ChallengeDetector.CLEAN:
+                            # Skip this page instead of abandoning the whole run
+                            failed_pages += 1
+                            if self.skip_failed_page(failed_pages, cur_page, page_step, max_pages, desired_pages):
+                                cur_page += page_step
+                                print("")
+                                continue
+                            break
+
+                        # # Save the HTML content to a file for debugging (optional)
+                        # with open(f"data/Page_{cur_page}.html", "w", encoding="utf-8") as f:
+                        #     f.write(sb.get_page_source())
+
+                        # Total Properties #
+                        self.read_total_properties(sb)
+
+                        # Total Listings For Current Page #
+                        # Find the listing cards on the page (captured as outerHTML unless parsing live WebElements)
+                        if self.listings_engine in ("html", "state"):
+                            snapshot = sb.execute_script(self.LISTINGS_SNAPSHOT_SCRIPT)
+                            cards = snapshot["cards"]
                         else:
-                            print(f"❌ '&isNewProject=true' Still Exists After {max_retries} Attempts. URL: {sb.get_current_url()}")
-
-                    # # Save the HTML content to a file for debugging (optional)
-                    # with open(f"data/Page_{cur_page}.html", "w", encoding="utf-8") as f:
-                    #     f.write(sb.get_page_source())
-
-                    # Total Properties #
-                    # Show the total properties found
-                    total_properties = sb.find_element(By.XPATH, './/h1[@class="page-title"]').text
-                    # Extract the number at the start (with commas)
-                    match = re.match(r"([\d,]+)", total_properties)
-                    if match:
-                        num_properties = int(match.group(1).replace(",", ""))
-                        print(f"> Total Properties: {num_properties}")
-                    else:
-                        print(f"> Total Properties not Found in Text: '{total_properties}'")
+                            cards = sb.find_elements('//*[@class="listing-card-banner-root"]')
+                        if not cards:
+                            print(f"> Listings (Current Page): 0")
+                            print("")
+                            completed = True
+                            break
+                        else:
+                            print(f"> Listings (Current Page): {len(cards)}")
+                            print("")
 
-                    # Total Listings For Current Page #
-                    # Find the listing cards on the page
-                    cards = sb.find_elements('//*[@class="listing-card-banner-root"]')
-                    if not cards:
-                        print(f"> Listings (Current Page): 0")
-                        print("")
-                        break
-                    else:
-                        print(f"> Listings (Current Page): {len(cards)}")
+                        # Listings Info #
+                        # Live WebElements are parsed here; captured pages go to the parser threads
+                        if self.listings_engine == "html":
+                            pipeline.submit({"page": cur_page, "cards_html": cards})
+                        elif self.listings_engine == "state":
+                            pipeline.submit({"page": cur_page, "cards_html": cards, "payloads": self.page_state.collect(sb)})
+                        else:
+                            pipeline.submit({"page": cur_page, "listings": ListingsInfo(cards, self.mode, self.unit_type).cur_page_listings})
+                        self.rate_limiter.success()
                         print("")
 
-                    # Listings Info #
-                    # Extract the listing information from the cards
-                    listings_info = ListingsInfo(cards, self.mode, self.unit_type)
-                    self.cur_page_listings = listings_info.cur_page_listings
-                    self.csv_listings.append(self.cur_page_listings)
-
-                    # Database #
-                    # Save the listings to the database
-                    self.save_to_db_listings(self.session)
-                    print("")
+                        # Pagination #
+                        # Dynamically determine the maximum number of pages
+                        if self.listings_engine in ("html", "state"):
+                            page_items = snapshot["pages"]
+                        else:
+                            page_items = [item.text.strip() for item in sb.find_elements('//li[@class="page-item" or @class="page-item active"]')]
+                        max_pages = cur_page  # Default fallback
 
-                    # Pagination #
-                    # Dynamically determine the maximum number of pages
-                    page_items = sb.find_elements('//li[@class="page-item" or @class="page-item active"]')
-                    max_pages = cur_page  # Default fallback
-
-                    # Try to find the last numeric page number (skip "Next", "»", etc.)
-                    if page_items:
-                        last_page_number = None
-                        for item in reversed(page_items):
-                            text = item.text.strip()
-                            if text.isdigit():
-                                last_page_number = text
-                                break
-                        if last_page_number is not None:
-                            max_pages = int(last_page_number)
-                            print(f"= Maximum Pages: {max_pages}")
+                        # Try to find the last numeric page number (skip "Next", "»", etc.)
+                        if page_items:
+                            last_page_number = None
+                            for text in reversed(page_items):
+                                if text.isdigit():
+                                    last_page_number = text
+                                    break
+                            if last_page_number is not None:
+                                max_pages = int(last_page_number)
+                                print(f"= Maximum Pages: {max_pages}")
+                            else:
+                                print("= Maximum Pages: Not Found (no numeric page item)")
                         else:
-                            print("= Maximum Pages: Not Found (no numeric page item)")
-                    else:
-                        print("= Maximum Pages: Not Found (no page items)")
-                    # Also print the desired pages if provided
-                    if desired_pages is not None:
-                        print(f"= Desired Pages: {desired_pages}")
-
-                    # Check if reached the maximum page limit
-                    if cur_page >= max_pages:
-                        print(f"> Reached Maximum Page Limit: {max_pages}")
+                            print("= Maximum Pages: Not Found (no page items)")
+                        self.max_pages = max_pages
+                        # Also print the desired pages if provided
+                        if desired_pages is not None:
+                            print(f"= Desired Pages: {desired_pages}")
+
+                        # Check if reached the maximum page limit
+                        if cur_page + page_step > max_pages:
+                            print(f"> Reached Maximum Page Limit: {max_pages}")
+                            print("")
+                            completed = True
+                            break
+                        # Check if reached the desired page limit
+                        if desired_pages is not None and cur_page + page_step > desired_pages:
+                            print(f"> Reached Desired Page Limit: {desired_pages}")
+                            print("")
+                            completed = True
+                            break
+
+                        # Increment the page number
+                        failed_pages = 0
+                        cur_page += page_step
                         print("")
-                        break
-                    # Check if reached the desired page limit
-                    if desired_pages is not None and cur_page >= desired_pages:
-                        print(f"> Reached Desired Page Limit: {desired_pages}")
+                    except Exception as e:
+                        print(f"❌ Error on Page {cur_page}: {e}")
+                        browser.mark_error()
+                        self.rate_limiter.backoff("Error")
+                        try:
+                            # Take a screenshot for debugging
+                            sb.save_screenshot(f"logs/Listings_Error_Page_{cur_page}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png")
+                            # Save the page source for debugging
+                            with open(f"logs/Error_Page_{cur_page}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html", "w", encoding="utf-8") as f:
+                                f.write(sb.get_page_source())
+                        except Exception as debug_error:
+                            print(f"> Debug Capture Failed: {debug_error}")
+                        # Skip this page instead of abandoning the whole run
+                        failed_pages += 1
+                        if not self.skip_failed_page(failed_pages, cur_page, page_step, max_pages, desired_pages):
+                            break
+                        cur_page += page_step
                         print("")
-                        break
-
-                    # Increment the page number
-                    cur_page += 1
-                    time.sleep(random.uniform(2, 5))
-                    print("")
-                except Exception as e:
-                    print(f"❌ Error on Page {cur_page}: {e}")
-                    # Take a screenshot for debugging
-                    sb.save_screenshot(f"logs/Listings_Error_Page_{cur_page}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png")
-                    # Save the page source for debugging
-                    with open(f"logs/Error_Page_{cur_page}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html", "w", encoding="utf-8") as f:
-                        f.write(sb.get_page_source())
-                    break
+        finally:
+            # Parse and save every page that was already fetched
+            pipeline.close()
+            pipeline.report()
+            if self.listings_sink is not None:
+                self.listings_sink.flush()
+            if self.stop_after_known_pages is not None and self.newest_listing is not None:
+                self.save_high_water_mark(pipeline.submitted)
+            # Otherwise the checkpoint stays, and the next run retries from the first page not saved
+            if completed:
+                self.clear_checkpoint()
+            if owns_browser:
+                browser.close()
 
-    def scrape_details(self, max_scrape=5):
+    def scrape_details(self, max_scrape=5, shard_index=0, shard_count=1):
         # Database Query #
-        properties_pending = self.session.query(Properties).filter_by(
+        query = self.session.query(Properties).filter_by(
             details_fetched=False,
             property_selling_type=self.mode,
             unit_type="Room" if self.unit_type == -1 else (
@@ -184,20 +271,42 @@ class ScraperUtils:
                     f"{self.unit_type} Bedroom"
                 )
             ),
-        ).all()
-        if max_scrape is None:
-            properties = properties_pending  # Scrape all
+        )
+        # With shard_count > 1 only the rows where id % shard_count == shard_index are taken
+        if shard_count > 1:
+            query = query.filter(Properties.id % shard_count == shard_index)
+        # Only a COUNT up front; the rows themselves are fetched lazily, without the bulky TEXT columns
+        pending_count = query.with_entities(func.count(Properties.id)).scalar()
+        to_scrape = pending_count if max_scrape is None else min(pending_count, max_scrape)
+        if self.details_queue is not None:
+            # Rows are leased batch by batch, so any number of workers can drain the same backlog
+            properties = self.iter_leased_properties(max_scrape)
+            self.checkpoint_key = None
+            checkpoint = None
         else:
-            properties = properties_pending[:max_scrape]  # Scrape up to max_scrape
+            # Leases already hand a killed worker's rows back; without them, resume after the last row processed
+            checkpoint = self.load_checkpoint("details", f"{shard_index}/{shard_count}")
+            after_id = checkpoint["last_property_row_id"] if checkpoint is not None else None
+            properties = self.iter_pending_properties(query, max_scrape, after_id=after_id or 0)
+        # Advanced by the buffer in the same transaction as each flush, so it never runs ahead of the rows written
+        self.details_buffer.track_checkpoint(self.checkpoint_key, after_id if checkpoint is not None else None, self.checkpoint_processed)
 
         # Lines #
         lines = [
             "= Scraping Details",
             f"= Scraping Mode: {self.mode}",
             f"= Unit Type: {'Room' if self.unit_type == -1 else 'Studio' if self.unit_type == 0 else f'{self.unit_type} Bedroom' if self.unit_type!= 5 else f'{self.unit_type}+ Bedroom'}",
-            f"= Properties Pending: {len(properties_pending)}",
-            f"= Properties to Scrape: {len(properties)}",
+            f"= Properties Pending: {pending_count}",
+            f"= Properties to Scrape: {to_scrape}",
         ]
+        if shard_count > 1:
+            lines.append(f"= Shard: {shard_index + 1}/{shard_count}")
+        if self.details_queue is not None:
+            lines.append(f"= Lease Worker: {self.details_queue.worker_id}")
+        if self.details_reuse_seconds is not None:
+            lines.append(f"= Reuse Sibling Details: {self.details_reuse_seconds / 3600:g}h")
+        if checkpoint is not None and checkpoint["last_property_row_id"] is not None:
+            lines.append(f"= Resuming From Checkpoint: After Row {checkpoint['last_property_row_id']} ({checkpoint['processed']} Rows Saved)")
         max_len = max(len(line) for line in lines)
         header = "┌" + "─" * (max_len + 2) + "┐"
         footer = "└" + "─" * (max_len + 2) + "┘"
@@ -206,95 +315,355 @@ class ScraperUtils:
             print(f"| {line.ljust(max_len)} |")
         print(footer)
         print("")
-        if not properties:
+        if not to_scrape:
+            self.details_buffer.track_checkpoint(None)
+            self.clear_checkpoint()
             return
         
-        # Run the scraper with a context manager
-        with SB(uc=True, xvfb=True, locale="en", uc_cdp_events=True) as sb:
+        # Borrow the long-lived browser (or a private one that is closed afterwards)
+        browser, owns_browser = self.borrow_browser()
+        # Snapshots are parsed and buffered behind the browser; the writer also runs the buffer's time-based flush
+        pipeline = Pipeline(
+            self.parse_details_page, self.persist_details,
+            parsers=self.pipeline_parsers, queue_size=self.pipeline_queue_size,
+            on_idle=self.details_buffer.flush_if_due, name="details"
+        ).start()
+        completed = False
+        try:
             for idx, prop in enumerate(properties, 1):
-                try:
-                    print(f"= [{idx}/{len(properties)}] ID: {prop.property_id} | Title: {prop.title} | URL: {prop.property_url}")
-                    sb.uc_open_with_reconnect(prop.property_url, None)
-                    sb.uc_gui_click_captcha()
-
-                    # # Save the HTML content to a file for debugging (optional)
-                    # with open(f"data/Details_{idx}.html", "w", encoding="utf-8") as f:
-                    #     f.write(sb.get_page_source())
-
-                    # Checking if we are in the details page instead of the listings page #
-                    if not (
-                        sb.find_elements('.//div[@class="property-snapshot-section"]') or
-                        sb.find_elements('.//div[@da-id="developer-property-overview-root"]')
-                    ):
-                        print("= Details Page Not Found\n")
-                        Properties.update_field_value(
-                            property_id=prop.property_id, 
-                            field_name="details_fetched",
-                            new_value=True
-                        )
+                # Same listing under another unit_type with fresh details: copy them instead of loading the page
+                values = self.sibling_details(prop)
+                if values is not None:
+                    print(f"= [{idx}/{to_scrape}] ID: {prop.property_id} | Title: {prop.title} | Details Reused From Sibling\n")
+                    pipeline.submit({"row": self.details_row(prop), "details": values, "columns": list(values), "reused": True})
+                    continue
+                with browser.page() as sb:
+                    try:
+                        print(f"= [{idx}/{to_scrape}] ID: {prop.property_id} | Title: {prop.title} | URL: {prop.property_url}")
+                        sb, state = self.open_page(browser, sb, prop.property_url, capture_state=self.details_engine == "state")
+                        if state != ChallengeDetector.CLEAN:
+                            # Left unfetched so a later run picks it up again
+                            print(f"= Details Page Skipped ({state.title()})\n")
+                            self.details_buffer.mark_skipped(prop.id)
+                            continue
+
+                        # # Save the HTML content to a file for debugging (optional)
+                        # with open(f"data/Details_{idx}.html", "w", encoding="utf-8") as f:
+                        #     f.write(sb.get_page_source())
+
+                        # Checking if we are in the details page instead of the listings page #
+                        if not (
+                            sb.find_elements('.//div[@class="property-snapshot-section"]') or
+                            sb.find_elements('.//div[@da-id="developer-property-overview-root"]')
+                        ):
+                            print("= Details Page Not Found\n")
+                            pipeline.submit({"not_found": prop.id})
+                            continue
+
+                        row = self.details_row(prop)
+
+                        # Details Info #
+                        # The snapshot is captured here and parsed by the parser threads; the other engines read the live page
+                        if self.details_engine == "snapshot":
+                            pipeline.submit({"row": row, "snapshot": SnapshotDetailsInfo.capture(sb)})
+                        else:
+                            if self.details_engine == "state":
+                                details_info = DetailsStateInfo(sb, self.page_state.collect(sb), property_id=prop.property_id)
+                                if not details_info.found:
+                                    print("> Page State Not Usable, Falling Back to DOM")
+                                    details_info = DetailsInfo(sb)
+                            else:
+                                details_info = DetailsInfo(sb)
+                            pipeline.submit({"row": row, "details": details_info.details, "columns": details_info.columns})
+                        self.rate_limiter.success()
+                        print("")
+
+                    except Exception as e:
+                        print(f"❌ Error Scraping Details: {e}")
+                        browser.mark_error()
+                        self.rate_limiter.backoff("Error")
+                        self.details_buffer.mark_skipped(prop.id)
+                        print("")
                         continue
+            completed = True
+        finally:
+            # Also runs on errors and on SystemExit from the SIGTERM handler, so fetched rows are never lost
+            pipeline.close()
+            pipeline.report()
+            self.details_buffer.flush()
+            self.details_buffer.track_checkpoint(None)
+            if self.details_sink is not None:
+                self.details_sink.flush()
+            if completed:
+                self.clear_checkpoint()
+            if owns_browser:
+                browser.close()
 
-                    # Details Info #
-                    # Scrape the details from the page
-                    details_info = DetailsInfo(sb)
-                    DETAIL_COLUMNS = details_info.DETAIL_COLUMNS
-                    
-                    # 1. Initialize cur_details with all columns from prop
-                    self.cur_details = {col: getattr(prop, col) for col in prop.__table__.columns.keys()}
-                    self.csv_details.append(self.cur_details)
-                    
-                    # 2. Update only the detail columns with freshly scraped values
-                    for col in DETAIL_COLUMNS:
-                        if col in details_info.details:
-                            self.cur_details[col] = details_info.details[col]
+    def parse_listings_page(self, page):
+        # Parser stage: captured listings page -> {"page": page number, "listings": listing dicts}
+        return {"page": page.get("page"), "listings": self.extract_page_listings(page)}
 
-                    # Database #
-                    self.save_to_db_details(DETAIL_COLUMNS)
-                    print("")
+    def extract_page_listings(self, page):
+        if "listings" in page:
+            return page["listings"]
+        if "payloads" in page:
+            card_ids = ListingsStateInfo.card_ids(page["cards_html"])
+            listings = ListingsStateInfo(page["payloads"], self.mode, self.unit_type, card_ids).cur_page_listings
+            if listings:
+                return listings
+            print("> Page State Not Usable, Falling Back to HTML")
+        return ListingsHtmlInfo(page["cards_html"], self.mode, self.unit_type).cur_page_listings
 
-                except Exception as e:
-                    print(f"❌ Error Scraping Details: {e}")
-                    print("")
-                    continue
+    def persist_listings(self, parsed):
+        # Writer stage
+        listings = parsed["listings"]
+        self.cur_page_listings = listings
+        if self.listings_sink is not None:
+            self.listings_sink.write_rows(listings)
+        results = self.save_to_db_listings(self.session)
+        if self.stop_after_known_pages is not None:
+            self.track_known_page(listings, results)
+        if results is not None and parsed["page"] is not None:
+            # The page is in the database, so a restart continues with the next one
+            self.checkpoint_processed += 1
+            self.save_checkpoint(
+                last_posted=self.last_posted, cur_page=parsed["page"] + self.page_step, max_pages=self.max_pages,
+                last_property_id=listings[-1].get("property_id") if listings else None,
+            )
 
-    def save_to_db_listings(self, session):
+    def track_known_page(self, listings, results):
+        # A page is known when every listing was unchanged and none is newer than the previous crawls' high-water mark
+        if not listings:
+            return
+        latest = max(listings, key=lambda listing: CrawlState.listing_key(listing.get("listed_date"), listing.get("property_id")))
+        newest = (CrawlState.listing_key(latest.get("listed_date"), latest.get("property_id")), latest.get("listed_date"), latest.get("property_id"))
+        if self.newest_listing is None or newest[0] > self.newest_listing[0]:
+            self.newest_listing = newest
+        known = (
+            results is not None and all(result == "ignore" for result in results)
+            and self.high_water_mark is not None and newest[0] <= self.high_water_mark
+        )
+        self.known_pages = self.known_pages + 1 if known else 0
+        if known:
+            print(f"> Known Page ({self.known_pages}/{self.stop_after_known_pages})")
+
+    def save_high_water_mark(self, pages_crawled):
+        _, listed_date, property_id = self.newest_listing
         try:
-            Properties.batch_upsert_listings(session, self.cur_page_listings)
+            CrawlState.advance(self.mode, ListingsInfo.unit_type_label(self.unit_type), listed_date, property_id, pages_crawled)
         except Exception as e:
-            print(f"❌ Error Saving to DB: {e}")
+            print(f"❌ Error Saving Crawl State: {e}")
 
-    def save_listings_to_csv(self, path):
-        # Flatten the list of lists into a single list of dicts
-        all_rows = [item for sublist in self.csv_listings for item in sublist]
-        if not all_rows:
+    def details_row(self, prop):
+        # Backlog columns of prop plus every detail column, so each CSV row has the same header; only scraped columns are written to the database
+        return {
+            **{col: getattr(prop, col) for col in self.BACKLOG_COLUMNS},
+            **{col: None for col in DetailsInfo.DETAIL_COLUMNS},
+        }
+
+    def find_reusable_details(self, batch):
+        # One query per backlog batch for siblings (same property_id and property_url) with fresh details
+        if self.details_reuse_seconds is None:
             return
-        fieldnames = list(all_rows[0].keys())
-        file_exists = os.path.isfile(path)
-        with open(path, 'a', newline='', encoding='utf-8') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            if not file_exists or os.stat(path).st_size == 0:
-                writer.writeheader()
-            for row in all_rows:
-                writer.writerow(row)
-
-    def save_to_db_details(self, DETAIL_COLUMNS):
-        try:
-            Properties.update_details(self.cur_details, DETAIL_COLUMNS)
+        try:
+            found = Properties.fresh_sibling_details(
+                [(prop.property_id, prop.property_url) for prop in batch], DetailsInfo.DETAIL_COLUMNS, self.details_reuse_seconds
+            )
         except Exception as e:
-            print(f"❌ Error Saving to DB: {e}")
+            print(f"❌ Error Finding Sibling Details: {e}")
+            return
+        for prop in batch:
+            values = found.get((prop.property_id, prop.property_url))
+            if values is not None:
+                self.reusable_details[prop.id] = values
+
+    def sibling_details(self, prop):
+        if self.details_reuse_seconds is None:
+            return None
+        values = self.reusable_details.pop(prop.id, None)
+        if values is None:
+            # A sibling scraped earlier in this run, possibly not flushed yet
+            values = self.details_buffer.recent_details(prop.property_id, prop.property_url, self.details_reuse_seconds)
+        return values
+
+    def parse_details_page(self, page):
+        # Parser stage: captured details snapshot -> details dict
+        if "snapshot" in page:
+            page = {"row": page["row"], "details": SnapshotDetailsInfo(None, snapshot=page["snapshot"]).details}
+        return page
 
-    def save_details_to_csv(self, path):
-        if not self.csv_details:
+    def persist_details(self, page):
+        # Writer stage
+        if "not_found" in page:
+            self.details_buffer.mark_not_found(page["not_found"])
             return
-        else:
-            fieldnames = list(self.csv_details[0].keys())
-            file_exists = os.path.isfile(path)
-        with open(path, 'a', newline='', encoding='utf-8') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            if not file_exists or os.stat(path).st_size == 0:
-                writer.writeheader()
-            for row in self.csv_details:
-                writer.writerow(row)
+        # Only the columns this page produced are written (the state engine may cover some, a failed
+        # extraction none); the others, text columns included, keep their stored values
+        DETAIL_COLUMNS = [col for col in page.get("columns") or DetailsInfo.DETAIL_COLUMNS if col in page["details"]]
+        self.cur_details = page["row"]
+
+        # Update only the detail columns with freshly scraped values
+        for col in DETAIL_COLUMNS:
+            self.cur_details[col] = page["details"][col]
+        if self.details_sink is not None:
+            self.details_sink.write_row(self.cur_details)
+
+        # Database #
+        self.save_to_db_details(DETAIL_COLUMNS, reused=page.get("reused", False))
+
+    def load_checkpoint(self, kind, shard):
+        # Sets the checkpoint key of this scrape and returns the saved checkpoint to resume from, if any
+        self.checkpoint_key = None
+        self.checkpoint_processed = 0
+        if self.checkpoint_max_age_seconds is None:
+            return None
+        self.checkpoint_key = (kind, self.mode, ListingsInfo.unit_type_label(self.unit_type), shard)
+        try:
+            checkpoint = RunCheckpoint.load(*self.checkpoint_key, self.checkpoint_max_age_seconds)
+        except Exception as e:
+            print(f"❌ Error Loading Checkpoint: {e}")
+            return None
+        if checkpoint is not None:
+            self.checkpoint_processed = checkpoint["processed"]
+        return checkpoint
+
+    def save_checkpoint(self, **values):
+        if self.checkpoint_key is None:
+            return
+        try:
+            RunCheckpoint.save(*self.checkpoint_key, processed=self.checkpoint_processed, **values)
+        except Exception as e:
+            print(f"❌ Error Saving Checkpoint: {e}")
+
+    def clear_checkpoint(self):
+        if self.checkpoint_key is None:
+            return
+        try:
+            RunCheckpoint.clear(*self.checkpoint_key)
+        except Exception as e:
+            print(f"❌ Error Clearing Checkpoint: {e}")
+
+    def backlog_query(self, query):
+        # Plain column tuples instead of Properties entities: no identity map, and nothing else is loaded
+        return query.with_entities(*[getattr(Properties, col) for col in self.BACKLOG_COLUMNS])
+
+    def iter_pending_properties(self, query, max_scrape, after_id=0):
+        # Keyset pagination on id with a LIMIT per page: memory stays bounded and no cursor is held open
+        # while pages load (a long-lived streaming cursor would hit MySQL's net_write_timeout)
+        query = self.backlog_query(query).order_by(Properties.id)
+        last_id = after_id
+        remaining = max_scrape
+        while remaining is None or remaining > 0:
+            size = self.BACKLOG_PAGE_SIZE if remaining is None else min(self.BACKLOG_PAGE_SIZE, remaining)
+            batch = query.filter(Properties.id > last_id).limit(size).all()
+            # End the read transaction, so the next batch sees what other workers committed meanwhile
+            self.session.commit()
+            if not batch:
+                return
+            self.find_reusable_details(batch)
+            for prop in batch:
+                yield prop
+            last_id = batch[-1].id
+            if remaining is not None:
+                remaining -= len(batch)
+
+    def iter_leased_properties(self, max_scrape):
+        # Claim a small batch, yield it, and come back for more until the backlog (or max_scrape) runs out
+        unit_type = ListingsInfo.unit_type_label(self.unit_type)
+        remaining = max_scrape
+        while remaining is None or remaining > 0:
+            ids = self.details_queue.claim(self.mode, unit_type, remaining)
+            if not ids:
+                return
+            batch = self.backlog_query(self.session.query(Properties)).filter(Properties.id.in_(ids)).order_by(Properties.id).all()
+            self.find_reusable_details(batch)
+            for prop in batch:
+                yield prop
+                if remaining is not None:
+                    remaining -= 1
+
+    def open_page(self, browser, sb, url, capture_state=False, redirect_marker=None):
+        # Returns (sb, state); sb is a new driver if the browser was rotated while retrying
+        def before_open(sb):
+            if capture_state:
+                self.page_state.attach(sb)
+                self.page_state.reset()
+        return self.challenges.open(browser, sb, url, self.rate_limiter, redirect_marker=redirect_marker, before_open=before_open)
+
+    def listings_url(self, cur_page):
+        if self.mode == "Rent":
+            if self.last_posted is None:
+                url = f"https://www.propertyguru.com.sg/property-for-rent/{cur_page}?listingType=rent&cur_page={cur_page}&isCommercial=false&sort=date&order=desc&bedrooms={self.unit_type}&isNewProject=false"
+            else:
+                url = f"https://www.propertyguru.com.sg/property-for-rent/{cur_page}?listingType=rent&cur_page={cur_page}&isCommercial=false&sort=date&order=desc&bedrooms={self.unit_type}&lastPosted={self.last_posted}&isNewProject=false"
+        elif self.mode == "Buy":
+            if self.last_posted is None:
+                url = f"https://www.propertyguru.com.sg/property-for-sale/{cur_page}?listingType=sale&page={cur_page}&isCommercial=false&bedrooms={self.unit_type}&sort=date&order=desc&isNewProject=false"
+            else:
+                url = f"https://www.propertyguru.com.sg/property-for-sale/{cur_page}?listingType=sale&page={cur_page}&isCommercial=false&lastPosted={self.last_posted}&bedrooms={self.unit_type}&sort=date&order=desc&isNewProject=false"
+        # Search shard filters (both price bounds are inclusive on the site)
+        if self.price_band is not None:
+            min_price, max_price = self.price_band
+            if min_price is not None:
+                url += f"&minPrice={min_price}"
+            if max_price is not None:
+                url += f"&maxPrice={max_price}"
+        if self.district is not None:
+            url += f"&districtCode={self.district}"
+        return url
+
+    def search_label(self):
+        # e.g. "2000-2999 D09" or "5000+"
+        parts = []
+        if self.price_band is not None:
+            min_price, max_price = self.price_band
+            parts.append(f"{min_price or 0}-{max_price}" if max_price is not None else f"{min_price or 0}+")
+        if self.district is not None:
+            parts.append(self.district)
+        return " ".join(parts) or "All"
+
+    @staticmethod
+    def read_total_properties(sb):
+        # Number at the start of the page title (e.g. "1,234 Properties for Rent"), or None
+        total_properties = sb.find_element(By.XPATH, './/h1[@class="page-title"]').text
+        # Extract the number at the start (with commas)
+        match = re.match(r"([\d,]+)", total_properties)
+        if match:
+            num_properties = int(match.group(1).replace(",", ""))
+            print(f"> Total Properties: {num_properties}")
+            return num_properties
+        print(f"> Total Properties not Found in Text: '{total_properties}'")
+        return None
+
+    def skip_failed_page(self, failed_pages, cur_page, page_step, max_pages, desired_pages):
+        # True if the run should move on to the next page after a failed one
+        if failed_pages >= self.MAX_FAILED_PAGES:
+            print(f"❌ {failed_pages} Consecutive Pages Failed, Stopping")
+            return False
+        if cur_page + page_step > max_pages or (desired_pages is not None and cur_page + page_step > desired_pages):
+            return False
+        print(f"> Skipping Page {cur_page}")
+        return True
+
+    def borrow_browser(self):
+        if self.browser is not None:
+            return self.browser, False
+        return BrowserSessionManager(), True
+
+    def save_to_db_listings(self, session):
+        try:
+            return Properties.batch_upsert_listings(session, self.cur_page_listings)
+        except Exception as e:
+            print(f"❌ Error Saving to DB: {e}")
+            return None
+
+    def save_to_db_details(self, DETAIL_COLUMNS, reused=False):
+        try:
+            # Buffered; written together with other rows every few rows / seconds
+            self.details_buffer.add(self.cur_details, DETAIL_COLUMNS, reused=reused)
+            print("> Database | Queued")
+        except Exception as e:
+            print(f"❌ Error Saving to DB: {e}")
 
 class ListingsInfo:
     def __init__(self, cards, mode, unit_type):
@@ -341,6 +710,7 @@ class ListingsInfo:
                     else:
                         # For other fields, call the respective method
                         listing[field] = getattr(self, method)(card)
+                listing = self.present_fields(card, listing)
 
                 # Print the extracted information for debugging
                 if self.print_output:
@@ -348,26 +718,26 @@ class ListingsInfo:
                     printed = set()
                     for field, method in fields:
                         if field in ["property_id", "property_url"] and "property_id_url" not in printed:
-                            print(f"> Property ID: {listing['property_id']} | URL: {listing['property_url']}")
+                            print(f"> Property ID: {listing.get('property_id')} | URL: {listing.get('property_url')}")
                             printed.add("property_id_url")
                         elif field in ["closest_mrt", "distance_to_closest_mrt"] and "closest_mrt" not in printed:
-                            print(f"> Closest MRT: {listing['closest_mrt']} ({listing['distance_to_closest_mrt']} m)")
+                            print(f"> Closest MRT: {listing.get('closest_mrt')} ({listing.get('distance_to_closest_mrt')} m)")
                             printed.add("closest_mrt")
                         elif field in ["agent_name", "agent_rating"] and "agent" not in printed:
-                            print(f"> Agent: {listing['agent_name']} | Rating: {listing['agent_rating']}")
+                            print(f"> Agent: {listing.get('agent_name')} | Rating: {listing.get('agent_rating')}")
                             printed.add("agent")
                         elif field in ["selling_price", "selling_price_text"] and "selling_price" not in printed:
-                            if listing['selling_price'] is not None:
-                                print(f"> Selling Price: {listing['selling_price']:.2f} ({listing['selling_price_text']})")
+                            if listing.get('selling_price') is not None:
+                                print(f"> Selling Price: {listing['selling_price']:.2f} ({listing.get('selling_price_text')})")
                             else:
-                                print(f"> Selling Price: {listing['selling_price']} ({listing['selling_price_text']})")
+                                print(f"> Selling Price: {listing.get('selling_price')} ({listing.get('selling_price_text')})")
                             printed.add("selling_price")
                         elif field not in [
                             "property_id", "property_url",
                             "closest_mrt", "distance_to_closest_mrt",
                             "agent_name", "agent_rating",
                             "selling_price", "selling_price_text"
-                        ]:
+                        ] and field in listing:
                             display_name = field.replace("_", " ").title()
                             print(f"> {display_name}: {listing[field]}")
                     print("")
@@ -378,6 +748,10 @@ class ListingsInfo:
                 print(f"❌ Error on Listings Cards Info Extraction: {e}")
                 print("")
 
+    def present_fields(self, card, listing):
+        # Columns of the listing to write; every column the card was scraped for
+        return listing
+
     def get_outer_html(self, card):
         try:
             outer_html = card.get_attribute('outerHTML')
@@ -430,48 +804,57 @@ class ListingsInfo:
     def get_project_year(self, card):
         try:
             year_text = card.find_element(By.XPATH, './/span[@da-id="lc-info-badge"]').text
-            # Look for 'Built: xxxx' or 'New Project: xxxx'
-            match = re.search(r'(Built:|New Project:)\s*(\d{4})', year_text)
-            project_year = int(match.group(2).strip()) if match else None
+            project_year = self.parse_project_year(year_text)
         except Exception:
             project_year = None
         finally:
             return project_year
+
+    @staticmethod
+    def parse_project_year(year_text):
+        # Look for 'Built: xxxx' or 'New Project: xxxx'
+        match = re.search(r'(Built:|New Project:)\s*(\d{4})', year_text)
+        return int(match.group(2).strip()) if match else None
         
     def get_closest_mrt(self, card):
         try:
             closest_mrt_text = card.find_element(By.XPATH, './/span[@class="listing-location-value"]').text
-            # Check if the text contains 'from'
-            if 'from' in closest_mrt_text:
-                # Extract the MRT station name after 'from'
-                match = re.search(r'from\s+(.+)', closest_mrt_text)
-                closest_mrt = match.group(1).strip() if match else None
-            else:
-                # Take the whole string if 'from' is not present
-                closest_mrt = closest_mrt_text.strip() if closest_mrt_text else None
+            closest_mrt = self.parse_closest_mrt(closest_mrt_text)
         except Exception:
             closest_mrt = None  # Element not found
         finally:
             return closest_mrt
+
+    @staticmethod
+    def parse_closest_mrt(closest_mrt_text):
+        # Check if the text contains 'from'
+        if 'from' in closest_mrt_text:
+            # Extract the MRT station name after 'from'
+            match = re.search(r'from\s+(.+)', closest_mrt_text)
+            return match.group(1).strip() if match else None
+        # Take the whole string if 'from' is not present
+        return closest_mrt_text.strip() if closest_mrt_text else None
         
     def get_distance_to_closest_mrt(self, card):
         try:
             distance_text = card.find_element(By.XPATH, './/span[@class="listing-location-value"]').text
-            # Look for patterns like '(460 m)', '(1.04 km)', or similar, ensuring it's inside brackets
-            match = re.search(r'\(([\d.]+)\s*(km|m)\)', distance_text)
-            if match:
-                distance_value = float(match.group(1).strip())
-                distance_unit = match.group(2).strip()
-                if distance_unit == 'km':
-                    distance_to_closest_mrt = int(distance_value * 1000)  # Convert km to m and cast to int
-                else:
-                    distance_to_closest_mrt = int(distance_value)  # Cast to int
-            else:
-                distance_to_closest_mrt = None  # No valid distance found
+            distance_to_closest_mrt = self.parse_distance_to_closest_mrt(distance_text)
         except Exception:
             distance_to_closest_mrt = None  # Element not found
         finally:
             return distance_to_closest_mrt
+
+    @staticmethod
+    def parse_distance_to_closest_mrt(distance_text):
+        # Look for patterns like '(460 m)', '(1.04 km)', or similar, ensuring it's inside brackets
+        match = re.search(r'\(([\d.]+)\s*(km|m)\)', distance_text)
+        if not match:
+            return None  # No valid distance found
+        distance_value = float(match.group(1).strip())
+        distance_unit = match.group(2).strip()
+        if distance_unit == 'km':
+            return int(distance_value * 1000)  # Convert km to m and cast to int
+        return int(distance_value)  # Cast to int
         
     def get_is_verified_property(self, card):
         try:
@@ -495,18 +878,21 @@ class ListingsInfo:
     def get_listed_date(self, card):
         try:
             listed_date_text = card.find_element(By.XPATH, './/ul[@class="listing-recency"]//span[@class="info-value"]').text
-            # Extract the date part after "Listed on"
-            match = re.search(r'Listed on\s+(\w+\s\d{1,2},\s\d{4})', listed_date_text)
-            if match:
-                # Parse the extracted date string into a datetime object
-                date_str = match.group(1).strip()
-                listed_date = datetime.strptime(date_str, "%b %d, %Y").date()  # Convert to YYYY-MM-DD format
-            else:
-                listed_date = None
+            listed_date = self.parse_listed_date(listed_date_text)
         except Exception:
             listed_date = None
         finally:
             return listed_date
+
+    @staticmethod
+    def parse_listed_date(listed_date_text):
+        # Extract the date part after "Listed on"
+        match = re.search(r'Listed on\s+(\w+\s\d{1,2},\s\d{4})', listed_date_text)
+        if not match:
+            return None
+        # Parse the extracted date string into a datetime object
+        date_str = match.group(1).strip()
+        return datetime.strptime(date_str, "%b %d, %Y").date()  # Convert to YYYY-MM-DD format
         
     def get_agent_name(self, card):
         try:
@@ -530,31 +916,39 @@ class ListingsInfo:
         return self.mode  # Return the mode (Rent or Buy) as the property selling type
     
     def get_unit_type(self):
-        if self.unit_type == -1:
+        return self.unit_type_label(self.unit_type)
+
+    @staticmethod
+    def unit_type_label(unit_type):
+        if unit_type == -1:
             return "Room"
-        elif self.unit_type == 0:
+        elif unit_type == 0:
             return "Studio"
-        elif self.unit_type == 1:
+        elif unit_type == 1:
             return "1 Bedroom"
-        elif self.unit_type == 2:
+        elif unit_type == 2:
             return "2 Bedroom"
-        elif self.unit_type == 3:
+        elif unit_type == 3:
             return "3 Bedroom"
-        elif self.unit_type == 4:
+        elif unit_type == 4:
             return "4 Bedroom"
-        elif self.unit_type == 5:
+        elif unit_type == 5:
             return "5+ Bedroom"
         
     def get_selling_price(self, card):
         try:
             price = card.find_element(By.XPATH, './/div[@class="listing-price"]').text
-            # Extract the numeric part of the price
-            price_value = re.sub(r"[^\d.]", "", price)
-            selling_price = Decimal(price_value).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP) if price_value else None
+            selling_price = self.parse_selling_price(price)
         except Exception:
             selling_price = None
         finally:
             return selling_price
+
+    @staticmethod
+    def parse_selling_price(price):
+        # Extract the numeric part of the price
+        price_value = re.sub(r"[^\d.]", "", str(price))
+        return Decimal(price_value).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP) if price_value else None
         
     def get_selling_price_text(self, card):
         try:
@@ -563,7 +957,183 @@ class ListingsInfo:
             selling_price_text = None
         finally:
             return selling_price_text
+
+class ListingsHtmlInfo(ListingsInfo):
+    """
+    Same extraction as ListingsInfo, but from the cards' outerHTML captured in one execute_script.
+    Each card is parsed once with lxml and every get_* runs offline against compiled XPaths.
+    """
+
+    def __init__(self, cards_html, mode, unit_type):
+        cards = []
+        for card_html in cards_html:
+            try:
+                cards.append(SnapshotElement.from_html(card_html))
+            except Exception as e:
+                print(f"❌ Error Parsing Listing Card HTML: {e}")
+        super().__init__(cards, mode, unit_type)
         
+class ListingsStateInfo(ListingsInfo):
+    """
+    Same listing dicts as ListingsInfo, mapped from the page-state / XHR JSON captured by
+    PageStateCapture instead of rendered card text. Each "card" is a listing object found in the
+    payload whose id is one of the listing cards rendered on the page (card_ids), in card order.
+    cur_page_listings is left empty when the payload is missing or incomplete, or does not cover
+    exactly the page's cards, which tells the caller to fall back to the DOM path for that page.
+    A column is left out of the page's listings when one of its objects has no key for it, so the
+    stored value is kept instead of being overwritten with None (or False for the flags).
+    """
+    ID_KEYS = ("listingId", "id")
+    URL_KEYS = ("url", "listingUrl", "href")
+    TITLE_KEYS = ("localizedTitle", "title", "name")
+    MRT_KEYS = ("mrt", "nearbyMrt", "nearestMrt")
+    # Payload keys each column is read from
+    FIELD_KEYS = {
+        "property_id": ID_KEYS,
+        "title": TITLE_KEYS,
+        "address": ("fullAddress", "address", "streetAddress", "location"),
+        "property_url": URL_KEYS,
+        "availability": ("availability", "availabilityText", "availableFrom"),
+        "project_year": ("completionYear", "builtYear", "topYear", "yearBuilt"),
+        "closest_mrt": MRT_KEYS,
+        "distance_to_closest_mrt": MRT_KEYS,
+        "is_verified_property": ("isVerified", "verified", "isVerifiedListing"),
+        "is_everyone_welcomed": ("isEveryoneWelcome", "everyoneWelcome", "isEveryoneWelcomed"),
+        "listed_date": ("postedOn", "listedDate", "postedDate", "createdAt"),
+        "agent_name": ("agentName",),
+        "agent_rating": ("agentRating",),
+        "selling_price": ("price",),
+        "selling_price_text": ("priceText", "localizedPrice"),
+    }
+    # Columns read from a nested object when the card has one: (object key, keys inside it)
+    NESTED_FIELD_KEYS = {
+        "agent_name": ("agent", ("name", "displayName")),
+        "agent_rating": ("agent", ("rating", "agentRating")),
+        "selling_price": ("price", ("value", "amount")),
+        "selling_price_text": ("price", ("pretty", "text", "formatted")),
+    }
+    REQUIRED_FIELDS = ("property_id", "title", "property_url", "agent_name")
+    CARD_ID_PATTERN = re.compile(r'data-listing-id="([^"]+)"')
+
+    def __init__(self, payloads, mode, unit_type, card_ids):
+        super().__init__(self.find_listing_objects(payloads, card_ids), mode, unit_type)
+        if len(self.cur_page_listings) != len(card_ids):
+            print(f"> Page State Covers {len(self.cur_page_listings)} of {len(card_ids)} Cards")
+            self.cur_page_listings = []
+        if any(not listing.get(field) for listing in self.cur_page_listings for field in self.REQUIRED_FIELDS):
+            self.cur_page_listings = []
+        # One column set per page, so the page is still one batch upsert shape
+        shared = set.intersection(*[set(listing) for listing in self.cur_page_listings]) if self.cur_page_listings else set()
+        self.cur_page_listings = [{col: value for col, value in listing.items() if col in shared} for listing in self.cur_page_listings]
+
+    @classmethod
+    def card_ids(cls, cards_html):
+        # data-listing-id of each captured card, the same attribute ListingsInfo.get_property_id reads
+        ids = []
+        for card_html in cards_html:
+            match = cls.CARD_ID_PATTERN.search(card_html)
+            ids.append(match.group(1) if match else None)
+        return ids
+
+    def find_listing_objects(self, payloads, card_ids):
+        # Only objects for the cards on this page; anything else with an id, url and title is ignored
+        wanted = {str(card_id) for card_id in card_ids if card_id is not None}
+        listings = {}
+        for payload in payloads:
+            for data in iter_dicts(payload):
+                listing_id = pick(data, self.ID_KEYS)
+                url = pick(data, self.URL_KEYS)
+                if listing_id is None or str(listing_id) not in wanted or not isinstance(url, str) or pick(data, self.TITLE_KEYS) is None:
+                    continue
+                listings.setdefault(str(listing_id), data)
+        return [listings[str(card_id)] for card_id in card_ids if str(card_id) in listings]
+
+    def present_fields(self, card, listing):
+        # A column the payload has no key for keeps its stored value instead of being written as None / False
+        return {col: value for col, value in listing.items() if col not in self.FIELD_KEYS or self.has_field(card, col)}
+
+    def has_field(self, card, col):
+        if col in self.NESTED_FIELD_KEYS and isinstance(card.get(self.NESTED_FIELD_KEYS[col][0]), dict):
+            nested_key, keys = self.NESTED_FIELD_KEYS[col]
+            return any(key in card[nested_key] for key in keys)
+        return any(key in card for key in self.FIELD_KEYS[col])
+
+    def get_property_id(self, card):
+        return str(pick(card, self.ID_KEYS))
+
+    def get_title(self, card):
+        return pick(card, self.TITLE_KEYS)
+
+    def get_address(self, card):
+        return pick(card, self.FIELD_KEYS["address"])
+
+    def get_property_url(self, card):
+        return urljoin(BASE_URL, pick(card, self.URL_KEYS))
+
+    def get_availability(self, card):
+        return pick(card, self.FIELD_KEYS["availability"])
+
+    def get_project_year(self, card):
+        year = pick(card, self.FIELD_KEYS["project_year"])
+        try:
+            return int(year) if year is not None else None
+        except (TypeError, ValueError):
+            return self.parse_project_year(str(year))
+
+    def get_closest_mrt(self, card):
+        mrt_text = pick(card, self.MRT_KEYS)
+        return self.parse_closest_mrt(mrt_text) if isinstance(mrt_text, str) else None
+
+    def get_distance_to_closest_mrt(self, card):
+        mrt_text = pick(card, self.MRT_KEYS)
+        return self.parse_distance_to_closest_mrt(mrt_text) if isinstance(mrt_text, str) else None
+
+    def get_is_verified_property(self, card):
+        return bool(pick(card, self.FIELD_KEYS["is_verified_property"]))
+
+    def get_is_everyone_welcomed(self, card):
+        return bool(pick(card, self.FIELD_KEYS["is_everyone_welcomed"]))
+
+    def get_listed_date(self, card):
+        posted = card.get("postedOn") or card.get("listedDate") or card.get("postedDate") or card.get("createdAt")
+        try:
+            if isinstance(posted, dict):
+                posted = posted.get("unix") or posted.get("text")
+            if isinstance(posted, (int, float)):
+                return datetime.fromtimestamp(posted).date()
+            if isinstance(posted, str):
+                return self.parse_listed_date(posted) or datetime.fromisoformat(posted[:10]).date()
+        except Exception:
+            pass
+        return None
+
+    def get_agent_name(self, card):
+        agent = card.get("agent")
+        return pick(agent, ("name", "displayName")) if isinstance(agent, dict) else pick(card, ("agentName",))
+
+    def get_agent_rating(self, card):
+        agent = card.get("agent")
+        rating = pick(agent, ("rating", "agentRating")) if isinstance(agent, dict) else pick(card, ("agentRating",))
+        try:
+            return float(rating) if rating is not None else None
+        except (TypeError, ValueError):
+            return None
+
+    def get_selling_price(self, card):
+        price = card.get("price")
+        if isinstance(price, dict):
+            price = price.get("value", price.get("amount"))
+        try:
+            return self.parse_selling_price(price) if price is not None else None
+        except Exception:
+            return None
+
+    def get_selling_price_text(self, card):
+        price = card.get("price")
+        if isinstance(price, dict):
+            return pick(price, ("pretty", "text", "formatted"))
+        return pick(card, ("priceText", "localizedPrice"))
+
 class DetailsInfo:
     DETAIL_COLUMNS = [
         "description", 
@@ -681,38 +1251,7 @@ class DetailsInfo:
 
             # Print the extracted information for debugging
             if self.print_output:
-                printed = set()
-                for field in self.DETAIL_COLUMNS:
-                    # Description
-                    if field == "description" and "description" not in printed:
-                        desc_val = details['description']
-                        if desc_val:
-                            desc_val = desc_val.replace('\n', ' ')
-                            if len(desc_val) > 100:
-                                shortened_desc = f"{desc_val[:50]}...{desc_val[-50:]}"
-                                print(f"> Description: {shortened_desc}")
-                            else:
-                                print(f"> Description: {desc_val}")
-                        else:
-                            print("> Description: None")
-                        printed.add("description")
-                    # Property Type, Property Type Text
-                    elif field in ["property_type", "property_type_text"] and "property_type" not in printed:
-                        print(f"> Property Type: {details['property_type']} ({details['property_type_text']})")
-                        printed.add("property_type")
-                    # Lease Term, Lease Term Text
-                    elif field in ["lease_term", "lease_term_text"] and "lease_term" not in printed:
-                        print(f"> Lease Term: {details['lease_term']} ({details['lease_term_text']})")
-                        printed.add("lease_term")
-                    # Elsewhere
-                    elif field not in [
-                        "description",
-                        "property_type", "property_type_text",
-                        "lease_term", "lease_term_text",
-                        # "raw_details_text", "raw_amenities_text", "raw_facilities_text"
-                    ]:
-                        display_name = field.replace("_", " ").title()
-                        print(f"> {display_name}: {details[field]}")
+                self.print_details(details)
 
             # Assign the extracted details to the instance variable
             self.details = details
@@ -721,6 +1260,48 @@ class DetailsInfo:
             print(f"❌ Error on Details Info Extraction: {e}")
             print("")
 
+    @property
+    def columns(self):
+        # DETAIL_COLUMNS this extraction produced values for
+        return list(self.DETAIL_COLUMNS)
+
+    def print_details(self, details):
+        printed = set()
+        for field in self.DETAIL_COLUMNS:
+            # Columns a partial extraction (e.g. page state) has no value for are not printed
+            if field not in details:
+                continue
+            # Description
+            if field == "description" and "description" not in printed:
+                desc_val = details['description']
+                if desc_val:
+                    desc_val = desc_val.replace('\n', ' ')
+                    if len(desc_val) > 100:
+                        shortened_desc = f"{desc_val[:50]}...{desc_val[-50:]}"
+                        print(f"> Description: {shortened_desc}")
+                    else:
+                        print(f"> Description: {desc_val}")
+                else:
+                    print("> Description: None")
+                printed.add("description")
+            # Property Type, Property Type Text
+            elif field in ["property_type", "property_type_text"] and "property_type" not in printed:
+                print(f"> Property Type: {details.get('property_type')} ({details.get('property_type_text')})")
+                printed.add("property_type")
+            # Lease Term, Lease Term Text
+            elif field in ["lease_term", "lease_term_text"] and "lease_term" not in printed:
+                print(f"> Lease Term: {details.get('lease_term')} ({details.get('lease_term_text')})")
+                printed.add("lease_term")
+            # Elsewhere
+            elif field not in [
+                "description",
+                "property_type", "property_type_text",
+                "lease_term", "lease_term_text",
+                # "raw_details_text", "raw_amenities_text", "raw_facilities_text"
+            ]:
+                display_name = field.replace("_", " ").title()
+                print(f"> {display_name}: {details[field]}")
+
     def get_description(self):
         try:
             # Try to get subtitle
@@ -766,28 +1347,31 @@ class DetailsInfo:
             else:
                 property_type_text = self.sb.find_element(By.XPATH, './/div[@da-id="property-details"]//img[@alt="home-open-o"]/../*[2]', timeout=1).text
             
-            # Extract the part before " for "
-            match = re.match(r"(.+?)\s+for\s+", property_type_text, re.IGNORECASE)
-            property_type_raw = match.group(1).strip() if match else property_type_text
-    
-            # Map to enum: Condo, Landed, HDB
-            lower = property_type_raw.lower()
-            hdb_keywords = ['HDB']
-            condo_keywords = ['Condominium', 'Apartment', 'Walk-up', 'Cluster House', 'Executive Condominium']
-            landed_keywords = ['Terraced House', 'Detached House', 'Semi-Detached House', 'Corner Terrace', 'Bungalow House', 'Good Class Bungalow', 'Shophouse', 'Land Only', 'Town House', 'Conservation House', 'Cluster House']
-    
-            if any(word.lower() in lower for word in hdb_keywords):
-                property_type = 'HDB'
-            elif any(word.lower() in lower for word in condo_keywords):
-                property_type = 'Condo'
-            elif any(word.lower() in lower for word in landed_keywords):
-                property_type = 'Landed'
-            else:
-                property_type = None
+            property_type = self.map_property_type(property_type_text)
         except Exception:
             pass
         finally:
             return property_type, property_type_text
+
+    @staticmethod
+    def map_property_type(property_type_text):
+        # Extract the part before " for "
+        match = re.match(r"(.+?)\s+for\s+", property_type_text, re.IGNORECASE)
+        property_type_raw = match.group(1).strip() if match else property_type_text
+
+        # Map to enum: Condo, Landed, HDB
+        lower = property_type_raw.lower()
+        hdb_keywords = ['HDB']
+        condo_keywords = ['Condominium', 'Apartment', 'Walk-up', 'Cluster House', 'Executive Condominium']
+        landed_keywords = ['Terraced House', 'Detached House', 'Semi-Detached House', 'Corner Terrace', 'Bungalow House', 'Good Class Bungalow', 'Shophouse', 'Land Only', 'Town House', 'Conservation House', 'Cluster House']
+
+        if any(word.lower() in lower for word in hdb_keywords):
+            return 'HDB'
+        elif any(word.lower() in lower for word in condo_keywords):
+            return 'Condo'
+        elif any(word.lower() in lower for word in landed_keywords):
+            return 'Landed'
+        return None
         
     def get_lease_term(self, is_button_present=True):
         lease_term = None
@@ -804,17 +1388,20 @@ class DetailsInfo:
             else:
                 lease_term_text = self.sb.find_element(By.XPATH, './/div[@da-id="property-details"]//img[@alt="calendar-days-o"]/../*[2]', timeout=1).text
             
-            lower = lease_term_text.lower()
-            if 'lease' in lower:
-                lease_term = 'Leasehold'
-            elif 'freehold' in lower:
-                lease_term = 'Freehold'
-            else:
-                lease_term = None
+            lease_term = self.map_lease_term(lease_term_text)
         except Exception:
             pass
         finally:
             return lease_term, lease_term_text
+
+    @staticmethod
+    def map_lease_term(lease_term_text):
+        lower = lease_term_text.lower()
+        if 'lease' in lower:
+            return 'Leasehold'
+        elif 'freehold' in lower:
+            return 'Freehold'
+        return None
         
     def get_bedroom_count(self):
         bedroom_count = None
@@ -859,18 +1446,22 @@ class DetailsInfo:
         else:
             elements = self.sb.find_elements(By.XPATH, './/div[@da-id="property-details"]//td//img//..//div')
         for el in elements:
-            text = el.text.strip().lower()
-            if 'unfurnished' in text:
-                furnishing = 'Unfurnished'
-                break
-            elif 'partially furnished' in text:
-                furnishing = 'Partially Furnished'
-                break
-            elif 'fully furnished' in text or 'furnished' in text:
-                furnishing = 'Fully Furnished'
+            furnishing = self.map_furnishing(el.text)
+            if furnishing is not None:
                 break
         return furnishing
 
+    @staticmethod
+    def map_furnishing(furnishing_text):
+        text = furnishing_text.strip().lower()
+        if 'unfurnished' in text:
+            return 'Unfurnished'
+        elif 'partially furnished' in text:
+            return 'Partially Furnished'
+        elif 'fully furnished' in text or 'furnished' in text:
+            return 'Fully Furnished'
+        return None
+
     def get_floor_size_sqft(self, is_button_present=True):
         floor_size_sqft = None
         if is_button_present:
@@ -991,4 +1582,254 @@ class DetailsInfo:
                 all_texts = [el.text.strip() for el in elements if el.text.strip()]
                 return ' || '.join(all_texts)
             except Exception:
-                return None
\ No newline at end of file
+                return None
+
+class SnapshotDetailsInfo(DetailsInfo):
+    """
+    Same extraction as DetailsInfo, but the page, the 'See All Details' modal and the amenities /
+    facilities modals are captured in a single async JS call. All DETAIL_COLUMNS are then derived
+    offline from that snapshot, so absent elements cost nothing instead of a 1-2 second timeout.
+    """
+    SNAPSHOT_SCRIPT = """
+        const done = arguments[arguments.length - 1];
+        const sleep = ms => new Promise(resolve => setTimeout(resolve, ms));
+        const byXPath = xpath => document.evaluate(xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+        const MODAL_CLOSE = 'button[da-id="modal-close-button"]';
+
+        // Click the 'See All' button of a section, wait for its modal to render, capture it and close it
+        const captureModal = async (section, buttonSelector, modalXPath) => {
+            const button = section && section.querySelector(buttonSelector);
+            if (!button) return null;
+            button.scrollIntoView();
+            button.click();
+            let html = null;
+            for (let waited = 0; waited < 2000; waited += 50) {
+                const modal = byXPath(modalXPath);
+                if (modal && modal.innerText.trim()) {
+                    html = modal.outerHTML;
+                    break;
+                }
+                await sleep(50);
+            }
+            const close = document.querySelector(MODAL_CLOSE);
+            if (close) close.click();
+            for (let waited = 0; waited < 1000 && byXPath(modalXPath); waited += 50) {
+                await sleep(50);
+            }
+            return html;
+        };
+
+        (async () => {
+            const detailsSection = byXPath('//section[@class="details-section"]');
+            const amenitiesSection = byXPath('//*[@da-id="facilities-amenities-title" and contains(text(), "Amenities")]/..');
+            const facilitiesSection = byXPath('//*[@da-id="facilities-amenities-title" and contains(text(), "Common facilities")]/..');
+            const snapshot = {
+                page: document.documentElement.outerHTML,
+                has_details_section: !!detailsSection,
+                has_amenities_section: !!amenitiesSection,
+                has_facilities_section: !!facilitiesSection,
+            };
+            const modalXPath = '//div[@class="amenities-facilities-modal-body modal-body"]';
+            snapshot.details_modal = await captureModal(detailsSection, 'button[da-id="meta-table-see-more-btn"]', '//div[@class="property-modal-body-wrapper"]');
+            snapshot.amenities_modal = await captureModal(amenitiesSection, 'button[da-id="amenities-see-all-btn"]', modalXPath);
+            snapshot.facilities_modal = await captureModal(facilitiesSection, 'button[da-id="facilities-see-all-btn"]', modalXPath);
+            done(snapshot);
+        })().catch(e => done({error: String(e)}));
+    """
+
+    def __init__(self, sb, snapshot=None):
+        # With a snapshot already captured (see capture), sb is not needed and nothing touches the browser
+        self.snapshot = snapshot
+        super().__init__(sb)
+
+    @classmethod
+    def capture(cls, sb):
+        snapshot = sb.execute_async_script(cls.SNAPSHOT_SCRIPT) or {}
+        if snapshot.get("error"):
+            raise Exception(f"Snapshot Script Failed: {snapshot['error']}")
+        return snapshot
+
+    def extract_details(self):
+        try:
+            # Capture everything in one round-trip, then parse offline
+            snapshot = self.snapshot if self.snapshot is not None else self.capture(self.sb)
+            page = PageSnapshot(snapshot.get("page"))
+
+            # Listing dictionary to store the extracted information
+            details = {}
+
+            self.sb = page
+            details['description'] = self.get_description()
+            details['bedroom_count'] = self.get_bedroom_count()
+            details['bathroom_count'] = self.get_bathroom_count()
+
+            # 'See All Details' (modal if it was captured, else the inline section)
+            if snapshot.get("has_details_section"):
+                is_button_present = snapshot.get("details_modal") is not None
+                self.sb = PageSnapshot(snapshot["details_modal"]) if is_button_present else page
+                details['property_type'], details['property_type_text'] = self.get_property_type(is_button_present)
+                details['lease_term'], details['lease_term_text'] = self.get_lease_term(is_button_present)
+                details['furnishing'] = self.get_furnishing(is_button_present)
+                details['floor_size_sqft'] = self.get_floor_size_sqft(is_button_present)
+                details['land_size_sqft'] = self.get_land_size_sqft(is_button_present)
+                details['psf_floor'] = self.get_psf_floor(is_button_present)
+                details['psf_land'] = self.get_psf_land(is_button_present)
+                details['raw_details_text'] = self.get_raw_details_text(is_button_present)
+            else:
+                print("> 'See All Details' Section Not Found")
+                for field in [
+                    "property_type", "property_type_text", "lease_term", "lease_term_text", "furnishing",
+                    "floor_size_sqft", "land_size_sqft", "psf_floor", "psf_land", "raw_details_text",
+                ]:
+                    details[field] = None
+
+            # 'See All x Amenities' / 'See All x Facilities'
+            details['raw_amenities_text'] = self.get_snapshot_section_text(
+                page, snapshot, "amenities", './/*[@da-id="facilities-amenities-title" and contains(text(), "Amenities")]/..', self.get_raw_amenities_text
+            )
+            details['raw_facilities_text'] = self.get_snapshot_section_text(
+                page, snapshot, "facilities", './/*[@da-id="facilities-amenities-title" and contains(text(), "Common facilities")]/..', self.get_raw_facilities_text
+            )
+            self.sb = page
+
+            # Print the extracted information for debugging
+            if self.print_output:
+                self.print_details(details)
+
+            # Assign the extracted details to the instance variable
+            self.details = details
+
+        except Exception as e:
+            print(f"❌ Error on Details Info Extraction: {e}")
+            print("")
+
+    def get_snapshot_section_text(self, page, snapshot, name, section_xpath, getter):
+        try:
+            if not snapshot.get(f"has_{name}_section"):
+                return None
+            if snapshot.get(f"{name}_modal") is not None:
+                self.sb = PageSnapshot(snapshot[f"{name}_modal"])
+                return getter(True)
+            self.sb = page
+            return getter(False, page.find_element(By.XPATH, section_xpath))
+        except Exception:
+            return None
+
+class DetailsStateInfo(DetailsInfo):
+    """
+    Same DETAIL_COLUMNS as DetailsInfo, mapped from the page-state / XHR JSON captured by
+    PageStateCapture. self.found stays False when no detail object for this listing is present or it
+    lacks one of the CORE_COLUMNS, which tells the caller to fall back to the DOM path.
+    Columns the object has no key for are left out of self.details and self.columns, so they keep
+    their stored values instead of being overwritten with None.
+    """
+    ID_KEYS = ("listingId", "id")
+    FIELD_KEYS = {
+        "description": ("description", "descriptionText"),
+        "property_type": ("propertyTypeText", "propertyType", "propertyTypeName"),
+        "lease_term": ("tenureText", "tenure"),
+        "bedroom_count": ("bedrooms", "bedroomCount", "beds"),
+        "bathroom_count": ("bathrooms", "bathroomCount", "baths"),
+        "furnishing": ("furnishingText", "furnishing"),
+        "floor_size_sqft": ("floorAreaSqft", "floorArea", "builtUpArea"),
+        "land_size_sqft": ("landAreaSqft", "landArea"),
+        "psf_floor": ("psf", "pricePerSqft", "floorPsf"),
+        "psf_land": ("landPsf", "pricePerSqftLand"),
+        "raw_details_text": ("keyDetails", "details"),
+        "raw_amenities_text": ("amenities",),
+        "raw_facilities_text": ("facilities",),
+    }
+    # Fields every usable detail object must have a key for
+    CORE_COLUMNS = ("description", "property_type", "bedroom_count", "bathroom_count", "floor_size_sqft")
+
+    def __init__(self, sb, payloads, property_id=None):
+        self.payloads = payloads
+        self.property_id = None if property_id is None else str(property_id)
+        self.found = False
+        super().__init__(sb)
+
+    def find_detail_object(self):
+        for payload in self.payloads:
+            for data in iter_dicts(payload):
+                if not all(self.has_field(data, col) for col in self.CORE_COLUMNS):
+                    continue
+                # Skip objects of other listings (e.g. "similar listings") when they carry an id
+                listing_id = pick(data, self.ID_KEYS)
+                if self.property_id is not None and listing_id is not None and str(listing_id) != self.property_id:
+                    continue
+                return data
+        return None
+
+    def has_field(self, data, col):
+        return any(key in data for key in self.FIELD_KEYS[col])
+
+    def extract_details(self):
+        try:
+            data = self.find_detail_object()
+            if data is None:
+                return
+
+            description = pick(data, self.FIELD_KEYS["description"])
+            if isinstance(description, str) and "<" in description:
+                description = SnapshotElement.from_html(f"<div>{description}</div>").text
+            property_type_text = pick(data, self.FIELD_KEYS["property_type"])
+            lease_term_text = pick(data, self.FIELD_KEYS["lease_term"])
+            furnishing_text = pick(data, self.FIELD_KEYS["furnishing"])
+
+            details = {
+                "description": description,
+                "property_type": self.map_property_type(property_type_text) if isinstance(property_type_text, str) else None,
+                "property_type_text": property_type_text,
+                "lease_term": self.map_lease_term(lease_term_text) if isinstance(lease_term_text, str) else None,
+                "lease_term_text": lease_term_text,
+                "bedroom_count": self.to_int(pick(data, self.FIELD_KEYS["bedroom_count"])),
+                "bathroom_count": self.to_int(pick(data, self.FIELD_KEYS["bathroom_count"])),
+                "furnishing": self.map_furnishing(furnishing_text) if isinstance(furnishing_text, str) else None,
+                "floor_size_sqft": self.to_int(pick(data, self.FIELD_KEYS["floor_size_sqft"])),
+                "land_size_sqft": self.to_int(pick(data, self.FIELD_KEYS["land_size_sqft"])),
+                "psf_floor": self.to_decimal(pick(data, self.FIELD_KEYS["psf_floor"])),
+                "psf_land": self.to_decimal(pick(data, self.FIELD_KEYS["psf_land"])),
+                "raw_details_text": self.join_texts(data.get("keyDetails") or data.get("details")),
+                "raw_amenities_text": self.join_texts(data.get("amenities")),
+                "raw_facilities_text": self.join_texts(data.get("facilities")),
+            }
+            # property_type_text / lease_term_text come from the same keys as their mapped columns
+            known = {col for col in self.FIELD_KEYS if self.has_field(data, col)}
+            known |= {f"{col}_text" for col in ("property_type", "lease_term") if col in known}
+            details = {col: value for col, value in details.items() if col in known}
+
+            # Print the extracted information for debugging
+            if self.print_output:
+                self.print_details(details)
+
+            self.details = details
+            self.found = True
+        except Exception as e:
+            print(f"❌ Error on Details State Extraction: {e}")
+            print("")
+
+    @property
+    def columns(self):
+        return [col for col in self.DETAIL_COLUMNS if col in self.details]
+
+    @staticmethod
+    def to_int(value):
+        try:
+            return int(round(float(str(value).replace(",", "").split()[0])))
+        except Exception:
+            return None
+
+    @staticmethod
+    def to_decimal(value):
+        try:
+            return Decimal(str(value).replace(",", "").replace("S$", "").split()[0]).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        except Exception:
+            return None
+
+    @staticmethod
+    def join_texts(items):
+        if not isinstance(items, list):
+            return None
+        texts = [item if isinstance(item, str) else pick(item, ("text", "name", "label", "value")) for item in items]
+        texts = [str(text).strip() for text in texts if text]
+        return ' || '.join(texts) if texts else None
@@ -0,0 +1,105 @@
+# src/scraper/shard_planner.py
+from scraper.challenge import ChallengeDetector
+from scraper.scraper_utils import ListingsInfo, ScraperUtils
+import math
+
+class ListingsShardPlanner:
+    """
+    Splits one (mode, unit_type) listings search into price-band (and optionally district) sub-searches
+    whose result pages stay under max_pages, so deep backfills run in parallel without hitting the
+    site's pagination ceiling. Each band is probed by loading its first page and reading the total
+    from the page-title count; bands still too deep are bisected, and the open-ended top band (or a
+    band too narrow to bisect) is split by district when by_district is set.
+    Bands are [min_price, max_price] with both bounds inclusive, so no listing is walked twice.
+    """
+    DISTRICTS = [f"D{n:02d}" for n in range(1, 29)]
+    PAGE_SIZE = 20  # Listings per result page, used until a probe counts the cards on the page
+
+    def __init__(self, browser, rate_limiter, challenges, max_pages=50, by_district=False, max_probes=100):
+        self.browser = browser
+        self.rate_limiter = rate_limiter
+        self.challenges = challenges
+        self.max_pages = max_pages  # Result pages a shard may have before it is split further
+        self.by_district = by_district
+        self.max_probes = max_probes  # Page loads the planner may spend per search
+
+        # Per-run counters
+        self.probes = 0
+        self.shards = 0
+
+    @staticmethod
+    def bands(edges):
+        # [e0, e1, e2] -> (None, e0 - 1), (e0, e1 - 1), (e1, e2 - 1), (e2, None)
+        edges = sorted(set(edges))
+        lows = [None] + edges
+        highs = [edge - 1 for edge in edges] + [None]
+        return list(zip(lows, highs))
+
+    def plan(self, mode, unit_type, last_posted, edges):
+        """
+        Shards for one search: dicts with min_price, max_price, district, total and pages. Shards with
+        no listings are dropped; a shard whose probe failed is kept with total None.
+        """
+        print(f"= Shard Planner | Mode: {mode} | Unit Type: {ListingsInfo.unit_type_label(unit_type)} | Max Pages: {self.max_pages}")
+        probes_before = self.probes
+        pending = [(min_price, max_price, None) for min_price, max_price in self.bands(edges)]
+        shards = []
+        while pending:
+            if self.probes - probes_before >= self.max_probes:
+                print(f"> Probe Budget Spent, Keeping {len(pending)} Bands Unsplit")
+                shards += [self.shard(min_price, max_price, district, None, None) for min_price, max_price, district in pending]
+                break
+            min_price, max_price, district = pending.pop(0)
+            total, page_size = self.probe(mode, unit_type, last_posted, min_price, max_price, district)
+            if total == 0:
+                continue
+            pages = None if total is None else math.ceil(total / page_size)
+            if pages is None or pages <= self.max_pages:
+                shards.append(self.shard(min_price, max_price, district, total, pages))
+                continue
+            # Too deep: bisect a closed band, else split by district, else keep it and let the ceiling apply
+            if district is None and min_price is not None and max_price is not None and max_price > min_price:
+                mid = (min_price + max_price) // 2
+                pending[:0] = [(min_price, mid, None), (mid + 1, max_price, None)]
+            elif district is None and self.by_district:
+                pending[:0] = [(min_price, max_price, code) for code in self.DISTRICTS]
+            else:
+                print(f"> Shard Still Over {self.max_pages} Pages: {pages}")
+                shards.append(self.shard(min_price, max_price, district, total, pages))
+        self.shards += len(shards)
+        print(f"= Shard Planner | Shards: {len(shards)} | Probes: {self.probes - probes_before}\n")
+        return shards
+
+    def probe(self, mode, unit_type, last_posted, min_price, max_price, district):
+        # (total, listings per page) of a sub-search from its first page; total is None if it could not be read
+        scraper = ScraperUtils(
+            session=None, mode=mode, unit_type=unit_type, last_posted=last_posted,
+            browser=self.browser, rate_limiter=self.rate_limiter, challenges=self.challenges,
+            price_band=(min_price, max_price), district=district,
+        )
+        self.probes += 1
+        with self.browser.page() as sb:
+            try:
+                url = scraper.listings_url(1)
+                print(f"> Probe: {scraper.search_label()} | URL: {url}")
+                sb, state = scraper.open_page(self.browser, sb, url, redirect_marker="&isNewProject=true")
+                if state != ChallengeDetector.CLEAN:
+                    print(f"> Probe Skipped ({state.title()})")
+                    return None, self.PAGE_SIZE
+                total = scraper.read_total_properties(sb)
+                cards = len(sb.find_elements('//*[@class="listing-card-banner-root"]'))
+                self.rate_limiter.success()
+                # A full first page gives the page size; a single short page says nothing about it
+                return total, cards if total is not None and cards and cards < total else self.PAGE_SIZE
+            except Exception as e:
+                print(f"❌ Error Probing Shard: {e}")
+                self.browser.mark_error()
+                self.rate_limiter.backoff("Error")
+                return None, self.PAGE_SIZE
+
+    @staticmethod
+    def shard(min_price, max_price, district, total, pages):
+        return {"min_price": min_price, "max_price": max_price, "district": district, "total": total, "pages": pages}
+
+    def report(self):
+        print(f"= Shard Planner | Shards: {self.shards} | Probes: {self.probes}")
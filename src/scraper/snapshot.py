@@ -0,0 +1,123 @@
+# src/scraper/snapshot.py
+from lxml import etree
+from lxml import html as lxml_html
+from selenium.common.exceptions import NoSuchElementException
+from selenium.webdriver.common.by import By
+from urllib.parse import urljoin
+import re
+
+BASE_URL = "https://www.propertyguru.com.sg"
+
+# Tags that the browser renders on their own line (approximation of innerText)
+BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "dd", "div", "dl", "dt", "fieldset", "figcaption",
+    "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "li", "main",
+    "nav", "ol", "p", "pre", "section", "table", "tbody", "td", "tfoot", "th", "thead", "tr", "ul",
+}
+SKIP_TAGS = {"script", "style", "noscript", "template"}
+
+class SnapshotElement:
+    """
+    Offline stand-in for a WebElement, backed by an lxml element parsed from captured HTML.
+    Implements the subset of the WebElement / SB API used by ListingsInfo and DetailsInfo,
+    so the existing get_* methods can run against a snapshot without any WebDriver round-trip.
+    """
+    _xpath_cache = {}
+
+    def __init__(self, element, base_url=BASE_URL):
+        self.element = element
+        self.base_url = base_url
+
+    @classmethod
+    def from_html(cls, html, base_url=BASE_URL):
+        # Parse a fragment (card outerHTML) or a full document into a snapshot element
+        return cls(lxml_html.fromstring(html), base_url)
+
+    @classmethod
+    def compile(cls, xpath):
+        # Compile each XPath expression once and reuse it across cards and pages
+        compiled = cls._xpath_cache.get(xpath)
+        if compiled is None:
+            compiled = etree.XPath(xpath)
+            cls._xpath_cache[xpath] = compiled
+        return compiled
+
+    @staticmethod
+    def resolve_xpath(*args, **kwargs):
+        # Accept both WebElement style (By.XPATH, xpath) and SB style (xpath) / (xpath, by=...)
+        kwargs.pop("timeout", None)
+        if len(args) >= 2 and args[0] == By.XPATH:
+            return args[1]
+        if len(args) >= 2 and args[1] == By.XPATH:
+            return args[0]
+        if args:
+            return args[0]
+        return kwargs.get("value") or kwargs.get("selector")
+
+    def find_elements(self, *args, **kwargs):
+        xpath = self.resolve_xpath(*args, **kwargs)
+        results = self.compile(xpath)(self.element)
+        return [SnapshotElement(r, self.base_url) for r in results if isinstance(r, etree._Element)]
+
+    def find_element(self, *args, **kwargs):
+        # Absent elements fail immediately: there is nothing left to wait for in a snapshot
+        elements = self.find_elements(*args, **kwargs)
+        if not elements:
+            raise NoSuchElementException(f"No snapshot element for: {self.resolve_xpath(*args, **kwargs)}")
+        return elements[0]
+
+    @property
+    def text(self):
+        parts = []
+        self._render_text(self.element, parts)
+        lines = [re.sub(r"[ \t\r\f\v\xa0]+", " ", line).strip() for line in "".join(parts).split("\n")]
+        return "\n".join(line for line in lines if line)
+
+    @classmethod
+    def _render_text(cls, node, parts):
+        # Comments and processing instructions have a non-string tag
+        if not isinstance(node.tag, str) or node.tag in SKIP_TAGS:
+            return
+        is_block = node.tag in BLOCK_TAGS
+        if node.tag == "br" or is_block:
+            parts.append("\n")
+        if node.text:
+            parts.append(node.text)
+        for child in node:
+            cls._render_text(child, parts)
+            if child.tail:
+                parts.append(child.tail)
+        if is_block:
+            parts.append("\n")
+
+    def get_attribute(self, name):
+        if name == "outerHTML":
+            return lxml_html.tostring(self.element, encoding="unicode")
+        value = self.element.get(name)
+        # WebDriver returns absolute URLs for links, mirror that here
+        if value is not None and name in ("href", "src"):
+            value = urljoin(self.base_url, value)
+        return value
+
+class PageSnapshot(SnapshotElement):
+    """
+    Whole-page snapshot that can stand in for the SB instance in DetailsInfo.
+    Scrolling, clicking and sleeping are no-ops because the content is already captured.
+    """
+
+    def __init__(self, html, base_url=BASE_URL):
+        super().__init__(lxml_html.document_fromstring(html) if html else lxml_html.document_fromstring("<html></html>"), base_url)
+        self._cache = {}
+
+    def find_elements(self, *args, **kwargs):
+        # The same XPath is queried repeatedly by the get_* methods, so memoize per snapshot
+        xpath = self.resolve_xpath(*args, **kwargs)
+        if xpath not in self._cache:
+            self._cache[xpath] = super().find_elements(xpath)
+        return self._cache[xpath]
+
+    def execute_script(self, *args, **kwargs):
+        return None
+
+    def sleep(self, seconds):
+        return None
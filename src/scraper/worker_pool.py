@@ -0,0 +1,209 @@
+# src/scraper/worker_pool.py
+from scraper.browser_session import BrowserSessionManager
+from scraper.challenge import ChallengeDetector
+from scraper.csv_sink import CsvSink
+from scraper.lease_queue import DetailsLeaseQueue
+from scraper.rate_limiter import RateLimiter
+from scraper.resource_blocker import ResourceBlockPolicy
+from scraper.scraper import PropertyGuruScraper
+from scraper.scraper_utils import ScraperUtils
+import database
+import math
+import multiprocessing
+import os
+import queue
+import signal
+import sys
+
+class WorkerPool:
+    """
+    Runs listings / details jobs on N isolated browser workers.
+    Each worker is its own process with its own DB engine, SB session and virtual display (xvfb),
+    and pulls jobs from a shared queue until it is empty.
+    """
+
+    def __init__(self, config, workers=2):
+        self.config = config
+        self.workers = workers
+
+    @staticmethod
+    def plan_listings_jobs(modes, unit_types, page_shards=1, desired_pages=None, search_shards=None):
+        # One job per (mode, unit_type, search shard, page stride): page shard k scrapes pages k, k + shards, k + 2 * shards, ...
+        # search_shards maps (mode, unit_type) to ListingsShardPlanner shards; searches not in it are scraped whole,
+        # while a planned search with an empty list (every band probed empty) gets no jobs
+        jobs = []
+        for mode in modes:
+            for unit_type in unit_types:
+                if mode == "Buy" and unit_type == -1:
+                    continue
+                # Deepest shards first, so the longest jobs do not start last
+                shards = sorted((search_shards or {}).get((mode, unit_type), [None]), key=lambda shard: -((shard or {}).get("pages") or 0))
+                for shard in shards:
+                    for start_page in range(1, page_shards + 1):
+                        if desired_pages is not None and start_page > desired_pages:
+                            break
+                        if shard is not None and shard["pages"] is not None and start_page > shard["pages"]:
+                            break
+                        jobs.append({
+                            "kind": "listings", "mode": mode, "unit_type": unit_type,
+                            "start_page": start_page, "page_step": page_shards,
+                            "price_band": None if shard is None else (shard["min_price"], shard["max_price"]),
+                            "district": None if shard is None else shard["district"],
+                        })
+        return jobs
+
+    @staticmethod
+    def plan_details_jobs(modes, unit_types, shards=1, max_scrape=None, leased=False):
+        # One job per (mode, unit_type, id shard): shard k takes the rows where id % shards == k
+        # With leased=True the shards are unfiltered copies of the job that share rows through leases
+        jobs = []
+        for mode in modes:
+            for unit_type in unit_types:
+                if mode == "Buy" and unit_type == -1:
+                    continue
+                for shard_index in range(shards):
+                    jobs.append({
+                        "kind": "details", "mode": mode, "unit_type": unit_type,
+                        "shard_index": 0 if leased else shard_index, "shard_count": 1 if leased else shards,
+                        "max_scrape": None if max_scrape is None else math.ceil(max_scrape / shards),
+                    })
+        return jobs
+
+    def run(self, jobs):
+        if not jobs:
+            return
+        workers = min(self.workers, len(jobs))
+        print(f"= Worker Pool | Workers: {workers} | Jobs: {len(jobs)}\n")
+
+        # Spawn (not fork) so no browser, display or DB connection is shared with the parent
+        ctx = multiprocessing.get_context("spawn")
+        job_queue = ctx.Queue()
+        for job in jobs:
+            job_queue.put(job)
+
+        processes = []
+        for worker_id in range(1, workers + 1):
+            process = ctx.Process(target=run_worker, args=(worker_id, job_queue, self.config), name=f"worker-{worker_id}")
+            process.start()
+            processes.append(process)
+        try:
+            for process in processes:
+                process.join()
+        except (SystemExit, KeyboardInterrupt):
+            # `docker stop` only signals PID 1, which is this process (the Dockerfile CMD execs python): pass
+            # SIGTERM on so every worker flushes its buffered details, and wait for them before the container is killed
+            print("> Stopping Workers")
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+            for process in processes:
+                process.join()
+            raise
+        finally:
+            for process in processes:
+                if process.exitcode not in (0, None):
+                    print(f"❌ Error on {process.name}: Exit Code {process.exitcode}")
+
+def install_sigterm_handler():
+    # Turn SIGTERM into SystemExit so finally blocks (details flush, browser close) still run
+    def handle_sigterm(signum, frame):
+        sys.exit(128 + signum)
+    signal.signal(signal.SIGTERM, handle_sigterm)
+
+def worker_csv_path(path, worker_id):
+    # Each worker appends to its own CSV inside the same dated folder
+    if path is None:
+        return None
+    root, ext = os.path.splitext(path)
+    if ext == ".gz":
+        root, csv_ext = os.path.splitext(root)
+        ext = csv_ext + ext
+    return f"{root}_w{worker_id}{ext}"
+
+def worker_csv_sink(config, key, worker_id):
+    path = worker_csv_path(config.get(key), worker_id)
+    if path is None:
+        return None
+    return CsvSink(path, compress=config["csv_gzip"], buffer_rows=config["csv_buffer_rows"])
+
+def run_worker(worker_id, job_queue, config):
+    install_sigterm_handler()
+    database.init_db(config["db_config"])
+    listings_sink = worker_csv_sink(config, "properties_csv_path", worker_id)
+    details_sink = worker_csv_sink(config, "details_csv_path", worker_id)
+    # One long-lived browser per worker, reused across all of its jobs
+    block_policy = None if config["block_resources"] is None else ResourceBlockPolicy(categories=config["block_resources"])
+    # Each worker paces itself through its own adaptive rate controller
+    rate_limiter = RateLimiter(**config["rate_limit"])
+    challenges = ChallengeDetector()
+    # Leases are held under this process's hostname-pid
+    details_queue = None if config["details_queue"] != "lease" else DetailsLeaseQueue(
+        lease_seconds=config["details_lease_seconds"], batch_size=config["details_lease_batch"]
+    )
+    details_buffer = database.DetailsWriteBuffer(max_rows=config["details_flush_rows"], max_seconds=config["details_flush_seconds"])
+    with BrowserSessionManager(max_pages=config["browser_max_pages"], max_memory_mb=config["browser_max_memory_mb"], block_policy=block_policy) as browser:
+        with details_buffer:
+            try:
+                run_jobs(worker_id, job_queue, config, rate_limiter, challenges, details_queue, details_buffer, browser, listings_sink, details_sink)
+            finally:
+                for sink in (listings_sink, details_sink):
+                    if sink is not None:
+                        sink.close()
+    print(f"= Worker {worker_id} | Done")
+    browser.report()
+    rate_limiter.report()
+    challenges.report()
+    if details_queue is not None:
+        details_queue.report()
+    details_buffer.report()
+    for sink in (listings_sink, details_sink):
+        if sink is not None:
+            sink.report()
+    database.report_stats()
+
+def run_jobs(worker_id, job_queue, config, rate_limiter, challenges, details_queue, details_buffer, browser, listings_sink, details_sink):
+    first_job = True
+    while True:
+        try:
+            job = job_queue.get(timeout=1)
+        except queue.Empty:
+            break
+
+        # Per-worker pacing between jobs instead of one global sleep
+        if not first_job:
+            rate_limiter.cooldown()
+        first_job = False
+
+        print(f"= Worker {worker_id} | {job['kind'].title()} | Mode: {job['mode']} | Unit Type: {job['unit_type']}")
+        try:
+            with database.Session() as sess:
+                if job["kind"] == "listings":
+                    scraper = ScraperUtils(
+                        session=sess, mode=job["mode"], unit_type=job["unit_type"],
+                        last_posted=config["last_posted"], listings_engine=config["listings_engine"], browser=browser, rate_limiter=rate_limiter, challenges=challenges,
+                        pipeline_parsers=config["pipeline_parsers"], pipeline_queue_size=config["pipeline_queue_size"], listings_sink=listings_sink,
+                        stop_after_known_pages=config["listings_stop_after_known_pages"], checkpoint_max_age_seconds=config["checkpoint_max_age_seconds"],
+                        price_band=job.get("price_band"), district=job.get("district")
+                    )
+                    PropertyGuruScraper.run_scraper_listings(
+                        scraper=scraper,
+                        desired_pages=config["listings_desired_pages"],
+                        start_page=job["start_page"],
+                        page_step=job["page_step"]
+                    )
+                else:
+                    scraper = ScraperUtils(
+                        session=sess, mode=job["mode"], unit_type=job["unit_type"],
+                        last_posted=None, details_engine=config["details_engine"], browser=browser, rate_limiter=rate_limiter, challenges=challenges,
+                        details_queue=details_queue, details_buffer=details_buffer,
+                        pipeline_parsers=config["pipeline_parsers"], pipeline_queue_size=config["pipeline_queue_size"], details_sink=details_sink,
+                        details_reuse_seconds=config["details_reuse_seconds"], checkpoint_max_age_seconds=config["checkpoint_max_age_seconds"]
+                    )
+                    PropertyGuruScraper.run_scraper_details(
+                        scraper=scraper,
+                        max_scrape=job["max_scrape"],
+                        shard_index=job["shard_index"],
+                        shard_count=job["shard_count"]
+                    )
+        except Exception as e:
+            print(f"❌ Error on Worker {worker_id}: {e}")
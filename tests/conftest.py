@@ -0,0 +1,33 @@
+# tests/conftest.py
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import database
+
+@pytest.fixture
+def db(tmp_path):
+    # A fresh SQLite node database, migrated the same way DATABASE_BACKEND=sqlite is at startup
+    database.init_db({"backend": "sqlite", "sqlite_path": str(tmp_path / "smartvaluer.db")})
+    yield database
+    database.engine.dispose()
+
+@pytest.fixture
+def listing():
+    # One listings card as bulk_upsert_listings receives it
+    def build(property_id, **values):
+        return {
+            "property_id": str(property_id),
+            "title": f"Listing {property_id}",
+            "address": "1 Test Road",
+            "property_url": f"https://www.propertyguru.com.sg/listing/{property_id}",
+            "property_selling_type": "Rent",
+            "unit_type": "Room",
+            "agent_name": "Agent",
+            "selling_price": 2000,
+            **values,
+        }
+    return build
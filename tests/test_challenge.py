@@ -0,0 +1,92 @@
+# tests/test_challenge.py
+from scraper.challenge import ChallengeDetector
+
+CLEAN = {"title": "Rooms for Rent", "url": "https://www.propertyguru.com.sg/property-for-rent", "challenge": False, "text": "Listings"}
+CHALLENGE = {"title": "Just a moment...", "url": CLEAN["url"], "challenge": True, "text": "Verify you are human"}
+BLOCKED = {"title": "Access denied", "url": CLEAN["url"], "challenge": False, "text": "Error 1020"}
+
+class ScriptedPage:
+    # Stands in for sb: each classify reads the next page state
+    def __init__(self, states):
+        self.states = list(states)
+        self.captcha_clicks = 0
+
+    def execute_script(self, script):
+        return self.states.pop(0)
+
+    def uc_gui_click_captcha(self):
+        self.captcha_clicks += 1
+
+    def get_current_url(self):
+        return CLEAN["url"]
+
+    def sleep(self, seconds):
+        pass
+
+class ScriptedBrowser:
+    def __init__(self, pages):
+        self.pages = list(pages)
+        self.opened = 0
+        self.recycled = 0
+
+    def open(self, sb, url):
+        self.opened += 1
+
+    def recycle(self, reason):
+        self.recycled += 1
+
+    def get(self):
+        return self.pages.pop(0)
+
+class RecordingLimiter:
+    def __init__(self):
+        self.sleeps = []
+        self.backoffs = 0
+
+    def wait(self):
+        pass
+
+    def settle(self, sb=None):
+        pass
+
+    def backoff(self, reason="Error"):
+        self.backoffs += 1
+
+    def sleep(self, seconds, sb=None):
+        self.sleeps.append(seconds)
+
+def test_classify_page_states():
+    detector = ChallengeDetector()
+    assert detector.classify(ScriptedPage([CLEAN])) == ChallengeDetector.CLEAN
+    assert detector.classify(ScriptedPage([CHALLENGE])) == ChallengeDetector.CHALLENGED
+    assert detector.classify(ScriptedPage([BLOCKED])) == ChallengeDetector.BLOCKED
+    assert detector.classify(ScriptedPage([CLEAN]), redirect_marker="property-for-rent") == ChallengeDetector.REDIRECTED
+
+def test_captcha_is_clicked_only_when_challenged():
+    detector = ChallengeDetector()
+    limiter = RecordingLimiter()
+    page = ScriptedPage([CLEAN])
+    sb, state = detector.open(ScriptedBrowser([]), page, "url", limiter)
+    assert (sb, state) == (page, ChallengeDetector.CLEAN)
+    assert page.captcha_clicks == 0
+
+    page = ScriptedPage([CHALLENGE, CLEAN])
+    sb, state = detector.open(ScriptedBrowser([]), page, "url", limiter)
+    assert state == ChallengeDetector.CLEAN
+    assert page.captcha_clicks == 1
+    assert detector.resolved == 1
+    assert limiter.backoffs == 0
+    assert detector.loads == {ChallengeDetector.CLEAN: 1, ChallengeDetector.CHALLENGED: 1}
+
+def test_repeated_blocks_back_off_rotate_and_give_up():
+    detector = ChallengeDetector(max_attempts=4, rotate_after=2, base_delay=5)
+    limiter = RecordingLimiter()
+    first, rotated = ScriptedPage([BLOCKED, BLOCKED]), ScriptedPage([BLOCKED, BLOCKED])
+    browser = ScriptedBrowser([rotated])
+    sb, state = detector.open(browser, first, "url", limiter)
+    assert (sb, state) == (rotated, ChallengeDetector.BLOCKED)
+    assert browser.opened == 4
+    assert browser.recycled == detector.rotations == 1
+    assert limiter.sleeps == [5, 10, 20]
+    assert limiter.backoffs == 4
+    assert detector.failed == 1
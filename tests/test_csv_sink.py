@@ -0,0 +1,22 @@
+# tests/test_csv_sink.py
+import csv
+import gzip
+
+from scraper.csv_sink import CsvSink
+
+ROWS = [{"property_id": str(n), "title": f"Listing {n}, Block {n}"} for n in range(5)]
+
+def test_csv_sink_gzip_members_read_as_one_file(tmp_path):
+    path = tmp_path / "properties.csv.gz"
+    with CsvSink(str(path), compress=True, buffer_rows=2) as sink:
+        sink.write_rows(ROWS)
+    assert sink.flushes == 3
+    with gzip.open(path, "rt", encoding="utf-8", newline="") as f:
+        assert list(csv.DictReader(f)) == ROWS
+
+def test_csv_sink_appends_single_header(tmp_path):
+    path = tmp_path / "properties.csv"
+    with CsvSink(str(path), buffer_rows=2) as sink:
+        sink.write_rows(ROWS)
+    with open(path, encoding="utf-8", newline="") as f:
+        assert list(csv.DictReader(f)) == ROWS
@@ -0,0 +1,225 @@
+# tests/test_database.py
+import threading
+import time
+from types import SimpleNamespace
+
+from sqlalchemy import select, update
+
+from database import DetailsLease, DetailsWriteBuffer, Properties, PropertyHistory, RunCheckpoint
+
+DETAIL_COLUMNS = ["bedroom_count", "furnishing", "description"]
+
+def stored(db, property_id):
+    # Column values of one row, description included (it lives in property_details_text)
+    with db.Session() as session:
+        row = session.execute(select(Properties).where(Properties.property_id == str(property_id))).scalar_one()
+        return SimpleNamespace(**{col: getattr(row, col) for col in Properties.__table__.columns.keys()}, description=row.description)
+
+def history(db):
+    with db.Session() as session:
+        return [(entry.property_id, entry.column_name, entry.old_value, entry.new_value) for entry in session.scalars(select(PropertyHistory).order_by(PropertyHistory.id))]
+
+def pending_rows(db, count):
+    with db.Session() as session:
+        rows = [Properties(property_id=str(n), title=f"Listing {n}", property_url=f"u{n}", property_selling_type="Rent", unit_type="Room", details_fetched=False) for n in range(count)]
+        session.add_all(rows)
+        session.commit()
+        return [row.id for row in rows]
+
+def detail(row_id, **values):
+    return {"id": row_id, "bedroom_count": 2, "furnishing": "Fully Furnished", "description": "Quiet unit", **values}
+
+# --- Properties.bulk_upsert_listings ---
+def test_bulk_upsert_listings_insert_update_ignore(db, listing):
+    assert Properties.bulk_upsert_listings([listing(1), listing(2)]) == ["insert", "insert"]
+    assert Properties.bulk_upsert_listings([listing(1), listing(2)]) == ["ignore", "ignore"]
+    assert Properties.bulk_upsert_listings([listing(1, selling_price=2100), listing(2)]) == ["update", "ignore"]
+    assert stored(db, 1).selling_price == 2100
+    assert history(db) == [("1", "selling_price", "2000.00", "2100.00")]
+
+def test_bulk_upsert_listings_repeated_card_is_ignored(db, listing):
+    assert Properties.bulk_upsert_listings([listing(1), listing(1)]) == ["insert", "ignore"]
+
+def test_bulk_upsert_listings_resets_details_only_on_fingerprint_change(db, listing):
+    Properties.bulk_upsert_listings([listing(1)])
+    with db.session_scope() as session:
+        session.execute(update(Properties).values(details_fetched=True))
+    # agent_name is not part of the details fingerprint
+    assert Properties.bulk_upsert_listings([listing(1, agent_name="Other Agent")]) == ["update"]
+    assert stored(db, 1).details_fetched is True
+    assert Properties.bulk_upsert_listings([listing(1, agent_name="Other Agent", title="New Title")]) == ["update"]
+    assert stored(db, 1).details_fetched is False
+
+def test_bulk_upsert_listings_rehashes_legacy_rows(db, listing):
+    # Rows stored before the hashes existed are diffed column by column, and only get their hashes written
+    Properties.bulk_upsert_listings([listing(1)])
+    hashes = (stored(db, 1).listing_hash, stored(db, 1).details_fingerprint)
+    with db.session_scope() as session:
+        session.execute(update(Properties).values(listing_hash=None, details_fingerprint=None))
+    assert Properties.bulk_upsert_listings([listing(1)]) == ["ignore"]
+    assert (stored(db, 1).listing_hash, stored(db, 1).details_fingerprint) == hashes
+    assert stored(db, 1).updated_at is None
+    assert history(db) == []
+
+# --- PropertyHistory ---
+def test_history_outlives_deleted_listing(db, listing):
+    Properties.bulk_upsert_listings([listing(1)])
+    Properties.bulk_upsert_listings([listing(1, selling_price=2100)])
+    with db.session_scope() as session:
+        session.delete(session.execute(select(Properties)).scalar_one())
+    assert history(db) == [("1", "selling_price", "2000.00", "2100.00")]
+
+# --- DetailsWriteBuffer ---
+def test_details_buffer_flushes_every_max_rows(db):
+    ids = pending_rows(db, 3)
+    buffer = DetailsWriteBuffer(max_rows=2, max_seconds=3600)
+    buffer.add(detail(ids[0]), DETAIL_COLUMNS)
+    assert buffer.flushes == 0 and len(buffer) == 1
+    buffer.add(detail(ids[1]), DETAIL_COLUMNS)
+    assert buffer.flushes == 1 and len(buffer) == 0
+    buffer.add(detail(ids[2]), DETAIL_COLUMNS)
+    buffer.close()
+    assert buffer.flushes == 2 and buffer.rows_written == 3
+    row = stored(db, 0)
+    assert (row.details_fetched, row.bedroom_count, row.furnishing, row.description) == (True, 2, "Fully Furnished", "Quiet unit")
+    assert row.details_fetched_at is not None
+
+def test_details_buffer_timer_flushes_partial_buffer(db):
+    ids = pending_rows(db, 1)
+    buffer = DetailsWriteBuffer(max_rows=20, max_seconds=1)
+    buffer.add(detail(ids[0]), DETAIL_COLUMNS)
+    deadline = time.monotonic() + 5
+    while buffer.rows_written == 0 and time.monotonic() < deadline:
+        time.sleep(0.1)
+    buffer.close()
+    assert buffer.rows_written == 1
+    assert stored(db, 0).details_fetched is True
+
+def test_details_buffer_marks_not_found_rows_fetched(db):
+    ids = pending_rows(db, 1)
+    with DetailsWriteBuffer(max_rows=20, max_seconds=3600) as buffer:
+        buffer.mark_not_found(ids[0])
+    assert (stored(db, 0).details_fetched, stored(db, 0).details_fetched_at) == (True, None)
+    assert ("0", "details_fetched", "False", "True") in history(db)
+
+def test_details_buffer_releases_leases_on_flush(db):
+    ids = pending_rows(db, 3)
+    assert DetailsLease.claim("worker-a", "Rent", "Room", 3, 900) == ids
+    with DetailsWriteBuffer(max_rows=20, max_seconds=3600) as buffer:
+        buffer.add(detail(ids[0]), DETAIL_COLUMNS)
+        buffer.mark_not_found(ids[1])
+    with db.Session() as session:
+        assert list(session.scalars(select(DetailsLease.property_row_id))) == [ids[2]]
+
+# --- DetailsWriteBuffer checkpoint ---
+def details_checkpoint():
+    checkpoint = RunCheckpoint.load("details", "Rent", "Room", "0/1", 3600)
+    return None if checkpoint is None else (checkpoint["last_property_row_id"], checkpoint["processed"])
+
+def test_details_checkpoint_advances_with_the_flush(db):
+    ids = pending_rows(db, 2)
+    buffer = DetailsWriteBuffer(max_rows=20, max_seconds=3600)
+    buffer.track_checkpoint(("details", "Rent", "Room", "0/1"))
+    buffer.add(detail(ids[0]), DETAIL_COLUMNS)
+    buffer.add(detail(ids[1]), DETAIL_COLUMNS)
+    # Nothing is checkpointed before the rows are written
+    assert details_checkpoint() is None
+    buffer.close()
+    assert details_checkpoint() == (ids[1], 2)
+
+def test_details_checkpoint_stays_below_a_skipped_row(db):
+    ids = pending_rows(db, 4)
+    buffer = DetailsWriteBuffer(max_rows=20, max_seconds=3600)
+    buffer.track_checkpoint(("details", "Rent", "Room", "0/1"))
+    buffer.add(detail(ids[0]), DETAIL_COLUMNS)
+    buffer.mark_skipped(ids[1])
+    buffer.add(detail(ids[2]), DETAIL_COLUMNS)
+    buffer.mark_not_found(ids[3])
+    buffer.close()
+    # A resumed run starts after ids[0] and retries the skipped row; the written ones are no longer pending
+    assert details_checkpoint() == (ids[0], 3)
+
+def test_details_checkpoint_stays_below_a_failed_write(db):
+    ids = pending_rows(db, 3)
+    buffer = DetailsWriteBuffer(max_rows=20, max_seconds=3600)
+    buffer.track_checkpoint(("details", "Rent", "Room", "0/1"))
+    buffer.add(detail(ids[0]), DETAIL_COLUMNS)
+    buffer.add(detail(ids[1], bedroom_count={"unbindable": 2}), DETAIL_COLUMNS)
+    buffer.mark_not_found(ids[2])
+    buffer.close()
+    assert details_checkpoint() == (ids[0], 2)
+
+# --- Sibling details reuse ---
+def siblings(db):
+    # The same listing under two unit_type filters
+    with db.Session() as session:
+        rows = [Properties(property_id="1", title="Listing 1", property_url="u1", property_selling_type="Rent", unit_type=unit_type, details_fetched=False) for unit_type in ("Room", "Studio")]
+        session.add_all(rows)
+        session.commit()
+        return [row.id for row in rows]
+
+def fetched_at(db, row_id):
+    with db.Session() as session:
+        return session.get(Properties, row_id).details_fetched_at
+
+def test_fresh_sibling_details_only_from_page_loads(db):
+    loaded, copied = siblings(db)
+    with DetailsWriteBuffer(max_rows=20, max_seconds=3600) as buffer:
+        buffer.add(detail(loaded), DETAIL_COLUMNS)
+    found = Properties.fresh_sibling_details([("1", "u1"), ("2", "u2")], DETAIL_COLUMNS, 3600)
+    assert found == {("1", "u1"): {"bedroom_count": 2, "furnishing": "Fully Furnished", "description": "Quiet unit"}}
+    assert Properties.fresh_sibling_details([("1", "u1")], DETAIL_COLUMNS, -60) == {}
+
+    # A copy that changed the row is not a source itself
+    with DetailsWriteBuffer(max_rows=20, max_seconds=3600) as buffer:
+        buffer.add(detail(copied), DETAIL_COLUMNS, reused=True)
+    assert buffer.reused == 1
+    assert fetched_at(db, copied) is None
+    with db.session_scope() as session:
+        session.get(Properties, loaded).details_fetched_at = None
+    assert Properties.fresh_sibling_details([("1", "u1")], DETAIL_COLUMNS, 3600) == {}
+
+def test_unchanged_copy_keeps_page_load_timestamp(db):
+    loaded, other = siblings(db)
+    with DetailsWriteBuffer(max_rows=20, max_seconds=3600) as buffer:
+        buffer.add(detail(loaded), DETAIL_COLUMNS)
+        buffer.add(detail(other), DETAIL_COLUMNS)
+    stamped = fetched_at(db, other)
+    with db.session_scope() as session:
+        session.get(Properties, other).details_fetched = False
+    with DetailsWriteBuffer(max_rows=20, max_seconds=3600) as buffer:
+        buffer.add(detail(other), DETAIL_COLUMNS, reused=True)
+    assert stamped is not None and fetched_at(db, other) == stamped
+    assert Properties.fresh_sibling_details([("1", "u1")], DETAIL_COLUMNS, 3600) != {}
+
+# --- DetailsLease.claim ---
+def test_lease_claim_two_workers_get_disjoint_rows(db):
+    ids = pending_rows(db, 5)
+    first = DetailsLease.claim("worker-a", "Rent", "Room", 3, 900)
+    second = DetailsLease.claim("worker-b", "Rent", "Room", 3, 900)
+    assert first == ids[:3]
+    assert second == ids[3:]
+    assert DetailsLease.claim("worker-c", "Rent", "Room", 3, 900) == []
+
+def test_lease_claim_concurrent_workers_never_share_a_row(db):
+    pending_rows(db, 20)
+    claimed = {}
+    start = threading.Barrier(2)
+    def claim(worker_id):
+        start.wait()
+        claimed[worker_id] = DetailsLease.claim(worker_id, "Rent", "Room", 10, 900)
+    threads = [threading.Thread(target=claim, args=(worker_id,)) for worker_id in ("worker-a", "worker-b")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not set(claimed["worker-a"]) & set(claimed["worker-b"])
+    with db.Session() as session:
+        leases = dict(session.execute(select(DetailsLease.property_row_id, DetailsLease.worker_id)).all())
+    for worker_id, ids in claimed.items():
+        assert all(leases[row_id] == worker_id for row_id in ids)
+
+def test_lease_claim_takes_over_expired_leases(db):
+    ids = pending_rows(db, 2)
+    assert DetailsLease.claim("worker-a", "Rent", "Room", 2, -60) == ids
+    assert DetailsLease.claim("worker-b", "Rent", "Room", 2, 900) == ids
@@ -0,0 +1,23 @@
+# tests/test_migrations.py
+import os
+import subprocess
+import sys
+
+import database
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+INIT_DB = "import sys; sys.path.insert(0, sys.argv[1]); import database; database.init_db({'backend': 'sqlite', 'sqlite_path': sys.argv[2]})"
+
+def test_concurrent_processes_apply_each_migration_once(tmp_path):
+    path = str(tmp_path / "smartvaluer.db")
+    processes = [subprocess.Popen([sys.executable, "-c", INIT_DB, SRC, path], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True) for _ in range(4)]
+    outputs = [process.communicate(timeout=120)[0] for process in processes]
+    assert [process.returncode for process in processes] == [0] * 4, outputs
+    migrations = database.list_migrations(os.path.join(database.MIGRATIONS_DIR, "sqlite"))
+    applied = [line for output in outputs for line in output.splitlines() if line.startswith("> Migration Applied")]
+    assert sorted(applied) == sorted(f"> Migration Applied: {name}" for _, name, _ in migrations)
+
+def test_migrations_release_the_lock(db):
+    db.run_migrations(os.path.join(db.MIGRATIONS_DIR, "sqlite"))
+    with db.engine.connect() as connection:
+        assert connection.exec_driver_sql("SELECT COUNT(*) FROM schema_migrations_lock").scalar() == 0
@@ -0,0 +1,70 @@
+# tests/test_page_state.py
+import os
+
+import pytest
+
+pytest.importorskip("seleniumbase")
+pytest.importorskip("psutil")
+
+from scraper.page_state import PageStateCapture
+from database import Properties
+from scraper.scraper_utils import DetailsStateInfo, ListingsStateInfo
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+class StateOnlyPage:
+    # Stands in for sb: only the embedded __NEXT_DATA__ script is answered
+    def __init__(self, name):
+        with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+            self.next_data = f.read()
+
+    def execute_script(self, script):
+        return self.next_data
+
+def payloads(name):
+    return PageStateCapture().collect(StateOnlyPage(name))
+
+def test_details_state_partial_payload_keeps_only_present_columns():
+    info = DetailsStateInfo(None, payloads("details_next_data_partial.json"), property_id=24000001)
+    assert info.found
+    assert info.details == {
+        "description": "Bright corner unit",
+        "property_type": "Condo",
+        "property_type_text": "Condominium",
+        "bedroom_count": 2,
+        "bathroom_count": 1,
+        "furnishing": "Partially Furnished",
+        "floor_size_sqft": 753,
+        "raw_amenities_text": "Pool || Gym",
+    }
+    assert info.columns == [col for col in DetailsStateInfo.DETAIL_COLUMNS if col in info.details]
+
+def test_details_state_ignores_other_listings():
+    assert not DetailsStateInfo(None, payloads("details_next_data_partial.json"), property_id=99).found
+
+def test_listings_state_leaves_out_columns_without_keys():
+    info = ListingsStateInfo(payloads("listings_next_data_partial.json"), "Rent", -1, ["101", "102"])
+    assert [listing["property_id"] for listing in info.cur_page_listings] == ["101", "102"]
+    # 102 has no isVerified key, so the flag is left out for the whole page instead of written as False
+    assert set(info.cur_page_listings[0]) == {
+        "property_id", "title", "address", "property_url", "agent_name", "property_selling_type", "unit_type", "selling_price", "selling_price_text",
+    }
+    assert info.cur_page_listings[1]["selling_price"] == 2800
+
+def test_listings_state_falls_back_when_a_card_is_missing():
+    assert ListingsStateInfo(payloads("listings_next_data_partial.json"), "Rent", -1, ["101", "103"]).cur_page_listings == []
+
+def test_listings_state_keeps_columns_scraped_from_the_dom(db, listing):
+    info = ListingsStateInfo(payloads("listings_next_data_partial.json"), "Rent", -1, ["101", "102"])
+    dom_rows = [
+        listing(row["property_id"], title=row["title"], address=row["address"], property_url=row["property_url"], agent_name=row["agent_name"],
+                selling_price=row["selling_price"], selling_price_text=row["selling_price_text"], is_verified_property=True, agent_rating=4.5)
+        for row in info.cur_page_listings
+    ]
+    assert Properties.bulk_upsert_listings(dom_rows) == ["insert", "insert"]
+    with db.session_scope() as session:
+        session.execute(Properties.__table__.update().values(details_fetched=True))
+    assert Properties.bulk_upsert_listings(info.cur_page_listings) == ["ignore", "ignore"]
+    with db.Session() as session:
+        rows = session.query(Properties).order_by(Properties.id).all()
+        assert [(row.is_verified_property, row.agent_rating, row.details_fetched) for row in rows] == [(True, 4.5, True), (True, 4.5, True)]
@@ -0,0 +1,44 @@
+# tests/test_parquet_export.py
+import pytest
+
+pytest.importorskip("pyarrow")
+ds = pytest.importorskip("pyarrow.dataset")
+
+from sqlalchemy import func, update
+
+from database import Properties
+from parquet_export import ParquetExporter
+
+def backdate(db, property_id, **values):
+    # Rows changed in the current second wait for the next export, so move the change into the past
+    # (stored through SQLite's datetime() so it keeps the CURRENT_TIMESTAMP text format)
+    values = {column: func.datetime(value) for column, value in values.items()}
+    with db.session_scope() as session:
+        session.execute(update(Properties).where(Properties.property_id == str(property_id)).values(**values))
+
+def exported(path):
+    table = ds.dataset(str(path), format="parquet", partitioning="hive").to_table()
+    return sorted((row["property_id"], row["selling_price"], row["unit_type"], str(row["date"])) for row in table.to_pylist())
+
+def test_export_is_incremental_by_watermark(db, listing, tmp_path):
+    output_dir = tmp_path / "parquet"
+    Properties.bulk_upsert_listings([listing(1), listing(2)])
+    backdate(db, 1, created_at="2025-01-05 10:00:00")
+    backdate(db, 2, created_at="2025-01-05 11:00:00")
+    exporter = ParquetExporter(output_dir=str(output_dir), batch_rows=1)
+    exporter.run()
+    assert (exporter.rows_written, exporter.batches) == (2, 2)
+    assert exported(output_dir) == [("1", 2000, "Room", "2025-01-05"), ("2", 2000, "Room", "2025-01-05")]
+
+    # Nothing changed since the watermark
+    exporter = ParquetExporter(output_dir=str(output_dir))
+    exporter.run()
+    assert exporter.rows_written == 0
+
+    # An updated listing is written again under the day of its change
+    Properties.bulk_upsert_listings([listing(2, selling_price=2100)])
+    backdate(db, 2, updated_at="2025-01-06 09:00:00")
+    exporter = ParquetExporter(output_dir=str(output_dir))
+    exporter.run()
+    assert exporter.rows_written == 1
+    assert ("2", 2100, "Room", "2025-01-06") in exported(output_dir)
@@ -0,0 +1,37 @@
+# tests/test_pipeline.py
+import random
+import time
+
+from scraper.pipeline import Pipeline
+
+def slow_parse(item):
+    # Parsers finish out of order
+    time.sleep(random.uniform(0, 0.01))
+    return None if item % 5 == 0 else item * 10
+
+def test_pipeline_writes_in_submission_order():
+    written = []
+    with Pipeline(parse=slow_parse, write=written.append, parsers=4, queue_size=2) as pipeline:
+        for item in range(50):
+            pipeline.submit(item)
+    assert written == [item * 10 for item in range(50) if item % 5 != 0]
+    assert (pipeline.submitted, pipeline.written, pipeline.errors) == (50, 40, 0)
+
+def test_pipeline_inline_without_parsers():
+    written = []
+    with Pipeline(parse=slow_parse, write=written.append, parsers=0) as pipeline:
+        for item in range(10):
+            pipeline.submit(item)
+    assert written == [item * 10 for item in range(10) if item % 5 != 0]
+
+def test_pipeline_counts_errors_and_keeps_going():
+    def parse(item):
+        if item == 3:
+            raise ValueError("bad page")
+        return item
+    written = []
+    with Pipeline(parse=parse, write=written.append, parsers=2) as pipeline:
+        for item in range(6):
+            pipeline.submit(item)
+    assert written == [0, 1, 2, 4, 5]
+    assert pipeline.errors == 1
@@ -0,0 +1,47 @@
+# tests/test_rate_limiter.py
+import pytest
+
+from scraper import rate_limiter
+from scraper.rate_limiter import RateLimiter
+
+@pytest.fixture
+def slept(monkeypatch):
+    # Record sleeps instead of taking them
+    calls = []
+    monkeypatch.setattr(rate_limiter.time, "sleep", calls.append)
+    return calls
+
+def test_success_raises_rate_additively_up_to_max():
+    limiter = RateLimiter(rate=0.5, max_rate=0.55, increase=0.02)
+    limiter.success()
+    assert limiter.rate == pytest.approx(0.52)
+    limiter.success()
+    limiter.success()
+    assert limiter.rate == 0.55
+    assert limiter.successes == 3
+
+def test_backoff_cuts_rate_multiplicatively_down_to_min():
+    limiter = RateLimiter(rate=0.4, min_rate=0.05, decrease=0.5)
+    limiter.backoff("Challenge")
+    assert limiter.rate == pytest.approx(0.2)
+    for _ in range(5):
+        limiter.backoff()
+    assert limiter.rate == 0.05
+    assert limiter.backoffs == 6
+
+def test_settle_scales_with_pressure(slept):
+    limiter = RateLimiter(rate=1.0, min_rate=0.1, max_rate=1.0, decrease=0.1, jitter=0, settle_range=(0.5, 3.0))
+    assert limiter.settle() == 0.5
+    limiter.backoff()
+    assert limiter.pressure() == 1.0
+    assert limiter.settle() == 3.0
+    assert slept == [0.5, 3.0]
+
+def test_wait_sleeps_only_once_the_bucket_is_empty(slept):
+    limiter = RateLimiter(rate=0.25, jitter=0)
+    limiter.wait()
+    assert slept == []
+    limiter.wait()
+    assert len(slept) == 1
+    assert slept[0] == pytest.approx(4.0, rel=0.01)
+    assert limiter.requests == 2
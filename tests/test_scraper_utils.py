@@ -0,0 +1,107 @@
+# tests/test_scraper_utils.py
+import pytest
+
+pytest.importorskip("seleniumbase")
+pytest.importorskip("psutil")
+
+from datetime import date
+
+from sqlalchemy import select
+
+from database import CrawlState, DetailsWriteBuffer, Properties
+from scraper.scraper_utils import DetailsInfo, ScraperUtils
+
+def scraped_row(db, buffer):
+    # One pending row whose details (text columns included) were scraped before
+    with db.Session() as session:
+        prop = Properties(property_id="1", title="Listing 1", property_url="u1", property_selling_type="Rent", unit_type="Room", details_fetched=False)
+        session.add(prop)
+        session.commit()
+        row_id = prop.id
+    buffer.add({"id": row_id, "description": "Stored description", "raw_amenities_text": "Pool", "bedroom_count": 2}, ["description", "raw_amenities_text", "bedroom_count"])
+    buffer.flush()
+    with db.session_scope() as session:
+        session.get(Properties, row_id).details_fetched = False
+    return row_id
+
+def pending(db, row_id):
+    with db.Session() as session:
+        return session.execute(select(Properties).where(Properties.id == row_id)).scalar_one()
+
+def stored_details(db, row_id):
+    with db.Session() as session:
+        prop = session.get(Properties, row_id)
+        return prop.details_fetched, prop.description, prop.raw_amenities_text, prop.bedroom_count
+
+def scraper(buffer):
+    return ScraperUtils(session=None, mode="Rent", unit_type=-1, details_buffer=buffer, pipeline_parsers=0)
+
+def test_failed_extraction_keeps_stored_text(db):
+    buffer = DetailsWriteBuffer(max_rows=20, max_seconds=3600)
+    row_id = scraped_row(db, buffer)
+    utils = scraper(buffer)
+    utils.persist_details({"row": utils.details_row(pending(db, row_id)), "details": {}})
+    buffer.close()
+    assert stored_details(db, row_id) == (True, "Stored description", "Pool", 2)
+
+def test_partial_extraction_writes_only_its_columns(db):
+    buffer = DetailsWriteBuffer(max_rows=20, max_seconds=3600)
+    row_id = scraped_row(db, buffer)
+    utils = scraper(buffer)
+    utils.persist_details({"row": utils.details_row(pending(db, row_id)), "details": {"bedroom_count": 3}, "columns": ["bedroom_count"]})
+    buffer.close()
+    assert stored_details(db, row_id) == (True, "Stored description", "Pool", 3)
+
+def test_full_extraction_writes_every_column(db):
+    buffer = DetailsWriteBuffer(max_rows=20, max_seconds=3600)
+    row_id = scraped_row(db, buffer)
+    utils = scraper(buffer)
+    details = {col: None for col in DetailsInfo.DETAIL_COLUMNS}
+    details.update(description="New description", bedroom_count=2)
+    utils.persist_details({"row": utils.details_row(pending(db, row_id)), "details": details, "columns": list(DetailsInfo.DETAIL_COLUMNS)})
+    buffer.close()
+    assert stored_details(db, row_id) == (True, "New description", None, 2)
+
+def test_backlog_walk_projects_columns_in_keyset_pages(db, monkeypatch):
+    with db.Session() as session:
+        rows = [Properties(property_id=str(n), title=f"Listing {n}", property_url=f"u{n}", property_selling_type="Rent", unit_type="Room", details_fetched=n == 2) for n in range(6)]
+        session.add_all(rows)
+        session.commit()
+        ids = [row.id for row in rows]
+    monkeypatch.setattr(ScraperUtils, "BACKLOG_PAGE_SIZE", 2)
+    with db.Session() as session:
+        utils = ScraperUtils(session=session, mode="Rent", unit_type=-1)
+        query = session.query(Properties).filter_by(details_fetched=False, property_selling_type="Rent", unit_type="Room")
+        walked = list(utils.iter_pending_properties(query, None, after_id=ids[0]))
+        assert [prop.id for prop in walked] == [ids[1], ids[3], ids[4], ids[5]]
+        assert tuple(walked[0]._fields) == ScraperUtils.BACKLOG_COLUMNS
+        assert [prop.id for prop in utils.iter_pending_properties(query, 3)] == [ids[0], ids[1], ids[3]]
+        assert set(utils.details_row(walked[0])) == set(ScraperUtils.BACKLOG_COLUMNS) | set(DetailsInfo.DETAIL_COLUMNS)
+
+def crawl(session, pages, high_water_mark=None):
+    # Writer stage of an incremental crawl over already parsed pages; returns the known-page count after each
+    utils = ScraperUtils(session=session, mode="Rent", unit_type=-1, stop_after_known_pages=2)
+    utils.high_water_mark = high_water_mark
+    counts = []
+    for listings in pages:
+        utils.persist_listings({"page": None, "listings": listings})
+        counts.append(utils.known_pages)
+    utils.save_high_water_mark(len(pages))
+    return counts
+
+def test_incremental_crawl_counts_known_pages(db, listing):
+    old = [
+        [listing(3, listed_date=date(2025, 1, 5)), listing(2, listed_date=date(2025, 1, 4))],
+        [listing(1, listed_date=date(2025, 1, 3))],
+    ]
+    with db.Session() as session:
+        # Nothing is known before the first crawl saves a high-water mark
+        assert crawl(session, old) == [0, 0]
+        high_water_mark = CrawlState.high_water_mark("Rent", "Room")
+        assert high_water_mark == CrawlState.listing_key(date(2025, 1, 5), "3")
+
+        # A newer listing or a changed one resets the count, unchanged pages below the mark add to it
+        new = [listing(4, listed_date=date(2025, 1, 6))]
+        changed = [listing(1, listed_date=date(2025, 1, 3), selling_price=2100)]
+        assert crawl(session, [new, *old, changed], high_water_mark) == [0, 1, 2, 0]
+        assert CrawlState.high_water_mark("Rent", "Room") == CrawlState.listing_key(date(2025, 1, 6), "4")
@@ -0,0 +1,52 @@
+# tests/test_shard_planner.py
+import pytest
+
+pytest.importorskip("seleniumbase")
+pytest.importorskip("psutil")
+
+from scraper.shard_planner import ListingsShardPlanner
+
+class StubPlanner(ListingsShardPlanner):
+    # Totals per (min_price, max_price, district) instead of loading the first page
+    def __init__(self, totals, **kwargs):
+        super().__init__(browser=None, rate_limiter=None, challenges=None, **kwargs)
+        self.totals = totals
+        self.probed = []
+
+    def probe(self, mode, unit_type, last_posted, min_price, max_price, district):
+        self.probes += 1
+        self.probed.append((min_price, max_price, district))
+        return self.totals.get((min_price, max_price, district)), self.PAGE_SIZE
+
+def test_bands_are_inclusive_and_open_ended():
+    assert ListingsShardPlanner.bands([2000, 1000, 1000]) == [(None, 999), (1000, 1999), (2000, None)]
+    assert ListingsShardPlanner.bands([]) == [(None, None)]
+
+def test_plan_drops_empty_bands_and_bisects_deep_ones():
+    planner = StubPlanner({
+        (None, 999, None): 0,
+        (1000, 1999, None): 2000,  # 100 pages
+        (1000, 1499, None): 500,
+        (1500, 1999, None): 1000,
+        (2000, None, None): None,  # Probe failed
+    }, max_pages=50)
+    shards = planner.plan("Rent", -1, 1, [1000, 2000])
+    assert [(shard["min_price"], shard["max_price"], shard["total"], shard["pages"]) for shard in shards] == [
+        (1000, 1499, 500, 25),
+        (1500, 1999, 1000, 50),
+        (2000, None, None, None),
+    ]
+    assert planner.probes == 5
+
+def test_plan_splits_open_band_by_district():
+    totals = {(None, None, None): 5000}
+    totals.update({(None, None, code): 0 for code in ListingsShardPlanner.DISTRICTS})
+    totals[(None, None, "D09")] = 300
+    planner = StubPlanner(totals, max_pages=50, by_district=True)
+    shards = planner.plan("Rent", -1, 1, [])
+    assert [(shard["district"], shard["pages"]) for shard in shards] == [("D09", 15)]
+
+def test_plan_keeps_bands_unsplit_when_probe_budget_is_spent():
+    planner = StubPlanner({(None, 999, None): 10}, max_pages=50, max_probes=1)
+    shards = planner.plan("Rent", -1, 1, [1000])
+    assert [(shard["min_price"], shard["max_price"], shard["total"]) for shard in shards] == [(None, 999, 10), (1000, None, None)]
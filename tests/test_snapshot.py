@@ -0,0 +1,104 @@
+# tests/test_snapshot.py
+import os
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+pytest.importorskip("seleniumbase")
+pytest.importorskip("psutil")
+
+from scraper.scraper_utils import DetailsInfo, ListingsHtmlInfo, ListingsInfo, SnapshotDetailsInfo
+from scraper.snapshot import PageSnapshot
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+CARDS = '//*[@class="listing-card-banner-root"]'
+DETAILS_MODAL = '//div[@class="property-modal-body-wrapper"]'
+AMENITIES_MODAL = '//div[@class="amenities-facilities-modal-body modal-body"]'
+
+def saved_page(name):
+    # The saved page stands in for the live browser: its elements answer the same XPaths
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return PageSnapshot(f.read())
+
+def test_listings_html_engine_matches_dom_engine():
+    cards = saved_page("listings_page.html").find_elements(CARDS)
+    dom = ListingsInfo(cards, "Rent", -1).cur_page_listings
+    html = ListingsHtmlInfo([card.get_attribute("outerHTML") for card in cards], "Rent", -1).cur_page_listings
+    assert html == dom
+    assert dom == [
+        {
+            "property_id": "24000001",
+            "title": "The Sail @ Marina Bay",
+            "address": "2 Marina Boulevard",
+            "property_url": "https://www.propertyguru.com.sg/listing/for-rent-the-sail-24000001",
+            "availability": "Ready to Move",
+            "project_year": 2008,
+            "closest_mrt": "DT17 Downtown MRT",
+            "distance_to_closest_mrt": 460,
+            "is_verified_property": True,
+            "is_everyone_welcomed": True,
+            "listed_date": date(2025, 1, 5),
+            "agent_name": "Jane Tan",
+            "agent_rating": 4.8,
+            "property_selling_type": "Rent",
+            "unit_type": "Room",
+            "selling_price": Decimal("1850.00"),
+            "selling_price_text": "S$ 1,850 /mo",
+        },
+        {
+            "property_id": "24000002",
+            "title": "Tampines Street 21",
+            "address": "Tampines Street 21",
+            "property_url": "https://www.propertyguru.com.sg/listing/for-rent-tampines-24000002",
+            "availability": None,
+            "project_year": None,
+            "closest_mrt": "EW2 Tampines MRT",
+            "distance_to_closest_mrt": 1040,
+            "is_verified_property": False,
+            "is_everyone_welcomed": False,
+            "listed_date": date(2024, 12, 28),
+            "agent_name": "Ken Lim",
+            "agent_rating": None,
+            "property_selling_type": "Rent",
+            "unit_type": "Room",
+            "selling_price": Decimal("950.00"),
+            "selling_price_text": "S$ 950 /mo",
+        },
+    ]
+
+def captured_snapshot(page):
+    # What SNAPSHOT_SCRIPT returns for the saved page: inline amenities, details and facilities behind a button
+    return {
+        "page": page.get_attribute("outerHTML"),
+        "has_details_section": True,
+        "has_amenities_section": True,
+        "has_facilities_section": True,
+        "details_modal": page.find_element(DETAILS_MODAL).get_attribute("outerHTML"),
+        "amenities_modal": None,
+        "facilities_modal": page.find_element(AMENITIES_MODAL).get_attribute("outerHTML"),
+    }
+
+def test_snapshot_details_engine_matches_dom_engine():
+    # Clicks are no-ops on the saved page, which already has both modals rendered
+    page = saved_page("details_page.html")
+    dom = DetailsInfo(page).details
+    snapshot = SnapshotDetailsInfo(None, snapshot=captured_snapshot(page)).details
+    assert snapshot == dom
+    assert dom == {
+        "description": "Bright corner unit\nFull sea view.\nWalk to Downtown MRT.",
+        "bedroom_count": 2,
+        "bathroom_count": 1,
+        "property_type": "Condo",
+        "property_type_text": "Condominium for rent",
+        "lease_term": "Leasehold",
+        "lease_term_text": "99-year Leasehold",
+        "furnishing": "Partially Furnished",
+        "floor_size_sqft": 753,
+        "land_size_sqft": None,
+        "psf_floor": Decimal("2.46"),
+        "psf_land": None,
+        "raw_details_text": "Condominium for rent || 99-year Leasehold || Partially Furnished || 753 sqft floor area || S$ 2.46 psf",
+        "raw_amenities_text": "Air-Conditioning || Washing Machine",
+        "raw_facilities_text": "Swimming Pool || Gym || BBQ Pits",
+    }